@@ -3,13 +3,16 @@
 # Some modifications were made by Casey Smith (2023), in particular the 
 # values for the bg and disabledbg colors in light mode.  
 
-source [file join [file dirname [info script]] theme light.tcl]
-source [file join [file dirname [info script]] theme dark.tcl]
+# Each theme, along with its images, is sourced the first time it is selected rather than when this file is sourced.
+set azure_theme_dir [file join [file dirname [info script]] theme]
 
 option add *tearOff 0
 
 proc set_theme {mode} {
 	if {$mode == "dark"} {
+		if {"azure-dark" ni [ttk::style theme names]} {
+			source [file join $::azure_theme_dir dark.tcl]
+		}
 		ttk::style theme use "azure-dark"
 
 		array set colors {
@@ -49,6 +52,9 @@ proc set_theme {mode} {
         option add *Menu.selectcolor $colors(-fg)
     
 	} elseif {$mode == "light"} {
+		if {"azure-light" ni [ttk::style theme names]} {
+			source [file join $::azure_theme_dir light.tcl]
+		}
 		ttk::style theme use "azure-light"
 
         array set colors {
@@ -0,0 +1,72 @@
+"""
+Compares two result files written by benchmarks/run_benchmarks.py, e.g. from two different commits. Run from the
+repository's root:
+
+    python -m benchmarks.compare OLD.json NEW.json [--threshold 1.1] [--fail-on-regression]
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import sys
+import json
+import argparse
+
+
+def load_results(filename):
+    with open(filename) as file:
+        data = json.load(file)
+
+    return data["metadata"], {(entry["name"], json.dumps(entry["parameters"], sort_keys=True)): entry
+                              for entry in data["results"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two planarFlow benchmark result files.")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=1.1,
+                        help="ratio of medians above which a benchmark counts as slower (default: 1.1)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with status 1 if anything is slower")
+    args = parser.parse_args()
+
+    old_metadata, old_results = load_results(args.old)
+    new_metadata, new_results = load_results(args.new)
+    print("old: {} ({})\nnew: {} ({})\n".format(old_metadata["revision"], old_metadata["date"],
+                                                 new_metadata["revision"], new_metadata["date"]))
+
+    regressions = 0
+    print("{:<40} {:<45} {:>11} {:>11} {:>7}".format("benchmark", "parameters", "old [s]", "new [s]", "ratio"))
+    for key in sorted(set(old_results) & set(new_results)):
+        ratio = new_results[key]["median"] / old_results[key]["median"]
+        if ratio > args.threshold:
+            verdict = "slower"
+            regressions += 1
+        elif ratio < 1 / args.threshold:
+            verdict = "faster"
+        else:
+            verdict = ""
+
+        print("{:<40} {:<45} {:>11.3e} {:>11.3e} {:>7.2f} {}".format(key[0], key[1], old_results[key]["median"],
+                                                                      new_results[key]["median"], ratio, verdict))
+
+    for label, missing in (("only in old", set(old_results) - set(new_results)),
+                           ("only in new", set(new_results) - set(old_results))):
+        for key in sorted(missing):
+            print("{:<40} {:<45} {}".format(key[0], key[1], label))
+
+    if args.fail_on_regression and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
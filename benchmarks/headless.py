@@ -0,0 +1,138 @@
+"""
+Headless stand-in for the top window of planarFlow, used by the benchmarks. It holds the same attributes that the App
+sets up and that the functions in lib read, but draws on a matplotlib Agg canvas instead of a Tk window.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import inspect
+from types import SimpleNamespace
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from lib.configureplot import (set_figure_properties, set_figure_colors, set_figure_axes, set_figure_ticks,
+                               set_figure_ticklabels, set_figure_grid)
+from lib.updatablecollections import UpdatableLineCollection, UpdatablePatchCollection
+from lib.trajectorystore import TrajectoryStore
+from lib.expressions import Expression
+import lib.numerical_methods
+
+
+def is_numerical_method(member):
+    # Same as the app's: the functions defined in lib/numerical_methods, except the private helpers.
+    return (inspect.isfunction(member) and member.__module__ == lib.numerical_methods.__name__ and
+            not member.__name__.startswith("_"))
+
+
+class HeadlessVariable:
+    # Replaces the Tk variables of the frames, which cannot be created without a display.
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+def create_app(dxdt="y", dydt="-x - 0.5*y", tmax=2., dt=0.01, numerical_method="RK2", width=1200, height=900,
+               xmin=-1., xmax=1., ymin=-1., ymax=1., trajectory_storage="memory", precision="float64", parameters=None):
+    top = SimpleNamespace()
+
+    top.numerical_method_dict = dict(inspect.getmembers(lib.numerical_methods, is_numerical_method))
+    top.numerical_method = numerical_method
+    top.precision_dict = {"float64": (np.float64, np.float64),
+                          "float32 storage": (np.float64, np.float32),
+                          "float32": (np.float32, np.float32)}
+    top.precision = precision
+    top.trajectory_storage = trajectory_storage
+    top.trajectory_rendering = "lines"
+
+    top.figure_width = width
+    top.figure_height = height
+    top.figure_background_color = "#404040"
+    top.figure_axes_color = "white"
+    top.figure_axes_linewidth = 2
+    top.figure_tick_length = 8
+    top.figure_tick_fontsize = 10
+    top.figure_grid_linewidth = 1
+    top.figure_grid_style = ":"
+    top.figure_grid_alpha = 0.5
+    top.flow_color = "white"
+    top.flow_highlight_color = "cyan"
+    top.flow_linewidth = 1
+    top.flow_circle_diameter = 10
+    top.flow_arrowhead_size = 8
+    top.graph_linewidth = 2
+    top.graphs = []
+    top.limit_cycles = []
+    top.basin_map = None
+    top.basin_image = None
+    top.ftle_field = None
+    top.ftle_image = None
+    top.flows = []
+    top.flow_seeds = set()
+    top.collection_colors = []
+    top.trajectory_density = None
+    top.trajectory_density_image = None
+    top.export_dpi = 300
+    top.export_rasterize = "auto"
+    top.export = None
+    top.time_series_fontsize = 11
+    top.time_series = None
+    top.parameters_window = None
+    top.trajectory_store = TrajectoryStore(trajectory_storage, top.precision_dict[precision][1])
+
+    top.flow_trajectory_collection = UpdatableLineCollection(lines=[], linewidths=top.flow_linewidth,
+                                                             colors=top.flow_color, zorder=-3)
+    top.flow_circle_collection = UpdatablePatchCollection(patches=[], facecolors=top.flow_color, zorder=-1)
+    top.flow_arrowhead_collection = UpdatablePatchCollection(patches=[], facecolors=top.flow_color, zorder=-2)
+
+    top.fig = Figure(figsize=(width / 100, height / 100), dpi=100)
+    FigureCanvasAgg(top.fig)
+    top.ax = top.fig.add_subplot(1, 1, 1)
+    top.ax.add_collection(top.flow_trajectory_collection)
+    top.ax.add_collection(top.flow_circle_collection)
+    top.ax.add_collection(top.flow_arrowhead_collection)
+    top.annot = top.ax.annotate("", xy=(0, 0), xytext=(0, 0), textcoords="offset points",
+                                color=top.figure_axes_color,
+                                bbox=dict(boxstyle="round", facecolor=top.figure_background_color,
+                                          edgecolor=top.flow_highlight_color), zorder=2)
+    top.annot.set_visible(False)
+
+    top.figure_settings = SimpleNamespace(xmin=xmin, xmax=xmax, ymin=ymin, ymax=ymax, xtick_spacing=0.25,
+                                          ytick_spacing=0.25, show_x_ticklabels=HeadlessVariable(1),
+                                          show_y_ticklabels=HeadlessVariable(1), show_grid=HeadlessVariable(1),
+                                          is_configured=True)
+
+    parameters = dict(parameters or {})
+    top.differential_equations = SimpleNamespace(dxdt=Expression(dxdt, ("t", "x", "y"), parameters),
+                                                 dydt=Expression(dydt, ("t", "x", "y"), parameters),
+                                                 tmax=tmax, dt=dt, is_configured=True,
+                                                 equation_strings={"dxdt": dxdt, "dydt": dydt, "tmax": str(tmax),
+                                                                   "dt": str(dt)},
+                                                 parameters=parameters,
+                                                 parameter_ranges={name: (0., 2.) for name in parameters})
+
+    set_figure_properties(top.fig, top.ax, top.figure_tick_length, top.figure_tick_fontsize, top.figure_axes_linewidth,
+                          top.figure_grid_style, top.figure_grid_linewidth, top.figure_grid_alpha)
+    set_figure_colors(top.fig, top.ax, top.figure_background_color, top.figure_axes_color)
+    set_figure_axes(top.fig, top.ax, xmin, xmax, ymin, ymax, top.figure_axes_color)
+    set_figure_ticks(top.fig, top.ax, 0.25, xmin, xmax, 0.25, ymin, ymax)
+    set_figure_ticklabels(top.fig, top.ax, 1, xmin, xmax, 1, ymin, ymax)
+    set_figure_grid(top.fig, top.ax, 1, 0.25, 0.25)
+    top.fig.canvas.draw()
+
+    return top
@@ -0,0 +1,648 @@
+"""
+Benchmark suite for planarFlow. Every benchmark runs headless on matplotlib's Agg backend and the results are written
+to a JSON file that can be compared across commits with benchmarks/compare.py. Run from the repository's root:
+
+    python -m benchmarks.run_benchmarks [--quick] [--filter NAME] [--output FILE]
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import io
+import os
+import sys
+import tempfile
+import json
+import time
+import platform
+import argparse
+import subprocess
+import statistics
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+from matplotlib.backend_bases import MouseEvent
+
+from lib.graph import Graph
+from lib.expressions import Expression
+from lib.events import find_crossings
+from lib.limitcycles import find_limit_cycles
+from lib.basins import BasinMap
+from lib.ftle import FTLEField
+from lib.parallel import get_pool
+from lib.flow import Flow, prepare_equations, integrate_flows, FlowStack
+from lib.density import TrajectoryDensity, set_trajectory_rendering
+from lib.export import Export
+from lib.timeseries import TimeSeriesPlot
+from lib.parameters import set_parameter_values
+from lib.bifurcation import BifurcationSweep
+from lib.navigation import set_view_limits, update_view
+from lib.fieldframes import FieldFrames
+from lib.seeds import REGION_GENERATORS, curve_seeds, parse_curve
+from lib.pyramid import drawn_trajectory
+from lib.updatablecollections import TrailCollection
+from lib.denseoutput import frame_times
+from lib.configureplot import set_plot_window_style
+import lib.numerical_methods
+import lib.fieldframes
+from lib.frames.addtrajectoriesframe import add_flows, seed_flow
+from .headless import create_app
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def measure(function, repeats, setup=None):
+    # Returns the wall-clock time of each call of function. The setup is run before each call and is not timed; its
+    # return value is passed to function.
+    times = []
+    for _ in range(repeats):
+        argument = setup() if setup is not None else None
+        start = time.perf_counter()
+        function(argument)
+        times.append(time.perf_counter() - start)
+
+    return times
+
+
+def result(name, parameters, times, per=1):
+    # Times are stored per item (e.g. per step or per frame) when per is given, so results are comparable when the
+    # number of items changes.
+    times = [t / per for t in times]
+    return {"name": name, "parameters": parameters, "unit": "s", "times": times, "min": min(times),
+            "median": statistics.median(times), "mean": statistics.mean(times)}
+
+
+def seeds_in_view(top, n, rng):
+    return list(zip(rng.uniform(top.figure_settings.xmin, top.figure_settings.xmax, n),
+                    rng.uniform(top.figure_settings.ymin, top.figure_settings.ymax, n)))
+
+
+def populated_app(n, **kwargs):
+    top = create_app(**kwargs)
+    add_flows(top, seeds_in_view(top, n, np.random.default_rng(0)))
+    return top
+
+
+def bench_numerical_methods(quick):
+    top = create_app()
+    tmax, dt = 10., 1E-3
+    steps = int(round(tmax / dt))
+
+    for method, integrator in sorted(top.numerical_method_dict.items()):
+        times = measure(lambda _: integrator(top.differential_equations.dxdt.kernel,
+                                             top.differential_equations.dydt.kernel, 0.5, 0.5, tmax, dt),
+                        3 if quick else 5)
+        yield result("numerical_methods.{}.seed".format(method), {"steps": steps}, times)
+        yield result("numerical_methods.{}.step".format(method), {"steps": steps}, times, per=steps)
+
+
+def bench_add_trajectories(quick):
+    for n in (10, 1000) if quick else (10, 1000, 10000):
+        rng = np.random.default_rng(0)
+
+        def setup():
+            top = create_app()
+            return top, seeds_in_view(top, n, rng)
+
+        times = measure(lambda argument: add_flows(*argument), 1 if n >= 10000 else 3, setup)
+        yield result("add_trajectories", {"seeds": n, "steps": 200}, times)
+        yield result("add_trajectories.per_seed", {"seeds": n, "steps": 200}, times, per=n)
+
+
+def bench_graph_contours(quick):
+    top = create_app()
+
+    for expression in ("x**2 + y**2 - 0.5", "y - sin(5*x)", "sin(10*x)*cos(10*y) - 0.1"):
+        eqn = Expression(expression, ("x", "y"))
+
+        def contour(_):
+            graph = Graph(eqn, -np.inf, np.inf, -np.inf, np.inf, "b", top.graph_linewidth, expression)
+            graph.create_meshgrid(top.figure_settings.xmin, top.figure_settings.xmax, top.figure_settings.ymin,
+                                  top.figure_settings.ymax)
+            graph.create_contours(top.fig, top.ax)
+            graph.contours.remove()
+
+        yield result("graph.create_contours", {"expression": expression}, measure(contour, 3 if quick else 10))
+
+
+def hover(top, event):
+    # Mirrors the work done by the App's hover handler: hit-testing the circles, recoloring the collections, showing
+    # the annotation, and redrawing.
+    cont, ind = top.flow_circle_collection.contains(event)
+    top.collection_colors = [top.flow_color] * len(top.flows)
+    if cont:
+        top.collection_colors[ind["ind"][0]] = top.flow_highlight_color
+        top.annot.xy = top.flow_circle_collection.patches[ind["ind"][0]].center
+        top.annot.set_text("x0 = {:+.2f}\ny0 = {:+.2f}".format(*top.annot.xy))
+
+    top.flow_circle_collection.set_facecolors(top.collection_colors)
+    top.flow_trajectory_collection.set_color(top.collection_colors)
+    top.flow_arrowhead_collection.set_facecolors(top.collection_colors)
+    top.annot.set_visible(cont)
+    top.fig.canvas.draw()
+
+
+def bench_hover(quick):
+    for n in (100, 1000):
+        top = populated_app(n)
+
+        for target, (x, y) in (("hit", (top.flows[0].x0, top.flows[0].y0)), ("miss", (10., 10.))):
+            px, py = top.ax.transData.transform((x, y))
+            event = MouseEvent("motion_notify_event", top.fig.canvas, px, py)
+            yield result("hover", {"flows": n, "target": target}, measure(lambda _: hover(top, event),
+                                                                          5 if quick else 20))
+
+
+def bench_animation(quick):
+    frames = 50 if quick else 200
+
+    for n in (100, 1000):
+        top = populated_app(n)
+        canvas = top.fig.canvas
+        background = canvas.copy_from_bbox(top.ax.bbox)
+
+        # Mirrors the animation's frame function followed by a blitted draw of the circles.
+        def animate(_):
+            for frame in range(frames):
+                for flow in top.flows:
+                    flow.circle.center = (flow.x_values[frame], flow.y_values[frame])
+                canvas.restore_region(background)
+                top.ax.draw_artist(top.flow_circle_collection)
+                canvas.blit(top.ax.bbox)
+
+        yield result("animation.frame", {"flows": n}, measure(animate, 3), per=frames)
+
+
+def bench_pdf_export(quick):
+    for n in (100, 1000):
+        top = populated_app(n)
+        yield result("pdf_export", {"flows": n},
+                     measure(lambda _: top.fig.savefig(io.BytesIO(), format="pdf", dpi=1000), 1 if quick else 3))
+
+
+def bench_export(quick):
+    # The background export, run in the calling thread. The time includes simplifying the trajectories, and the
+    # resulting file sizes are reported on stderr.
+    with tempfile.TemporaryDirectory() as directory:
+        for n in (100, 1000) if quick else (100, 1000, 10000):
+            top = populated_app(n, tmax=10.)
+            for file_format in ("pdf", "svg", "png"):
+                filename = os.path.join(directory, "export." + file_format)
+
+                def export(_):
+                    Export(top, filename, file_format, top.export_dpi, top.export_rasterize).run()
+
+                yield result("export.{}".format(file_format), {"flows": n, "steps": 1000},
+                             measure(export, 1 if quick else 3))
+                print("export.{} flows={}: {} kB".format(file_format, n, os.path.getsize(filename) // 1024),
+                      file=sys.stderr)
+
+
+def bench_events(quick):
+    # Long trajectories of an oscillator crossing the section y = 0 about once per unit of time.
+    event = Expression("y", ("x", "y"))
+    for n in (100, 1000):
+        top = create_app(dxdt="y", dydt="-x", tmax=100., dt=0.01, numerical_method="RK4")
+        add_flows(top, seeds_in_view(top, n, np.random.default_rng(0)))
+        yield result("events.find_crossings", {"flows": n, "steps": 10000},
+                     measure(lambda _: find_crossings(event, top.flows), 3 if quick else 10))
+
+
+def bench_limit_cycles(quick):
+    # The Van der Pol oscillator, whose limit cycle attracts every seed but the equilibrium.
+    dxdt, dydt = prepare_equations(Expression("y", ("t", "x", "y")), Expression("(1 - x**2)*y - x", ("t", "x", "y")))
+    for n in (5, 10):
+        x0, y0 = np.meshgrid(np.linspace(-3, 3, n), np.linspace(-3, 3, n))
+        yield result("limit_cycles", {"seeds": n * n},
+                     measure(lambda _: find_limit_cycles(lib.numerical_methods.RK4, dxdt, dydt, x0.ravel(), y0.ravel(),
+                                                         0.01, 30., 30., 6.), 1 if quick else 3))
+
+
+def bench_basins(quick):
+    # The damped Duffing oscillator, whose two basins spiral into each other. The process pool is started beforehand.
+    get_pool().submit(int).result()
+    dxdt, dydt = Expression("y", ("t", "x", "y")), Expression("x - x**3 - 0.25*y", ("t", "x", "y"))
+
+    def basins(_):
+        basin_map = BasinMap(-2., 2., -2., 2., n, n)
+        basin_map.submit(lib.numerical_methods.RK4, dxdt, dydt, 20., 0.02)
+        while not basin_map.is_complete():
+            basin_map.futures[0][1].result()
+            basin_map.collect()
+            basin_map.classify()
+
+    for n in (100, 300) if quick else (100, 300, 1000):
+        times = measure(basins, 1 if quick or n >= 1000 else 3)
+        yield result("basins", {"pixels": n * n, "steps": 1000}, times)
+        yield result("basins.per_pixel", {"pixels": n * n, "steps": 1000}, times, per=n * n)
+
+
+def bench_ftle(quick):
+    # The undamped Duffing oscillator, whose separatrix shows as a ridge of the field.
+    get_pool().submit(int).result()
+    dxdt, dydt = Expression("y", ("t", "x", "y")), Expression("x - x**3", ("t", "x", "y"))
+
+    def ftle(_):
+        ftle_field = FTLEField(-2., 2., -2., 2., n, n, 5.)
+        ftle_field.submit(lib.numerical_methods.RK4, dxdt, dydt, 5., 0.01)
+        while not ftle_field.is_complete():
+            ftle_field.futures[0][1].result()
+            ftle_field.collect()
+            ftle_field.field()
+
+    for n in (100, 300) if quick else (100, 300, 1000):
+        times = measure(ftle, 1 if quick or n >= 1000 else 3)
+        yield result("ftle", {"pixels": n * n, "steps": 500}, times)
+        yield result("ftle.per_pixel", {"pixels": n * n, "steps": 500}, times, per=n * n)
+
+
+def bench_density(quick):
+    # Binning the trajectories grows with their number, while drawing the density image takes the same time however
+    # many there are. The trajectories are integrated once, outside the timed calls.
+    top = create_app(tmax=1.)
+    rng = np.random.default_rng(0)
+    flows = []
+
+    for n in (1000, 10000) if quick else (1000, 10000, 100000):
+        flows += [Flow(x, y, top.differential_equations.dxdt, top.differential_equations.dydt,
+                       top.differential_equations.tmax, top.differential_equations.dt)
+                  for x, y in seeds_in_view(top, n - len(flows), rng)]
+        integrate_flows(flows, "RK4", top.numerical_method_dict)
+        trajectories = [flow.trajectory for flow in flows]
+
+        def bin_trajectories(_):
+            density = TrajectoryDensity(top.figure_settings.xmin, top.figure_settings.xmax, top.figure_settings.ymin,
+                                        top.figure_settings.ymax, top.figure_width, top.figure_height)
+            density.add(trajectories)
+
+        yield result("density.add", {"trajectories": n, "steps": 100}, measure(bin_trajectories, 3))
+
+        top.flows = flows
+        top.trajectory_density = None
+        set_trajectory_rendering(top, "density")
+        yield result("density.draw", {"trajectories": n}, measure(lambda _: top.fig.canvas.draw(), 3))
+
+
+def bench_time_series(quick):
+    # Showing a long series in a new figure, as each click on an initial point used to, against swapping it into the
+    # pooled time-series window, where it is decimated to the width of the axes.
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    for steps in (100000, 1000000) if quick else (100000, 1000000, 10000000):
+        top = create_app(dxdt="y", dydt="-x", tmax=steps * 0.001, dt=0.001, numerical_method="RK4")
+        add_flows(top, [(0.5, 0.), (0.25, 0.)])
+        flows = top.flows
+
+        def new_figure(_):
+            fig = Figure(figsize=(8, 5))
+            FigureCanvasAgg(fig)
+            x_plot, y_plot = fig.add_subplot(211), fig.add_subplot(212)
+            x_plot.plot(flows[0].t_values, flows[0].x_values, color=top.flow_color, linewidth=top.flow_linewidth)
+            y_plot.plot(flows[0].t_values, flows[0].y_values, color=top.flow_color, linewidth=top.flow_linewidth)
+            set_plot_window_style(fig, (x_plot, y_plot), top.figure_background_color, top.figure_axes_color,
+                                  top.time_series_fontsize, 1, top.figure_grid_style, top.figure_grid_alpha)
+            fig.canvas.draw()
+
+        fig = Figure(figsize=(8, 5))
+        FigureCanvasAgg(fig)
+        time_series = TimeSeriesPlot(fig, top)
+        clicks = iter(range(1000))
+
+        def swap(_):
+            time_series.show_flow(flows[next(clicks) % 2])  # draw_idle draws right away on Agg.
+
+        yield result("time_series.new_figure", {"steps": steps}, measure(new_figure, 1 if quick else 3))
+        yield result("time_series.show_flow", {"steps": steps}, measure(swap, 3 if quick else 10))
+
+
+def bench_parameters(quick):
+    # Moving the slider of the Van der Pol oscillator's parameter, which re-integrates every flow and redraws. Every
+    # value is new in the first benchmark, while the second goes back and forth between two cached values.
+    for n in (100, 1000) if quick else (100, 1000, 10000):
+        top = create_app(dxdt="y", dydt="mu*(1 - x**2)*y - x", tmax=10., dt=0.01, numerical_method="RK4",
+                         parameters={"mu": 1.})
+        add_flows(top, seeds_in_view(top, n, np.random.default_rng(0)))
+        values = iter(np.linspace(0., 2., 1000))
+
+        def slide(_):
+            set_parameter_values(top, {"mu": next(values)})
+            top.fig.canvas.draw()
+
+        yield result("parameters.set", {"flows": n, "steps": 1000}, measure(slide, 3 if quick else 10))
+
+        clicks = iter(range(1000))
+
+        def scrub(_):
+            set_parameter_values(top, {"mu": 0.5 if next(clicks) % 2 else 1.5})
+            top.fig.canvas.draw()
+
+        scrub(None)
+        scrub(None)
+        yield result("parameters.cached", {"flows": n, "steps": 1000}, measure(scrub, 5 if quick else 10))
+
+
+def bench_bifurcation(quick):
+    # The Hopf normal form, whose stable equilibrium becomes a stable limit cycle at mu = 0, swept from 8 by 8 seeds.
+    # The process pool is started beforehand.
+    get_pool().submit(int).result()
+    dxdt = Expression("mu*x - y - x*(x**2 + y**2)", ("t", "x", "y"), {"mu": 0.})
+    dydt = Expression("x + mu*y - y*(x**2 + y**2)", ("t", "x", "y"), {"mu": 0.})
+    grid = -2. + (np.arange(8) + 0.5) * 0.5
+    x0, y0 = (values.ravel() for values in np.meshgrid(grid, grid))
+
+    def sweep(_):
+        bifurcation_sweep = BifurcationSweep(("mu", ), [np.linspace(-1., 1., n)])
+        bifurcation_sweep.submit(lib.numerical_methods.RK4, dxdt, dydt, x0, y0, 50., 20., 0.01, (-2., 2., -2., 2.))
+        while not bifurcation_sweep.is_complete():
+            bifurcation_sweep.collect(wait=True)
+        bifurcation_sweep.diagram(0)
+
+    for n in (20, 50) if quick else (20, 50, 200):
+        times = measure(sweep, 1 if quick else 3)
+        yield result("bifurcation", {"values": n, "seeds": 64, "steps": 7000}, times)
+        yield result("bifurcation.per_value", {"values": n, "seeds": 64, "steps": 7000}, times, per=n)
+
+
+def bench_navigation(quick):
+    # A frame of a zoom gesture, which only moves the axis limits, against configuring the plot for the same view,
+    # which also resizes every circle and arrowhead. The trajectories are drawn as a density in the second pair.
+    for rendering in ("lines", "density"):
+        for n in (100, 1000):
+            top = populated_app(n)
+            if rendering == "density":
+                set_trajectory_rendering(top, "density")
+            zooms = iter(range(1000))
+
+            # The Agg canvas draws on every draw_idle, while the Tk canvas draws once for all of them. Marking the
+            # canvas as drawing makes the requests no-ops, so that each frame draws once as in the app.
+            def gesture(_):
+                scale = 1.02 ** (next(zooms) % 20)
+                with top.fig.canvas._idle_draw_cntx():
+                    set_view_limits(top, -scale, scale, -scale, scale)
+                top.fig.canvas.draw()
+
+            def configure(_):
+                scale = 1.02 ** (next(zooms) % 20)
+                with top.fig.canvas._idle_draw_cntx():
+                    set_view_limits(top, -scale, scale, -scale, scale)
+                    update_view(top)
+                top.fig.canvas.draw()
+
+            yield result("navigation.gesture_frame", {"flows": n, "rendering": rendering},
+                         measure(gesture, 5 if quick else 20))
+            yield result("navigation.configure_plot", {"flows": n, "rendering": rendering},
+                         measure(configure, 5 if quick else 20))
+
+
+def bench_field_frames(quick):
+    # The forced Duffing oscillator. Precomputing the direction field of every frame, then playing the frames back with
+    # blitting, against evaluating the field in every frame.
+    dxdt, dydt = Expression("y", ("t", "x", "y")), Expression("x - x**3 - 0.25*y + 0.3*cos(t)", ("t", "x", "y"))
+    t_values = np.arange(0., 10. + 0.01, 0.01)
+    frames = 50 if quick else 200
+
+    for arrows in (25, 50):
+        def precompute(_):
+            lib.fieldframes._cache.clear()
+            return FieldFrames(dxdt, dydt, t_values, (-2., 2., -2., 2.), arrows, arrows)
+
+        yield result("field_frames.precompute", {"frames": len(t_values), "arrows": arrows * arrows},
+                     measure(precompute, 3 if quick else 10))
+
+        top = populated_app(100)
+        field_frames = precompute(None)
+        quiver = top.ax.quiver(field_frames.X, field_frames.Y, *field_frames.frame(0), angles="xy", scale_units="xy",
+                               scale=1, animated=True)
+        canvas = top.fig.canvas
+        canvas.draw()
+        background = canvas.copy_from_bbox(top.ax.bbox)
+        X, Y = field_frames.X.ravel(), field_frames.Y.ravel()
+
+        def play(_):
+            for frame in range(frames):
+                quiver.set_UVC(*field_frames.frame(frame))
+                canvas.restore_region(background)
+                top.ax.draw_artist(quiver)
+                canvas.blit(top.ax.bbox)
+
+        def evaluate(_):
+            for frame in range(frames):
+                u, v = dxdt(t_values[frame], X, Y), dydt(t_values[frame], X, Y)
+                norm = np.hypot(u, v)
+                quiver.set_UVC(u / norm * 0.8 * 4. / arrows, v / norm * 0.8 * 4. / arrows)
+                canvas.restore_region(background)
+                top.ax.draw_artist(quiver)
+                canvas.blit(top.ax.bbox)
+
+        yield result("field_frames.playback_frame", {"arrows": arrows * arrows}, measure(play, 3), per=frames)
+        yield result("field_frames.evaluated_frame", {"arrows": arrows * arrows}, measure(evaluate, 3), per=frames)
+
+
+def bench_seed(quick):
+    # Adding one flow of 1000 RK4 steps by shift-clicking, which draws only the new flow, against adding it from the
+    # entries, which redraws every flow.
+    for n in (100, 1000) if quick else (100, 1000, 10000):
+        top = populated_app(n, tmax=10., dt=0.01, numerical_method="RK4")
+        seeds = iter(seeds_in_view(top, 1000, np.random.default_rng(1)))
+
+        yield result("seed.click", {"flows": n, "steps": 1000},
+                     measure(lambda _: seed_flow(top, *next(seeds)), 5 if quick else 20))
+        yield result("seed.add_flows", {"flows": n, "steps": 1000},
+                     measure(lambda _: add_flows(top, [next(seeds)]), 3 if quick else 10))
+
+
+def bench_seed_generators(quick):
+    # Generating initial points over the view, and adding 1000 Sobol points, which are integrated in one batch.
+    rng = np.random.default_rng(0)
+    for n in (1000, 10000) if quick else (1000, 10000, 100000):
+        for name, generator in REGION_GENERATORS.items():
+            yield result("seeds.{}".format(name.replace(" ", "_")), {"points": n},
+                         measure(lambda _: generator(n, (-1., 1., -1., 1.), rng), 5 if quick else 20))
+
+        curve = parse_curve("cos(2*pi*s), sin(6*pi*s)/2")
+        yield result("seeds.curve", {"points": n}, measure(lambda _: curve_seeds(n, *curve), 5 if quick else 20))
+
+    def add_sobol(_):
+        top = create_app(tmax=10., dt=0.01, numerical_method="RK4")
+        add_flows(top, list(zip(*REGION_GENERATORS["Sobol"](1000, (-1., 1., -1., 1.), rng))))
+
+    yield result("seeds.add_sobol", {"flows": 1000, "steps": 1000}, measure(add_sobol, 1 if quick else 3))
+
+
+def bench_pyramids(quick):
+    # Long runs of a damped oscillator seen zoomed out. Drawing the full trajectories against the levels of their
+    # pyramids that are accurate to a pixel, and picking the levels for a new view, which builds them the first time.
+    for n in (10, 100) if quick else (10, 100, 1000):
+        top = populated_app(n, tmax=100., dt=0.001, numerical_method="RK4")
+        set_view_limits(top, -10., 10., -7.5, 7.5)
+        full = [flow.trajectory for flow in top.flows]
+        levels = [drawn_trajectory(top, flow) for flow in top.flows]
+
+        def draw(lines):
+            top.flow_trajectory_collection.lines[:] = lines
+            top.fig.canvas.draw()
+
+        def build(_):
+            for flow in top.flows:
+                flow.pyramid = None
+            update_view(top)
+
+        parameters = {"flows": n, "steps": 100000}
+        yield result("pyramids.draw_full", parameters, measure(lambda _: draw(full), 1 if quick else 3))
+        yield result("pyramids.draw_levels", dict(parameters, points=sum(len(level) for level in levels)),
+                     measure(lambda _: draw(levels), 3 if quick else 10))
+        yield result("pyramids.build", parameters, measure(build, 3 if quick else 10))
+        yield result("pyramids.update_view", parameters, measure(lambda _: update_view(top), 3 if quick else 10))
+
+
+def bench_trails(quick):
+    # Animation frames with fading trails behind the circles. The ring buffer updates its segments in place, against
+    # setting the segments of a LineCollection, which creates a path for every segment, with the same alphas.
+    from matplotlib.collections import LineCollection
+    from matplotlib.colors import to_rgba
+
+    frames = 20 if quick else 100
+    for n in (1000, 3000):
+        top = populated_app(n, tmax=5.)
+        canvas = top.fig.canvas
+        background = canvas.copy_from_bbox(top.ax.bbox)
+
+        for length in (10, 30):
+            trails = TrailCollection([(flow.x0, flow.y0) for flow in top.flows], length, top.flow_color,
+                                     linewidths=top.flow_linewidth, zorder=-1.5)
+            top.ax.add_collection(trails, autolim=False)
+
+            def ring_buffer(_):
+                for frame in range(1, frames + 1):
+                    for flow in top.flows:
+                        flow.circle.center = (flow.x_values[frame], flow.y_values[frame])
+                    trails.push([flow.circle.center for flow in top.flows])
+                    canvas.restore_region(background)
+                    top.ax.draw_artist(trails)
+                    top.ax.draw_artist(top.flow_circle_collection)
+                    canvas.blit(top.ax.bbox)
+
+            segments = LineCollection([], linewidths=top.flow_linewidth, zorder=-1.5)
+            top.ax.add_collection(segments, autolim=False)
+            alphas = np.repeat(1 - np.arange(length - 1) / (length - 1), n)
+            segments.set_color([to_rgba(top.flow_color, alpha) for alpha in alphas])
+
+            def set_segments(_):
+                history = [np.array([(flow.x0, flow.y0) for flow in top.flows])] * length
+                for frame in range(1, frames + 1):
+                    for flow in top.flows:
+                        flow.circle.center = (flow.x_values[frame], flow.y_values[frame])
+                    history = [np.array([flow.circle.center for flow in top.flows])] + history[:-1]
+                    segments.set_segments(np.stack((np.concatenate(history[:-1]), np.concatenate(history[1:])),
+                                                   axis=1))
+                    canvas.restore_region(background)
+                    top.ax.draw_artist(segments)
+                    top.ax.draw_artist(top.flow_circle_collection)
+                    canvas.blit(top.ax.bbox)
+
+            parameters = {"flows": n, "trail": length}
+            yield result("trails.ring_buffer_frame", parameters, measure(ring_buffer, 1 if quick else 3), per=frames)
+            yield result("trails.set_segments_frame", parameters, measure(set_segments, 1 if quick else 3), per=frames)
+            trails.remove()
+            segments.remove()
+
+
+def bench_dense_output(quick):
+    # Animating the damped oscillator at 100 frames per unit of t. Integrating at the frame times' spacing and reading
+    # the steps, against integrating with 10 times larger steps and placing the circles by the dense output, whose
+    # error is reported on stderr. Then evaluating a single trajectory at many times, as the time series does.
+    frame_rate, tmax = 100, 10.
+    for n in (100, 1000) if quick else (100, 1000, 10000):
+        seeds = seeds_in_view(create_app(), n, np.random.default_rng(0))
+        fine = create_app(tmax=tmax, dt=1. / frame_rate, numerical_method="RK4")
+        coarse = create_app(tmax=tmax, dt=10. / frame_rate, numerical_method="RK4")
+        frames = frame_times(np.arange(0., tmax + 10. / frame_rate, 10. / frame_rate), frame_rate)
+
+        def steps(_):
+            add_flows(fine, seeds)
+            for frame in range(len(frames)):
+                for flow in fine.flows:
+                    flow.circle.center = (flow.x_values[frame], flow.y_values[frame])
+
+        def dense(_):
+            add_flows(coarse, seeds)
+            flow_stack = FlowStack(coarse.flows)
+            for time in frames:
+                for flow, x, y in zip(coarse.flows, *flow_stack.evaluate(time)):
+                    flow.circle.center = (x, y)
+
+        parameters = {"flows": n, "frames": len(frames)}
+        yield result("dense_output.animate_steps", dict(parameters, dt=1. / frame_rate), measure(steps, 1))
+        yield result("dense_output.animate_dense", dict(parameters, dt=10. / frame_rate), measure(dense, 1))
+
+        error = max(np.abs(np.column_stack(coarse.flows[idx].evaluate(frames)) - fine.flows[idx].trajectory).max()
+                    for idx in range(min(n, 100)))
+        print("dense output error at {} flows: {:.2e}".format(n, error), file=sys.stderr)
+
+    flow = coarse.flows[0]
+    for times in (10000, 100000) if quick else (10000, 100000, 1000000):
+        yield result("dense_output.evaluate", {"times": times},
+                     measure(lambda _: flow.evaluate(np.linspace(0., tmax, times)), 5 if quick else 20))
+
+
+BENCHMARKS = (bench_numerical_methods, bench_add_trajectories, bench_graph_contours, bench_hover, bench_animation,
+              bench_pdf_export, bench_events, bench_limit_cycles, bench_basins, bench_ftle,
+              bench_density, bench_export, bench_time_series, bench_parameters,
+              bench_bifurcation, bench_navigation, bench_field_frames,
+              bench_seed, bench_seed_generators, bench_pyramids, bench_trails, bench_dense_output)
+
+
+def git_revision():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+    return revision + ("-dirty" if dirty else "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the planarFlow benchmark suite.")
+    parser.add_argument("--quick", action="store_true", help="fewer repeats and no 10k-seed run")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose function name contains this")
+    parser.add_argument("--output", help="JSON file to write (default: benchmarks/results/<revision>.json)")
+    args = parser.parse_args()
+
+    revision = git_revision()
+    metadata = {"revision": revision, "date": time.strftime("%Y-%m-%dT%H:%M:%S"), "quick": args.quick,
+                "python": platform.python_version(), "numpy": np.__version__, "matplotlib": matplotlib.__version__,
+                "platform": platform.platform(), "processor": platform.processor()}
+
+    results = []
+    for benchmark in BENCHMARKS:
+        if args.filter in benchmark.__name__:
+            for entry in benchmark(args.quick):
+                print("{:<40} {:<45} {:>12.3e} s".format(entry["name"], json.dumps(entry["parameters"]),
+                                                         entry["median"]), file=sys.stderr)
+                results.append(entry)
+
+    output = args.output or os.path.join(RESULTS_DIR, revision + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump({"metadata": metadata, "results": results}, file, indent=1)
+
+    print("Results written to " + output, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
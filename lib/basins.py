@@ -0,0 +1,100 @@
+"""
+BasinMap class file. A basin map colors every pixel of a raster over the view by the attractor that the trajectory
+starting there converges to. The raster's initial points are integrated in tiles of rows, in worker processes, and
+only their end points are kept. The end points are binned into a coarse grid of cells covering three times the view,
+and each connected group of densely populated cells is an attractor: a single group of cells for an equilibrium, or a
+loop of cells for a limit cycle. Trajectories that end in sparsely populated cells (still on their way, e.g. close to
+a separatrix), outside the grid, or that blow up are left unclassified.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+
+from .flowmap import TiledMap
+
+# Cells per axis of the grid the end points are binned into, and the fraction of the end points a cell must hold to be
+# part of an attractor.
+ATTRACTOR_CELLS = 128
+ATTRACTOR_DENSITY = 1E-5
+
+# Colors of the basins, in the order the attractors are found.
+BASIN_COLORS = ("#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b", "#e377c2", "#bcbd22", "#17becf",
+                "#7f7f7f")
+
+
+class BasinMap(TiledMap):
+    def __init__(self, xmin, xmax, ymin, ymax, columns, rows):
+        super().__init__(xmin, xmax, ymin, ymax, columns, rows)
+
+        # Cell of each pixel's end point, -1 until the pixel's tile is done and -2 if it left the grid of cells.
+        self.end_cells = np.full((rows, columns), -1, dtype=np.int64)
+        self.counts = np.zeros(ATTRACTOR_CELLS * ATTRACTOR_CELLS, dtype=np.int64)
+
+        self.labels = np.full((rows, columns), -1, dtype=np.int64)  # Attractor of each pixel, -1 if unclassified.
+        self.attractor_count = 0
+        self.color_indices = {}  # Component id -> index of its color, so basins keep their colors as tiles arrive.
+
+    def add_tile(self, tile, result):
+        x_end, y_end = result
+        xmin, xmax, ymin, ymax = self.extent
+        width, height = xmax - xmin, ymax - ymin
+
+        with np.errstate(invalid="ignore"):
+            i = np.floor((x_end - (xmin - width)) / (3 * width) * ATTRACTOR_CELLS)
+            j = np.floor((y_end - (ymin - height)) / (3 * height) * ATTRACTOR_CELLS)
+            inside = (i >= 0) & (i < ATTRACTOR_CELLS) & (j >= 0) & (j < ATTRACTOR_CELLS)
+
+        cells = np.where(inside, j * ATTRACTOR_CELLS + i, -2).astype(np.int64)
+        self.end_cells[tile] = cells
+        self.counts += np.bincount(cells[inside], minlength=len(self.counts))
+
+    def classify(self):
+        # Labels the connected groups of dense cells (8-neighbourhood) with the smallest index of their cells, by
+        # propagating the minimum of the neighbouring labels until nothing changes.
+        settled = np.count_nonzero(self.end_cells != -1)
+        dense = (self.counts >= max(2, ATTRACTOR_DENSITY * settled)).reshape(ATTRACTOR_CELLS, ATTRACTOR_CELLS)
+        sentinel = ATTRACTOR_CELLS * ATTRACTOR_CELLS
+        components = np.where(dense, np.arange(sentinel).reshape(dense.shape), sentinel)
+
+        while True:
+            padded = np.pad(components, 1, constant_values=sentinel)
+            neighbours = np.min([padded[1 + di:1 + di + ATTRACTOR_CELLS, 1 + dj:1 + dj + ATTRACTOR_CELLS]
+                                 for di in (-1, 0, 1) for dj in (-1, 0, 1)], axis=0)
+            updated = np.where(dense, neighbours, sentinel)
+            if np.array_equal(updated, components):
+                break
+            components = updated
+
+        components = np.append(components.ravel(), sentinel)  # Pixels of pending tiles or outside the grid map here.
+        for component in np.unique(components[components < sentinel]):
+            self.color_indices.setdefault(component, len(self.color_indices))
+
+        pixel_components = components[np.where(self.end_cells >= 0, self.end_cells, sentinel)]
+        lookup = np.full(sentinel + 1, -1, dtype=np.int64)
+        for component, index in self.color_indices.items():
+            if component < sentinel and components[component] == component:
+                lookup[component] = index
+
+        self.labels = lookup[pixel_components]
+        self.attractor_count = len(np.unique(self.labels[self.labels >= 0]))
+
+    def rgba(self, alpha=0.75):
+        # Image of the basins, transparent where the pixels are unclassified.
+        from matplotlib.colors import to_rgba_array
+
+        colors = to_rgba_array(BASIN_COLORS)
+        colors[:, 3] = alpha
+        image = colors[self.labels % len(BASIN_COLORS)]
+        image[self.labels < 0] = 0
+        return image
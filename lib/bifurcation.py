@@ -0,0 +1,262 @@
+"""
+BifurcationSweep class file, and the functions that find the equilibria and attractors of the system at each value of
+one or two swept parameters. At each value:
+    - equilibria are found with Newton's method, for all starting points at once, and classified as stable, saddles or
+      unstable (which includes centers) from the trace and determinant of their Jacobian;
+    - seeds spread over the view are integrated for a transient time and then sampled over two further halves of a
+      sample time. Seeds whose samples span the same extent in both halves are on an attracting limit cycle, and are
+      clustered by that extent. The other seeds are still converging, and their end points are used as extra starting
+      points for Newton's method, so that the stable equilibria they approach are always found.
+
+The swept parameters are compiled as variables of the equations, so that the seeds of many parameter values are
+integrated together in one batch. The parameter values are split into tiles that are computed in the process pool, and
+the results of each tile are added to the diagram as it is collected.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+
+from .expressions import Expression
+from .flow import BATCH_VALUES, prepare_equations
+from .flowmap import flow_map, segments, SEGMENT_STEPS
+from .parallel import TiledComputation, row_tiles
+from .profiler import profiler
+
+NEWTON_ITERATIONS = 30
+
+# Equilibria are accepted once their residual is below NEWTON_TOLERANCE, and those closer than MERGE_TOLERANCE are
+# merged, both relative to the size of the view. Newton's method converges slowly to degenerate equilibria, e.g. at a
+# pitchfork bifurcation, where points with such residuals are still up to its cube root (about a pixel) away from it.
+NEWTON_TOLERANCE = 1E-9
+MERGE_TOLERANCE = 1E-3
+
+# Kinds of equilibria.
+STABLE, SADDLE, UNSTABLE = 0, 1, 2
+
+
+def sweep_equations(dxdt, dydt, names, points):
+    """
+    Compiles the equations with the swept parameters as extra variables. Returns a function that takes the index of the
+    parameter values of each point to be integrated, and returns the equations for those points, which take the
+    values of the swept parameters as arrays. This way the points of many parameter values are integrated together.
+    """
+    fixed = {name: value for name, value in dxdt.parameters.items() if name not in names}
+    f = Expression(dxdt.text, dxdt.variables + tuple(names), fixed)
+    g = Expression(dydt.text, dydt.variables + tuple(names), fixed)
+    f_kernel, g_kernel = prepare_equations(f, g)
+
+    def equations(groups):
+        columns = [points[groups, i] for i in range(len(names))]
+
+        def bound_dxdt(t, x, y):
+            return f_kernel(t, x, y, *columns)
+
+        def bound_dydt(t, x, y):
+            return g_kernel(t, x, y, *columns)
+
+        # Kept so that autonomous equations are not shifted in time between segments.
+        bound_dxdt.free_variables, bound_dydt.free_variables = f.free_variables, g.free_variables
+        return bound_dxdt, bound_dydt
+
+    return equations
+
+
+def find_equilibria(equations, x0, y0, groups, group_count, extent):
+    """
+    Applies Newton's method from the starting points x0, y0 (1D arrays), where groups is the index of the parameter
+    values of each starting point, with the Jacobian approximated by central differences. Returns, for each of the
+    group_count parameter values, the distinct equilibria found within the extent (xmin, xmax, ymin, ymax) as an (n, 2)
+    array, and the kind of each one.
+    """
+    xmin, xmax, ymin, ymax = extent
+    scale = max(xmax - xmin, ymax - ymin)
+    h = 1E-6 * scale
+    x, y = np.array(x0, dtype=np.float64), np.array(y0, dtype=np.float64)
+    dxdt, dydt = equations(groups)
+
+    with np.errstate(all="ignore"):
+        for _ in range(NEWTON_ITERATIONS):
+            f, g = dxdt(0., x, y), dydt(0., x, y)
+            a, b, c, d = jacobian(dxdt, dydt, x, y, h)
+            det = a * d - b * c
+            x, y = x - (d * f - b * g) / det, y - (a * g - c * f) / det
+
+        residual = np.hypot(dxdt(0., x, y), dydt(0., x, y))
+        converged = (np.isfinite(x) & np.isfinite(y) & (residual < NEWTON_TOLERANCE * scale) & (x >= xmin) &
+                     (x <= xmax) & (y >= ymin) & (y <= ymax))
+
+    # Points that converged to the same equilibrium are merged.
+    x, y, groups = x[converged], y[converged], groups[converged]
+    points = [merge(np.column_stack((x[groups == group], y[groups == group])), MERGE_TOLERANCE * scale)
+              for group in range(group_count)]
+
+    # The equilibria of every parameter value are classified together.
+    groups = np.repeat(np.arange(group_count), [len(group_points) for group_points in points])
+    x, y = np.concatenate([group_points[:, 0] for group_points in points]), \
+        np.concatenate([group_points[:, 1] for group_points in points])
+    dxdt, dydt = equations(groups)
+    with np.errstate(all="ignore"):
+        a, b, c, d = jacobian(dxdt, dydt, x, y, h)
+
+    trace, det = a + d, a * d - b * c
+    kinds = np.where(det < 0, SADDLE, np.where((trace < 0) & (det > 0), STABLE, UNSTABLE))
+    return [(group_points, kinds[groups == group]) for group, group_points in enumerate(points)]
+
+
+def jacobian(dxdt, dydt, x, y, h):
+    return ((dxdt(0., x + h, y) - dxdt(0., x - h, y)) / (2 * h), (dxdt(0., x, y + h) - dxdt(0., x, y - h)) / (2 * h),
+            (dydt(0., x + h, y) - dydt(0., x - h, y)) / (2 * h), (dydt(0., x, y + h) - dydt(0., x, y - h)) / (2 * h))
+
+
+def find_attractors(integrator, equations, x0, y0, group_count, transient, sample_time, dt, extent):
+    """
+    Integrates the seeds x0, y0 (1D arrays) for each of the group_count parameter values, all in one batch. Returns,
+    for each parameter value, its equilibria and their kinds, as find_equilibria, and its attracting limit cycles as an
+    (m, 4) array of the (xmin, xmax, ymin, ymax) extent of each cycle.
+    """
+    xmin, xmax, ymin, ymax = extent
+    scale = max(xmax - xmin, ymax - ymin)
+    steps = max(1, int(np.ceil(sample_time / (2 * dt))))
+    groups = np.repeat(np.arange(group_count), len(x0))
+    dxdt, dydt = equations(groups)
+
+    with np.errstate(all="ignore"):
+        px, py = flow_map(integrator, dxdt, dydt, np.tile(x0, group_count), np.tile(y0, group_count), transient, dt)
+        first, px, py = sample_bounds(integrator, dxdt, dydt, px, py, steps, dt)
+        second, px, py = sample_bounds(integrator, dxdt, dydt, px, py, steps, dt)
+
+        # Seeds that left a region three times the size of the view are taken to blow up.
+        bounded = (np.isfinite(second).all(axis=1) & (second[:, 0] > xmin - (xmax - xmin)) &
+                   (second[:, 1] < xmax + (xmax - xmin)) & (second[:, 2] > ymin - (ymax - ymin)) &
+                   (second[:, 3] < ymax + (ymax - ymin)))
+        size = np.maximum(second[:, 1] - second[:, 0], second[:, 3] - second[:, 2])
+        periodic = bounded & (size > 1E-3 * scale) & (np.abs(second - first).max(axis=1) < 1E-2 * size)
+
+    converging = bounded & ~periodic
+    equilibria = find_equilibria(equations, np.concatenate((np.tile(x0, group_count), px[converging])),
+                                 np.concatenate((np.tile(y0, group_count), py[converging])),
+                                 np.concatenate((groups, groups[converging])), group_count, extent)
+
+    # Cycles reached from different seeds have the same extent up to the time-step, which sets the tolerance.
+    return [(points, kinds, merge(second[periodic & (groups == group)], 1E-2 * scale))
+            for group, (points, kinds) in enumerate(equilibria)]
+
+
+def sample_bounds(integrator, dxdt, dydt, x0, y0, steps, dt):
+    # Returns the (xmin, xmax, ymin, ymax) extent of each seed's trajectory over the given number of steps, and the
+    # points the seeds end at.
+    bounds = np.column_stack((x0, x0, y0, y0))
+    for _, x, y in segments(integrator, dxdt, dydt, x0, y0, steps, dt):
+        bounds[:, 0] = np.fmin(bounds[:, 0], x.min(axis=0))
+        bounds[:, 1] = np.fmax(bounds[:, 1], x.max(axis=0))
+        bounds[:, 2] = np.fmin(bounds[:, 2], y.min(axis=0))
+        bounds[:, 3] = np.fmax(bounds[:, 3], y.max(axis=0))
+
+    return bounds, x[-1], y[-1]
+
+
+def merge(rows, tolerance):
+    # Keeps the rows that differ from every row kept before them by more than the tolerance in some column.
+    kept = rows[:0]
+    for row in rows:
+        if not (np.abs(kept - row) <= tolerance).all(axis=1).any():
+            kept = np.vstack((kept, row))
+
+    return kept
+
+
+def sweep_tile(integrator, dxdt, dydt, names, points, x0, y0, transient, sample_time, dt, extent):
+    # Runs in a worker process. The seeds of as many parameter values as fit in a batch are integrated together, which
+    # flow_map would otherwise split into chunks.
+    per_batch = max(1, BATCH_VALUES // (SEGMENT_STEPS + 2) // len(x0))
+    results = []
+    for start in range(0, len(points), per_batch):
+        equations = sweep_equations(dxdt, dydt, names, points[start:start + per_batch])
+        results += find_attractors(integrator, equations, x0, y0, len(points[start:start + per_batch]), transient,
+                                   sample_time, dt, extent)
+
+    return results
+
+
+def regime(kinds, cycles):
+    # Describes the attractors found at a parameter value, e.g. "2 stable equilibria, 1 limit cycle".
+    parts = []
+    stable = int(np.count_nonzero(kinds == STABLE))
+    if stable:
+        parts.append("{} stable equilibri{}".format(stable, "um" if stable == 1 else "a"))
+    if len(cycles):
+        parts.append("{} limit cycle{}".format(len(cycles), "" if len(cycles) == 1 else "s"))
+
+    return ", ".join(parts) or "no attractor"
+
+
+class BifurcationSweep(TiledComputation):
+    """
+    Sweep of one or two parameters over the given 1D arrays of values. With two parameters, the values form a grid
+    whose first axis is the first parameter. The results of the values are computed in tiles in the process pool.
+    """
+    def __init__(self, names, values):
+        self.names = tuple(names)
+        self.values = [np.asarray(axis_values, dtype=np.float64) for axis_values in values]
+        self.shape = tuple(len(axis_values) for axis_values in self.values)
+        grids = np.meshgrid(*self.values, indexing="ij")
+        self.points = np.column_stack([grid.ravel() for grid in grids])
+        super().__init__(len(self.points))
+
+        self.results = [None] * len(self.points)  # (equilibria, kinds, cycles) of each point, once computed.
+        self.regimes = []  # Regimes in the order they were found, which sets their colors.
+
+    @profiler.profiled("BifurcationSweep.submit")
+    def submit(self, integrator, dxdt, dydt, x0, y0, transient, sample_time, dt, extent):
+        self.submit_tiles(sweep_tile, row_tiles(len(self.points), 1, min_points=4),
+                          lambda tile: (integrator, dxdt, dydt, self.names, self.points[tile], x0, y0, transient,
+                                        sample_time, dt, extent))
+
+    def add_tile(self, tile, result):
+        self.results[tile] = result
+
+    def diagram(self, coordinate):
+        """
+        Returns the points of the one-parameter bifurcation diagram of the computed values, in the given coordinate (0
+        for x, 1 for y), as a dictionary of (parameter values, coordinate values) arrays. The keys are the kinds of
+        equilibria, and "cycles" for the minimum and maximum of the coordinate over each limit cycle.
+        """
+        values = {kind: ([], []) for kind in (STABLE, SADDLE, UNSTABLE, "cycles")}
+        for point, result in zip(self.points[:, 0], self.results):
+            if result is None:
+                continue
+
+            equilibria, kinds, cycles = result
+            for kind in (STABLE, SADDLE, UNSTABLE):
+                values[kind][0].append(np.full(np.count_nonzero(kinds == kind), point))
+                values[kind][1].append(equilibria[kinds == kind, coordinate])
+
+            values["cycles"][0].append(np.full(2 * len(cycles), point))
+            values["cycles"][1].append(cycles[:, 2 * coordinate:2 * coordinate + 2].ravel())
+
+        return {kind: (np.concatenate(p or [np.zeros(0)]), np.concatenate(v or [np.zeros(0)]))
+                for kind, (p, v) in values.items()}
+
+    def regime_map(self):
+        # Returns the index of the regime of every computed value of a two-parameter sweep, with the first parameter
+        # along the columns, and nan where the value is not computed yet.
+        indices = np.full(len(self.points), np.nan)
+        for idx, result in enumerate(self.results):
+            if result is not None:
+                label = regime(result[1], result[2])
+                if label not in self.regimes:
+                    self.regimes.append(label)
+                indices[idx] = self.regimes.index(label)
+
+        return indices.reshape(self.shape).T
@@ -1,7 +1,8 @@
 """
 Collection of functions that updates the top window's figure axes, ticks, ticklabels, and grid based on user input
 values entered and validated in the FigureSettingsFrame. Methods to set the figure style and colors/theme are also
-included.
+included. Each function only requests a redraw of the canvas, so that several of them called in a row, e.g. when
+starting the app or configuring the plot, result in a single draw.
 
 Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
 
@@ -18,7 +19,10 @@ You should have received a copy of the GNU General Public License along with pla
 """
 import numpy as np
 
+from .profiler import profiler
 
+
+@profiler.profiled("configureplot.set_figure_properties")
 def set_figure_properties(fig, ax, tick_length, tick_fontsize, axes_linewidth, grid_style, grid_linewidth, grid_alpha):
     # Setting margin widths.
     fig.subplots_adjust(left=0, right=1, bottom=0, top=1)
@@ -35,9 +39,10 @@ def set_figure_properties(fig, ax, tick_length, tick_fontsize, axes_linewidth, g
     # Setting gridline style parameters.
     ax.grid(linestyle=grid_style, linewidth=grid_linewidth, alpha=grid_alpha)
 
-    fig.canvas.draw()
+    fig.canvas.draw_idle()
 
 
+@profiler.profiled("configureplot.set_figure_colors")
 def set_figure_colors(fig, ax, background_color, axes_color):
     # Setting background color.
     fig.patch.set_facecolor(background_color)
@@ -53,9 +58,10 @@ def set_figure_colors(fig, ax, background_color, axes_color):
     # Setting grid color.
     ax.grid(color=axes_color)
 
-    fig.canvas.draw()
+    fig.canvas.draw_idle()
 
 
+@profiler.profiled("configureplot.set_figure_axes")
 def set_figure_axes(fig, ax, xmin, xmax, ymin, ymax, figure_axes_color):
     ax.set_xlim(xmin, xmax)
     ax.set_ylim(ymin, ymax)
@@ -97,9 +103,10 @@ def set_figure_axes(fig, ax, xmin, xmax, ymin, ymax, figure_axes_color):
         ax.spines["bottom"].set_color("none")
         ax.spines["top"].set_color("none")
 
-    fig.canvas.draw()
+    fig.canvas.draw_idle()
 
 
+@profiler.profiled("configureplot.set_figure_ticks")
 def set_figure_ticks(fig, ax, xtick_spacing, xmin, xmax, ytick_spacing, ymin, ymax):
     if xtick_spacing:  # Configuring xticks
         if xmin < 0 < xmax:
@@ -135,9 +142,10 @@ def set_figure_ticks(fig, ax, xtick_spacing, xmin, xmax, ytick_spacing, ymin, ym
     else:
         ax.set_yticks([])
 
-    fig.canvas.draw()
+    fig.canvas.draw_idle()
 
 
+@profiler.profiled("configureplot.set_figure_ticklabels")
 def set_figure_ticklabels(fig, ax, show_x_ticklabels, xmin, xmax, show_y_ticklabels, ymin, ymax):
     if show_x_ticklabels:
         if ymin >= 0:  # If the ticks are on the very bottom...
@@ -163,9 +171,10 @@ def set_figure_ticklabels(fig, ax, show_x_ticklabels, xmin, xmax, show_y_ticklab
     else:
         ax.tick_params(axis="y", labelleft=False, labelright=False)
 
-    fig.canvas.draw()
+    fig.canvas.draw_idle()
 
 
+@profiler.profiled("configureplot.set_figure_grid")
 def set_figure_grid(fig, ax, show_grid, xtick_spacing, ytick_spacing):
     if show_grid:
         if xtick_spacing:
@@ -176,4 +185,27 @@ def set_figure_grid(fig, ax, show_grid, xtick_spacing, ytick_spacing):
     else:
         ax.grid(visible=False, axis="both")
 
-    fig.canvas.draw()
+    fig.canvas.draw_idle()
+
+
+def set_plot_window_style(fig, axes, background_color, axes_color, fontsize, show_grid, grid_style, grid_alpha):
+    # Matches the style and colors of the plots shown in separate windows, such as time series and Poincaré sections,
+    # to the top window's figure.
+    fig.set_facecolor(background_color)
+
+    for ax in axes:
+        ax.set_facecolor(background_color)
+        ax.tick_params(axis="both", which="both", color=axes_color, direction="in", labelcolor=axes_color,
+                       labelsize=fontsize)
+        ax.xaxis.label.set_color(axes_color)
+        ax.yaxis.label.set_color(axes_color)
+        ax.title.set_color(axes_color)
+
+        for spine in ax.spines.values():
+            spine.set_edgecolor(axes_color)
+            spine.set_linewidth(1)
+
+        if show_grid:
+            ax.grid(linestyle=grid_style, color=axes_color, alpha=grid_alpha)
+
+    fig.canvas.draw_idle()
@@ -0,0 +1,59 @@
+"""
+Dense output of the numerical methods. The methods give a trajectory at the steps of their integration only, and
+between two steps it is evaluated with the cubic Hermite interpolant that matches the trajectory's values and
+derivatives, i.e. the values of the differential equations, at both steps. Its error is of order dt^4, no larger than
+that of the 4th-order methods' steps, so trajectories can be integrated with large steps and still be sampled at any
+times, e.g. at the frame rate of an animation.
+
+The derivatives are evaluated from the equations at the steps that are needed, rather than kept by the numerical methods
+for every step, which would double the memory of every trajectory and require user-defined methods to provide them.
+Everything is evaluated on arrays, for many times of a trajectory or many trajectories at a time.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+
+
+def locate(t_values, times):
+    # Index of the step that each time falls in, and the fraction of that step at which it lies. Times outside of the
+    # time values fall in the first or last step, at its start or end.
+    idx = np.clip(np.searchsorted(t_values, times, side="right") - 1, 0, len(t_values) - 2)
+    fraction = np.clip((times - t_values[idx]) / (t_values[idx + 1] - t_values[idx]), 0., 1.)
+    return idx, fraction
+
+
+def hermite(theta, h, p0, p1, v0, v1):
+    # Cubic Hermite interpolant of a step of length h with end values p0, p1 and derivatives v0, v1, at the fractions
+    # theta of the step. The arguments are arrays of the same shape, or scalars.
+    theta2 = theta * theta
+    theta3 = theta2 * theta
+    return ((2 * theta3 - 3 * theta2 + 1) * p0 + (theta3 - 2 * theta2 + theta) * h * v0 +
+            (3 * theta2 - 2 * theta3) * p1 + (theta3 - theta2) * h * v1)
+
+
+def dense_output(dxdt, dydt, t0, t1, fraction, x0, y0, x1, y1):
+    # Values at the given fraction of the step from (x0, y0) at t0 to (x1, y1) at t1, interpolated with the
+    # derivatives given by the equations at both ends.
+    with np.errstate(all="ignore"):
+        return (hermite(fraction, t1 - t0, x0, x1, dxdt(t0, x0, y0), dxdt(t1, x1, y1)),
+                hermite(fraction, t1 - t0, y0, y1, dydt(t0, x0, y0), dydt(t1, x1, y1)))
+
+
+def frame_times(t_values, frame_rate):
+    # Times of the frames of an animation showing frame_rate frames per unit of time over the time values, or the
+    # time values themselves if the frame rate is 0.
+    if not frame_rate:
+        return t_values
+
+    return np.linspace(t_values[0], t_values[-1], max(2, int(round((t_values[-1] - t_values[0]) * frame_rate)) + 1))
@@ -0,0 +1,141 @@
+"""
+TrajectoryDensity class file, and functions for drawing the trajectories of the top window as a density image. Past a
+few thousand trajectories the lines merge into a single blob and take long to draw, so the trajectories can instead be
+binned into a 2D histogram with one bin per pixel of the figure, which is shown as a log-scaled image. Adding
+trajectories only bins their segments, and drawing the image takes the same time however many trajectories there are.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+
+from .flow import BATCH_VALUES
+from .pyramid import drawn_trajectory
+from .profiler import profiler
+
+# Maximum number of samples taken along a single segment. Longer segments, e.g. of trajectories that blow up, are
+# sampled more sparsely.
+MAX_SEGMENT_SAMPLES = 4096
+
+
+class TrajectoryDensity:
+    def __init__(self, xmin, xmax, ymin, ymax, columns, rows):
+        self.extent = (xmin, xmax, ymin, ymax)
+        self.columns = columns
+        self.rows = rows
+        self.counts = np.zeros(rows * columns, dtype=np.int64)
+
+    @profiler.profiled("TrajectoryDensity.add")
+    def add(self, trajectories):
+        # Bins the (n, 2) trajectories, a group of them at a time so that the memory used stays bounded.
+        group = []
+        values = 0
+        for trajectory in trajectories:
+            group.append(trajectory)
+            values += len(trajectory)
+            if values >= BATCH_VALUES:
+                self.add_segments(group)
+                group = []
+                values = 0
+
+        if group:
+            self.add_segments(group)
+
+    def add_segments(self, trajectories):
+        # Every segment is sampled at steps of at most a pixel, so that a segment spanning several pixels adds to each
+        # of them. The samples are binned all at once.
+        xmin, xmax, ymin, ymax = self.extent
+        points = np.concatenate(trajectories).astype(np.float64)
+        px = (points[:, 0] - xmin) * (self.columns / (xmax - xmin))
+        py = (points[:, 1] - ymin) * (self.rows / (ymax - ymin))
+
+        # Segments join consecutive points of the same trajectory, and are skipped if they lie entirely on one side of
+        # the view or are not finite.
+        connected = np.ones(len(points) - 1, dtype=bool)
+        connected[np.cumsum([len(trajectory) for trajectory in trajectories])[:-1] - 1] = False
+        x0, x1, y0, y1 = px[:-1], px[1:], py[:-1], py[1:]
+        with np.errstate(invalid="ignore"):
+            connected &= ~(((x0 < 0) & (x1 < 0)) | ((x0 >= self.columns) & (x1 >= self.columns)) |
+                           ((y0 < 0) & (y1 < 0)) | ((y0 >= self.rows) & (y1 >= self.rows)))
+            connected &= np.isfinite(x0) & np.isfinite(x1) & np.isfinite(y0) & np.isfinite(y1)
+
+        x0, y0 = x0[connected], y0[connected]
+        dx, dy = x1[connected] - x0, y1[connected] - y0
+
+        # Segment s is sampled at x0 + k * dx / samples for k = 0, ..., samples - 1. Pixel coordinates are small enough
+        # for single precision.
+        samples = np.clip(np.ceil(np.maximum(np.abs(dx), np.abs(dy))), 1, MAX_SEGMENT_SAMPLES).astype(np.int64)
+        k = (np.arange(samples.sum(), dtype=np.int64) - np.repeat(np.cumsum(samples) - samples, samples)).astype(
+            np.float32)
+        x = np.repeat(x0.astype(np.float32), samples) + k * np.repeat((dx / samples).astype(np.float32), samples)
+        y = np.repeat(y0.astype(np.float32), samples) + k * np.repeat((dy / samples).astype(np.float32), samples)
+
+        inside = (x >= 0) & (x < self.columns) & (y >= 0) & (y < self.rows)
+        self.counts += np.bincount(y[inside].astype(np.int64) * self.columns + x[inside].astype(np.int64),
+                                   minlength=len(self.counts))
+
+    def rgba(self, color):
+        # Image of the density in the given color, whose opacity grows with the logarithm of the count of each pixel.
+        from matplotlib.colors import to_rgba
+
+        image = np.empty((self.rows, self.columns, 4), dtype=np.float32)
+        image[:, :, :3] = to_rgba(color)[:3]
+        image[:, :, 3] = (np.log1p(self.counts) / np.log1p(max(1, self.counts.max()))).reshape(self.rows,
+                                                                                                 self.columns)
+        return image
+
+
+def show_density(top):
+    image = top.trajectory_density.rgba(top.flow_color)
+    if top.trajectory_density_image is None:
+        top.trajectory_density_image = top.ax.imshow(image, extent=top.trajectory_density.extent, origin="lower",
+                                                     aspect="auto", interpolation="nearest", zorder=-3)
+    else:
+        top.trajectory_density_image.set_data(image)
+        top.trajectory_density_image.set_extent(top.trajectory_density.extent)
+
+
+def reset_density(top):
+    # Bins every flow again for the current view, if the trajectories are drawn as a density. Flows of a loaded session
+    # that are still held by the session file do not pass through the view.
+    if top.trajectory_rendering != "density":
+        return
+
+    top.trajectory_density = TrajectoryDensity(top.figure_settings.xmin, top.figure_settings.xmax,
+                                               top.figure_settings.ymin, top.figure_settings.ymax, top.figure_width,
+                                               top.figure_height)
+    top.trajectory_density.add([drawn_trajectory(top, flow) for flow in top.flows if flow.source is None])
+    show_density(top)
+
+
+def add_to_density(top, flows):
+    top.trajectory_density.add([drawn_trajectory(top, flow) for flow in flows])
+    show_density(top)
+
+
+def set_trajectory_rendering(top, rendering):
+    # Switches between drawing the trajectories as lines and as a density. The flows are kept in the collections either
+    # way, which are hidden while the density is shown.
+    top.trajectory_rendering = rendering
+    for collection in (top.flow_trajectory_collection, top.flow_circle_collection, top.flow_arrowhead_collection):
+        collection.set_visible(rendering != "density")
+
+    if rendering != "density":
+        if top.trajectory_density_image is not None:
+            top.trajectory_density_image.remove()
+        top.trajectory_density = None
+        top.trajectory_density_image = None
+    elif top.trajectory_density is None:
+        reset_density(top)
+    else:
+        show_density(top)  # The flow color may have changed.
@@ -0,0 +1,137 @@
+"""
+Collection of functions that detect where trajectories cross a curve g(x, y) = 0, which is used for Poincaré sections
+and return maps. Crossings are found for many flows at once: the event function is evaluated on blocks of trajectories
+stacked into 2D arrays, sign changes are located with array operations, and every crossing is then refined together
+on the cubic Hermite interpolant of its step, which is built from the trajectory's end points and the vector field
+there.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+
+from .flow import BATCH_VALUES
+from .denseoutput import hermite
+from .profiler import profiler
+
+# Number of regula falsi (Illinois) iterations used to refine each crossing on its step's interpolant.
+REFINEMENT_ITERATIONS = 8
+
+
+class Crossings:
+    # Crossings of every flow, ordered by flow and then by time. Direction is +1 where g goes from negative to positive
+    # and -1 otherwise.
+    def __init__(self, flow_indices, t, x, y, direction):
+        self.flow_indices = flow_indices
+        self.t = t
+        self.x = x
+        self.y = y
+        self.direction = direction
+
+    def __len__(self):
+        return len(self.t)
+
+    def return_map(self, coordinate="x"):
+        # Pairs (s_k, s_k+1) of consecutive crossings of the same flow, where s is the given coordinate.
+        s = self.x if coordinate == "x" else self.y
+        same_flow = self.flow_indices[1:] == self.flow_indices[:-1]
+        return s[:-1][same_flow], s[1:][same_flow]
+
+
+@profiler.profiled("find_crossings")
+def find_crossings(event, flows, direction=0):
+    """
+    Returns the Crossings of the curve event(x, y) = 0 by the given flows, which must be loaded. Only crossings in the
+    given direction are kept (+1: from g < 0 to g >= 0, -1: the opposite, 0: both). The flows are processed in blocks
+    of flows sharing the same time values, so that no Python code runs per time-step.
+    """
+    groups = {}
+    for idx, flow in enumerate(flows):
+        groups.setdefault(id(flow.t_values), []).append(idx)
+
+    results = []
+    for indices in groups.values():
+        t_values = flows[indices[0]].t_values
+        block_size = max(1, BATCH_VALUES // len(t_values))
+
+        for start in range(0, len(indices), block_size):
+            block = indices[start:start + block_size]
+            x = np.stack([flows[idx].x_values for idx in block], axis=1).astype(np.float64, copy=False)
+            y = np.stack([flows[idx].y_values for idx in block], axis=1).astype(np.float64, copy=False)
+            results.append(find_block_crossings(event, flows[block[0]].dxdt, flows[block[0]].dydt, t_values, x, y,
+                                                np.array(block), direction))
+
+    if not results:
+        empty = np.zeros(0)
+        return Crossings(np.zeros(0, dtype=int), empty, empty, empty, empty)
+
+    flow_indices, t, x, y, signs = (np.concatenate(arrays) for arrays in zip(*results))
+    order = np.lexsort((t, flow_indices))
+    return Crossings(flow_indices[order], t[order], x[order], y[order], signs[order])
+
+
+def find_block_crossings(event, dxdt, dydt, t_values, x, y, indices, direction):
+    # x and y are (steps, flows) arrays of a block of flows, whose indices in the flow list are given.
+    with np.errstate(all="ignore"):
+        g = event(x, y)
+    # Steps with g not finite at either end, e.g. where the trajectory has diverged, are not crossings.
+    finite = np.isfinite(g)
+    negative = g < 0
+    steps, columns = np.nonzero((negative[:-1] != negative[1:]) & finite[:-1] & finite[1:])
+
+    signs = np.where(negative[steps, columns], 1., -1.)
+    if direction:
+        keep = signs == direction
+        steps, columns, signs = steps[keep], columns[keep], signs[keep]
+
+    t0, t1 = t_values[steps], t_values[steps + 1]
+    x0, x1 = x[steps, columns], x[steps + 1, columns]
+    y0, y1 = y[steps, columns], y[steps + 1, columns]
+    g0, g1 = g[steps, columns], g[steps + 1, columns]
+
+    with np.errstate(all="ignore"):
+        vx0, vx1 = dxdt(t0, x0, y0), dxdt(t1, x1, y1)
+        vy0, vy1 = dydt(t0, x0, y0), dydt(t1, x1, y1)
+        theta = refine(lambda theta: event(hermite(theta, t1 - t0, x0, x1, vx0, vx1),
+                                           hermite(theta, t1 - t0, y0, y1, vy0, vy1)), g0, g1)
+
+    # Falls back on linear interpolation where the interpolant leaves the domain of g or of the vector field.
+    theta = np.where(np.isfinite(theta), theta, g0 / (g0 - g1))
+    xc = np.where(np.isfinite(vx0 + vx1), hermite(theta, t1 - t0, x0, x1, vx0, vx1), x0 + theta * (x1 - x0))
+    yc = np.where(np.isfinite(vy0 + vy1), hermite(theta, t1 - t0, y0, y1, vy0, vy1), y0 + theta * (y1 - y0))
+    return indices[columns], t0 + theta * (t1 - t0), xc, yc, signs
+
+
+def refine(g_of_theta, g0, g1):
+    # Finds theta in [0, 1] where g vanishes on the steps' interpolants with the Illinois variant of regula falsi,
+    # which keeps each root bracketed. All crossings are refined at once with a fixed number of iterations.
+    a, b = np.zeros_like(g0), np.ones_like(g0)
+    ga, gb = g0, g1
+    side = np.zeros(len(g0), dtype=np.int8)  # End point replaced in the previous iteration, -1 for b and 1 for a.
+    theta = g0 / (g0 - g1)
+
+    for _ in range(REFINEMENT_ITERATIONS):
+        g = g_of_theta(theta)
+
+        # The end point that is kept twice in a row has its value halved, which avoids regula falsi's slow one-sided
+        # convergence.
+        replace_b = np.sign(g) == np.sign(gb)
+        ga = np.where(replace_b & (side == -1), ga / 2, ga)
+        gb = np.where(~replace_b & (side == 1), gb / 2, gb)
+        a, ga = np.where(replace_b, a, theta), np.where(replace_b, ga, g)
+        b, gb = np.where(replace_b, theta, b), np.where(replace_b, g, gb)
+        side = np.where(replace_b, -1, 1).astype(np.int8)
+
+        theta = np.where(ga != gb, (a * gb - b * ga) / (gb - ga), a)
+
+    return theta
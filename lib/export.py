@@ -0,0 +1,249 @@
+"""
+Export class file. An export saves the top window's figure as a PDF, SVG or PNG file in a background thread, so that the
+app stays responsive while large figures are written. The figure is rebuilt from a snapshot of what is drawn, taken on
+the Tk thread when the export starts, and the trajectories are simplified to the output resolution first: consecutive
+points that fall within the same output pixel are dropped. Dense trajectory layers are rasterized, while the axes, ticks
+and text stay vectors.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import os
+import threading
+import numpy as np
+from matplotlib.artist import allow_rasterization
+from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection, EllipseCollection, PolyCollection
+from matplotlib.colors import to_rgba
+from matplotlib.lines import Line2D
+
+from .flow import BATCH_VALUES
+from .density import TrajectoryDensity
+from .configureplot import (set_figure_properties, set_figure_colors, set_figure_axes, set_figure_ticks,
+                            set_figure_ticklabels, set_figure_grid)
+from .profiler import profiler
+
+EXPORT_FORMATS = ("pdf", "svg", "png")
+
+# Number of trajectory vertices, counted before the trajectories are simplified, above which the trajectories are
+# rasterized when rasterizing is set to "auto". The initial points and arrowheads stay vectors.
+RASTERIZE_VERTICES = 2000000
+
+# Number of trajectories per collection of the exported figure. Progress is reported as each collection is drawn.
+EXPORT_CHUNK_LINES = 2000
+
+
+class ProgressLineCollection(LineCollection):
+    # Calls on_draw each time the collection has been drawn.
+    def __init__(self, segments, on_draw, **kwargs):
+        super().__init__(segments, **kwargs)
+        self.on_draw = on_draw
+
+    @allow_rasterization
+    def draw(self, renderer):
+        super().draw(renderer)
+        self.on_draw()
+
+
+def simplify_lines(lines, x_resolution, y_resolution):
+    """
+    Simplifies the (n, 2) lines to the given resolution in data units, by keeping only the points that fall in a
+    different cell of that size than the point before them, and the last point of each line. Every line is split where
+    it is not finite. Returns the list of simplified lines, which are never more than a cell away from the originals.
+    """
+    lengths = np.array([len(line) for line in lines])
+    points = np.concatenate(lines).astype(np.float64)
+    ends = np.cumsum(lengths) - 1
+
+    with np.errstate(invalid="ignore"):
+        cells = np.floor(points / (x_resolution, y_resolution))
+
+    finite = np.isfinite(cells).all(axis=1)
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = (cells[1:] != cells[:-1]).any(axis=1)
+    keep[ends] = True
+    keep[ends[:-1] + 1] = True  # The first point of each line.
+    keep &= finite
+
+    # Lines are split at their ends and wherever a run of finite points ends.
+    breaks = np.zeros(len(points), dtype=bool)
+    breaks[ends] = True
+    breaks[:-1] |= finite[:-1] & ~finite[1:]
+    line_ids = np.cumsum(breaks) - breaks
+
+    kept_ids = line_ids[keep]
+    splits = np.flatnonzero(np.diff(kept_ids)) + 1
+    return [line for line in np.split(points[keep], splits) if len(line) > 1]
+
+
+def thicken(mask, width):
+    # Dilates the boolean image mask by a square of width x width pixels.
+    for _ in range(2):
+        dilated = mask.copy()
+        for shift in range(1, width // 2 + 1):
+            dilated[shift:] |= mask[:-shift]
+        for shift in range(1, (width - 1) // 2 + 1):
+            dilated[:-shift] |= mask[shift:]
+        mask = dilated.T
+
+    return mask
+
+
+class Export:
+    def __init__(self, top, filename, file_format, dpi, rasterize):
+        self.filename = filename
+        self.format = file_format
+        self.dpi = dpi
+        self.rasterize = rasterize  # "auto", "always" or "never"
+
+        self.progress = 0.  # Fraction of the export done, updated by the export's thread.
+        self.error = None
+        self.is_done = False
+        self.thread = None
+
+        # Snapshot of the figure. Arrays are only referenced, since the app replaces rather than modifies them.
+        self.size = tuple(top.fig.get_size_inches())
+        self.figure_style = (top.figure_tick_length, top.figure_tick_fontsize, top.figure_axes_linewidth,
+                             top.figure_grid_style, top.figure_grid_linewidth, top.figure_grid_alpha)
+        self.colors = (top.figure_background_color, top.figure_axes_color)
+        self.limits = (top.figure_settings.xmin, top.figure_settings.xmax, top.figure_settings.ymin,
+                       top.figure_settings.ymax)
+        self.tick_spacings = (top.figure_settings.xtick_spacing, top.figure_settings.ytick_spacing)
+        self.show_ticklabels = (top.figure_settings.show_x_ticklabels.get(),
+                                top.figure_settings.show_y_ticklabels.get())
+        self.show_grid = top.figure_settings.show_grid.get()
+
+        self.flow_color = top.flow_color
+        self.flow_linewidth = top.flow_linewidth
+        self.trajectories = []
+        self.circle_centers = np.zeros((0, 2))
+        self.circle_diameter = top.flow_circle_diameter * 72 / top.fig.dpi  # In points
+        self.arrowheads = []
+        if top.flows and top.flow_trajectory_collection.get_visible():
+            self.trajectories = [flow.trajectory for flow in top.flows]
+            self.circle_centers = np.array([(flow.x0, flow.y0) for flow in top.flows])
+            self.arrowheads = [flow.arrowhead.get_xy() for flow in top.flows if not flow.is_equilibrium]
+
+        self.graphs = [(graph.X, graph.Y, graph.eqn, graph.color, graph.linewidth) for graph in top.graphs]
+        self.lines = [dict(xdata=line.get_xdata(), ydata=line.get_ydata(), color=line.get_color(),
+                           linewidth=line.get_linewidth(), linestyle=line.get_linestyle(), zorder=line.get_zorder())
+                      for line in top.ax.lines]
+        self.images = [dict(X=image.get_array(), extent=image.get_extent(), origin=image.origin, aspect="auto",
+                            interpolation=image.get_interpolation(), cmap=image.get_cmap(),
+                            vmin=image.get_clim()[0], vmax=image.get_clim()[1], zorder=image.get_zorder())
+                       for image in top.ax.images if image.get_visible()]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    @profiler.profiled("Export.run")
+    def run(self):
+        # Writes to a temporary file first, so that an export that fails or is cut short leaves no partial file.
+        temp_filename = self.filename + ".tmp"
+        try:
+            fig = self.create_figure()
+            fig.savefig(temp_filename, format=self.format, dpi=self.dpi, facecolor=self.colors[0])
+            os.replace(temp_filename, self.filename)
+            self.progress = 1.
+        except Exception as error:
+            self.error = error
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+        finally:
+            self.is_done = True
+
+    def create_figure(self):
+        xmin, xmax, ymin, ymax = self.limits
+        fig = Figure(figsize=self.size)
+        ax = fig.add_subplot(1, 1, 1)
+
+        set_figure_properties(fig, ax, *self.figure_style)
+        set_figure_colors(fig, ax, *self.colors)
+        set_figure_axes(fig, ax, xmin, xmax, ymin, ymax, self.colors[1])
+        set_figure_ticks(fig, ax, self.tick_spacings[0], xmin, xmax, self.tick_spacings[1], ymin, ymax)
+        set_figure_ticklabels(fig, ax, self.show_ticklabels[0], xmin, xmax, self.show_ticklabels[1], ymin, ymax)
+        set_figure_grid(fig, ax, self.show_grid, *self.tick_spacings)
+
+        for X, Y, eqn, color, linewidth in self.graphs:
+            ax.contour(X, Y, eqn(X, Y), [0.], colors=(color, ), linewidths=linewidth, zorder=-4)
+
+        for line in self.lines:
+            ax.add_line(Line2D(**line))
+
+        for image in self.images:
+            ax.imshow(**image)
+
+        vertices = sum(len(trajectory) for trajectory in self.trajectories)
+        if self.rasterize == "always" or (self.rasterize == "auto" and vertices > RASTERIZE_VERTICES):
+            self.add_raster_trajectories(ax)
+        else:
+            self.add_vector_trajectories(ax)
+
+        if len(self.circle_centers):
+            ax.add_collection(EllipseCollection(self.circle_diameter, self.circle_diameter, 0, units="points",
+                                                offsets=self.circle_centers, offset_transform=ax.transData,
+                                                facecolors=self.flow_color, zorder=-1))
+        if self.arrowheads:
+            ax.add_collection(PolyCollection(self.arrowheads, facecolors=self.flow_color, zorder=-2))
+
+        return fig
+
+    def trajectory_groups(self):
+        # Yields the trajectories a group of at most about BATCH_VALUES points at a time, and updates the progress.
+        start = 0
+        while start < len(self.trajectories):
+            stop, values = start, 0
+            while stop < len(self.trajectories) and values < BATCH_VALUES:
+                values += len(self.trajectories[stop])
+                stop += 1
+
+            yield self.trajectories[start:stop]
+            start = stop
+            self.progress = 0.5 * start / len(self.trajectories)
+
+    def add_vector_trajectories(self, ax):
+        # The trajectories are simplified to the output resolution, which is the first half of the progress. Drawing
+        # them is the second half.
+        xmin, xmax, ymin, ymax = self.limits
+        x_resolution = (xmax - xmin) / (self.size[0] * self.dpi)
+        y_resolution = (ymax - ymin) / (self.size[1] * self.dpi)
+        lines = []
+        for group in self.trajectory_groups():
+            lines += simplify_lines(group, x_resolution, y_resolution)
+
+        chunks = max(1, -(-len(lines) // EXPORT_CHUNK_LINES))
+
+        def on_draw():
+            self.progress = min(0.99, self.progress + 0.5 / chunks)
+
+        for start in range(0, len(lines), EXPORT_CHUNK_LINES):
+            ax.add_collection(ProgressLineCollection(lines[start:start + EXPORT_CHUNK_LINES], on_draw,
+                                                     linewidths=self.flow_linewidth, colors=self.flow_color,
+                                                     zorder=-3))
+
+    def add_raster_trajectories(self, ax):
+        # Drawing a path per trajectory takes about a microsecond per vertex whatever the output, so dense layers are
+        # instead binned into an image at the output resolution, like the density rendering, and the pixels that any
+        # trajectory passes through are thickened to the line width.
+        columns, rows = round(self.size[0] * self.dpi), round(self.size[1] * self.dpi)
+        density = TrajectoryDensity(*self.limits, columns, rows)
+        for group in self.trajectory_groups():
+            density.add(group)
+
+        covered = thicken((density.counts > 0).reshape(rows, columns), max(1, round(self.flow_linewidth *
+                                                                                      self.dpi / 72)))
+        image = np.zeros((rows, columns, 4), dtype=np.uint8)
+        image[covered] = np.round(255 * np.array(to_rgba(self.flow_color)))
+        ax.imshow(image, extent=self.limits, origin="lower", aspect="auto", interpolation="nearest", zorder=-3)
+
@@ -0,0 +1,403 @@
+"""
+Expression class file. Expressions entered by the user (the differential equations, graph equations and numeric
+entries) are parsed with Python's ast module and only accepted if they are built from numbers, the given variables, the
+constants pi and E, arithmetic operators, and the math functions listed in FUNCTIONS. Nothing entered by the user is
+ever passed to eval. Expressions may also use parameters, i.e. names bound to values when the expression is compiled,
+such as the coefficients of the differential equations that are set with sliders.
+
+Each expression is compiled into three kernels, which are chosen from when it is called:
+    - a scalar kernel built on the math module, used when every argument is a Python or NumPy double, which is how the
+      numerical methods evaluate the differential equations at each step;
+    - a NumPy scalar kernel, used for other scalars (e.g. float32) and whenever the math module raises an error, so
+      that the result follows NumPy's rules for division by zero, overflow and invalid values;
+    - an array kernel, which evaluates one NumPy ufunc per operation into preallocated temporaries using out=, so that
+      arrays such as the meshgrids of graphs are evaluated without allocating a new array for every operation.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import ast
+import math
+import threading
+import numpy as np
+
+CONSTANTS = {"pi": math.pi, "E": math.e}
+
+# Function name -> (NumPy ufunc, number of arguments). Names follow SymPy, which was used to parse expressions before.
+FUNCTIONS = {"sin": ("sin", 1), "cos": ("cos", 1), "tan": ("tan", 1),
+             "asin": ("arcsin", 1), "acos": ("arccos", 1), "atan": ("arctan", 1), "atan2": ("arctan2", 2),
+             "sinh": ("sinh", 1), "cosh": ("cosh", 1), "tanh": ("tanh", 1),
+             "asinh": ("arcsinh", 1), "acosh": ("arccosh", 1), "atanh": ("arctanh", 1),
+             "exp": ("exp", 1), "log": ("log", (1, 2)), "sqrt": ("sqrt", 1), "cbrt": ("cbrt", 1),
+             "Abs": ("absolute", 1), "abs": ("absolute", 1), "sign": ("sign", 1),
+             "floor": ("floor", 1), "ceiling": ("ceil", 1),
+             "Min": ("minimum", None), "Max": ("maximum", None), "Heaviside": ("heaviside", (1, 2)),
+             "cot": ("tan", 1), "sec": ("cos", 1), "csc": ("sin", 1)}
+
+BINARY_OPERATORS = {ast.Add: "add", ast.Sub: "subtract", ast.Mult: "multiply", ast.Div: "true_divide",
+                    ast.Pow: "power", ast.Mod: "remainder", ast.FloorDiv: "floor_divide"}
+
+# Ufuncs that have an equivalent in the math module. Expressions using any other ufunc have no scalar kernel.
+MATH_FUNCTIONS = {"sin": "sin", "cos": "cos", "tan": "tan", "arcsin": "asin", "arccos": "acos", "arctan": "atan",
+                  "arctan2": "atan2", "sinh": "sinh", "cosh": "cosh", "tanh": "tanh", "arcsinh": "asinh",
+                  "arccosh": "acosh", "arctanh": "atanh", "exp": "exp", "log": "log", "sqrt": "sqrt",
+                  "absolute": "fabs", "floor": "floor", "ceil": "ceil", "power": "pow"}
+MATH_OPERATORS = {"add": "({} + {})", "subtract": "({} - {})", "multiply": "({} * {})", "true_divide": "({} / {})",
+                  "remainder": "({} % {})", "floor_divide": "({} // {})", "negative": "(-{})",
+                  "square": "({} ** 2)", "reciprocal": "(1.0 / {})", "positive": "{}"}
+
+# Constant exponents that are replaced by a cheaper ufunc.
+POWER_SPECIALIZATIONS = {2.: "square", 0.5: "sqrt", -1.: "reciprocal", 1.: "positive"}
+
+SCALAR_TYPES = frozenset((float, int, np.float64))
+
+KERNEL_NAMESPACE = {"_scalar_types": SCALAR_TYPES, "_float": float, "_np_copyto": np.copyto, "_inf": math.inf,
+                    "_nan": math.nan}
+KERNEL_NAMESPACE.update({"_np_" + name: getattr(np, name) for name in dir(np)
+                         if isinstance(getattr(np, name), np.ufunc)})
+KERNEL_NAMESPACE.update({"_m_" + name: getattr(math, name) for name in MATH_FUNCTIONS.values()})
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+# Nodes of a parsed expression are tuples of the form ("variable", name), ("constant", value), or
+# ("ufunc", name, arguments).
+def parse(text, variables, parameters=None):
+    # Parameters are names bound to values when the expression is compiled, and are folded like the constants.
+    constants = dict(CONSTANTS, **parameters) if parameters else CONSTANTS
+    try:
+        tree = ast.parse(text.replace("^", "**").strip(), mode="eval")
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        raise ExpressionError("Invalid syntax.")
+
+    try:
+        return lower(tree.body, variables, constants)
+    except RecursionError:
+        raise ExpressionError("Expression is nested too deeply.")
+
+
+def lower(node, variables, constants=CONSTANTS):
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ExpressionError("Invalid constant {!r}.".format(node.value))
+        try:
+            return "constant", float(node.value)
+        except OverflowError:
+            raise ExpressionError("Constant is too large.")
+
+    if isinstance(node, ast.Name):
+        if node.id in variables:
+            return "variable", node.id
+        if node.id in constants:
+            return "constant", float(constants[node.id])
+        raise ExpressionError("Unknown name '{}'.".format(node.id))
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        operand = lower(node.operand, variables, constants)
+        return fold(("ufunc", "negative", [operand])) if isinstance(node.op, ast.USub) else operand
+
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        left, right = lower(node.left, variables, constants), lower(node.right, variables, constants)
+        if type(node.op) is ast.Pow and right[0] == "constant" and right[1] in POWER_SPECIALIZATIONS:
+            return fold(("ufunc", POWER_SPECIALIZATIONS[right[1]], [left]))
+        if type(node.op) is ast.Pow and right[0] == "constant" and right[1] in (3., 4.) and left[0] == "variable":
+            # Cubes and fourth powers of variables are expanded into products. Besides being cheaper, this avoids pow,
+            # which is more than ten times slower for some arguments close to 1, e.g. near the equilibria of x - x**3.
+            square = ("ufunc", "square", [left])
+            return ("ufunc", "multiply", [square, left]) if right[1] == 3. else ("ufunc", "square", [square])
+        return fold(("ufunc", BINARY_OPERATORS[type(node.op)], [left, right]))
+
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS:
+        name = node.func.id
+        ufunc, arity = FUNCTIONS[name]
+        if node.keywords or any(isinstance(arg, ast.Starred) for arg in node.args):
+            raise ExpressionError("Invalid arguments for {}.".format(name))
+
+        args = [lower(arg, variables, constants) for arg in node.args]
+        if (arity is None and len(args) < 1) or (isinstance(arity, int) and len(args) != arity) or \
+                (isinstance(arity, tuple) and len(args) not in arity):
+            raise ExpressionError("Wrong number of arguments for {}.".format(name))
+
+        if name in ("Min", "Max"):  # Reduced pairwise, since the ufuncs take two arguments.
+            result = args[0]
+            for arg in args[1:]:
+                result = fold(("ufunc", ufunc, [result, arg]))
+            return result
+        if name == "log" and len(args) == 2:  # log(x, b) is the logarithm of x in base b.
+            return fold(("ufunc", "true_divide", [fold(("ufunc", "log", [args[0]])),
+                                                  fold(("ufunc", "log", [args[1]]))]))
+        if name == "Heaviside":  # Takes the value 1/2 at 0 unless given, like SymPy's.
+            return fold(("ufunc", "heaviside", [args[0], args[1] if len(args) == 2 else ("constant", 0.5)]))
+        if name in ("cot", "sec", "csc"):
+            return fold(("ufunc", "reciprocal", [fold(("ufunc", ufunc, args))]))
+        return fold(("ufunc", ufunc, args))
+
+    raise ExpressionError("'{}' is not allowed in expressions.".format(ast.unparse(node)))
+
+
+def find_parameters(texts, variables):
+    # Returns the names used in the given expressions that are neither variables, constants nor functions, in the order
+    # they first appear. Expressions that cannot be parsed are skipped, since compiling them reports the error.
+    parameters = []
+    for text in texts:
+        try:
+            tree = ast.parse(text.replace("^", "**").strip(), mode="eval")
+        except (SyntaxError, ValueError, RecursionError, MemoryError):
+            continue
+
+        functions = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+        names = sorted((node for node in ast.walk(tree) if isinstance(node, ast.Name) and id(node) not in functions),
+                       key=lambda node: (node.lineno, node.col_offset))
+        for node in names:
+            if not (node.id in variables or node.id in CONSTANTS or node.id in FUNCTIONS or node.id in parameters):
+                parameters.append(node.id)
+
+    return tuple(parameters)
+
+
+def fold(node):
+    # Evaluates operations on constants only once, when the expression is compiled.
+    if all(arg[0] == "constant" for arg in node[2]):
+        with np.errstate(all="ignore"):
+            return "constant", float(getattr(np, node[1])(*[np.float64(arg[1]) for arg in node[2]]))
+    return node
+
+
+def constant_source(value):
+    # Constants folded to infinity or NaN have no literal.
+    if math.isnan(value):
+        return "_nan"
+    if math.isinf(value):
+        return "_inf" if value > 0 else "(-_inf)"
+    return repr(value)
+
+
+def uses_math(node):
+    if node[0] != "ufunc":
+        return True
+    return (node[1] in MATH_FUNCTIONS or node[1] in MATH_OPERATORS) and all(uses_math(arg) for arg in node[2])
+
+
+def math_source(node):
+    if node[0] == "variable":
+        return node[1]
+    if node[0] == "constant":
+        return constant_source(node[1])
+
+    args = [math_source(arg) for arg in node[2]]
+    if node[1] == "power" and node[2][1][0] == "constant" and node[2][1][1].is_integer():
+        # Integer powers of negative numbers are real, and Python's float power computes them faster than math.pow.
+        return "({} ** {})".format(args[0], int(node[2][1][1]))
+    if node[1] in MATH_OPERATORS:
+        return MATH_OPERATORS[node[1]].format(*args)
+    return "_m_{}({})".format(MATH_FUNCTIONS[node[1]], ", ".join(args))
+
+
+def numpy_source(node):
+    if node[0] == "variable":
+        return node[1]
+    if node[0] == "constant":
+        return constant_source(node[1])
+    return "_np_{}({})".format(node[1], ", ".join(numpy_source(arg) for arg in node[2]))
+
+
+def depends_on(node, variables):
+    if node[0] == "variable":
+        return node[1] in variables
+    return node[0] == "ufunc" and any(depends_on(arg, variables) for arg in node[2])
+
+
+def array_source(node, array_variables):
+    # Emits one ufunc call per operation on arrays. Each result is written into a register (temporary array), and a
+    # register is freed once its value has been used, so that it can receive the result of the next operation in
+    # place. The result of the root is written into out. Operations that only depend on scalar arguments, e.g. on t
+    # when a meshgrid is evaluated, are evaluated once as scalars. Returns the lines of code and the number of
+    # registers used.
+    lines = []
+    free = []
+    count = [0]
+
+    def emit(node, target=None):
+        if node[0] != "ufunc" or not depends_on(node, array_variables):
+            return numpy_source(node), None
+
+        operands = [emit(arg) for arg in node[2]]
+        for _, register in operands:
+            if register is not None:
+                free.append(register)
+
+        if target is None:
+            if free:
+                target = free.pop()
+            else:
+                target = "_r{}".format(count[0])
+                count[0] += 1
+
+        lines.append("_np_{}({}, out={})".format(node[1], ", ".join(name for name, _ in operands), target))
+        return target, target
+
+    if node[0] == "ufunc" and depends_on(node, array_variables):
+        emit(node, "out")
+    else:
+        lines.append("_np_copyto(out, {})".format(emit(node)[0]))
+
+    return lines, count[0]
+
+
+class Expression:
+    def __init__(self, text, variables=("t", "x", "y"), parameters=None):
+        self.text = text
+        self.variables = tuple(variables)
+        self.parameters = dict(parameters or {})  # Parameter name -> value it is compiled with
+        self.tree = parse(text, self.variables, self.parameters)
+        self.free_variables = frozenset(v for v in self.variables if depends_on(self.tree, {v}))
+        self.derivatives = {}
+        self.array_kernels = {}  # Tuple of which arguments are arrays -> (array kernel, number of registers)
+        self.local = threading.local()  # Temporaries of the array kernels, kept per thread.
+
+        arguments = ", ".join(self.variables)
+        scalar_check = " and ".join("type({}) in _scalar_types".format(v) for v in self.variables) or "True"
+
+        source = "def _numpy_kernel({}):\n".format(arguments)
+        source += "    return {}\n\n".format(numpy_source(self.tree))
+
+        source += "def _kernel({}):\n".format(arguments)
+        source += "    if {}:\n".format(scalar_check)
+        if uses_math(self.tree):
+            # NumPy doubles are converted to Python floats, whose arithmetic is several times faster.
+            source += "        try:\n"
+            source += "".join("            {0} = _float({0})\n".format(v) for v in self.variables)
+            source += "            return {}\n".format(math_source(self.tree))
+            source += "        except (ArithmeticError, ValueError):\n"
+            source += "            pass\n"
+        source += "        return _numpy_kernel({})\n".format(arguments)
+        source += "    return _evaluate({})\n".format(arguments)
+
+        namespace = dict(KERNEL_NAMESPACE, _evaluate=self.evaluate)
+        exec(compile(source, "<expression {!r}>".format(text), "exec"), namespace)
+
+        self.source = source
+        self.kernel = namespace["_kernel"]
+        # Kept on the kernel, which Flow passes to the numerical methods.
+        self.kernel.free_variables = self.free_variables
+        self.kernel.expression = self
+        self.numpy_kernel = namespace["_numpy_kernel"]
+
+    def array_kernel(self, is_array):
+        # Compiles the array kernel for the given arguments being arrays, the first time they are.
+        if is_array not in self.array_kernels:
+            lines, registers = array_source(self.tree, {v for v, array in zip(self.variables, is_array) if array})
+            arguments = "".join("{}, ".format(v) for v in self.variables)
+
+            source = "def _array_kernel({}out{}):\n".format(arguments, "".join(", _r{}".format(i)
+                                                                                for i in range(registers)))
+            source += "".join("    {}\n".format(line) for line in lines)
+            source += "    return out\n"
+
+            namespace = dict(KERNEL_NAMESPACE)
+            exec(compile(source, "<expression {!r}>".format(self.text), "exec"), namespace)
+            self.array_kernels[is_array] = (namespace["_array_kernel"], registers)
+
+        return self.array_kernels[is_array]
+
+    def __call__(self, *args):
+        return self.kernel(*args)
+
+    def __reduce__(self):
+        # Compiled kernels cannot be pickled, so an expression is recompiled from its text, e.g. in worker processes.
+        return Expression, (self.text, self.variables, self.parameters)
+
+    def derivative(self, variable):
+        # Returns the partial derivative with respect to the given variable as a compiled expression. It is derived with
+        # SymPy the first time it is requested. Returns None if SymPy is not installed, or if the derivative cannot be
+        # expressed with the functions above (e.g. the derivative of sign contains a Dirac delta).
+        if variable not in self.derivatives:
+            try:
+                import sympy as sp
+            except ImportError:
+                return None
+
+            symbols = {v: sp.Symbol(v, real=True) for v in self.variables}
+            try:
+                derivative = sp.diff(to_sympy(self.tree, symbols, sp), symbols[variable])
+                self.derivatives[variable] = Expression(sp.sstr(derivative), self.variables)
+            except ExpressionError:
+                self.derivatives[variable] = None
+
+        return self.derivatives[variable]
+
+    def __repr__(self):
+        if self.parameters:
+            return "Expression({!r}, {!r}, {!r})".format(self.text, self.variables, self.parameters)
+        return "Expression({!r}, {!r})".format(self.text, self.variables)
+
+    def evaluate(self, *args):
+        shape = np.broadcast_shapes(*[np.shape(arg) for arg in args])
+        if shape == ():
+            return self.numpy_kernel(*args)
+
+        dtype = np.result_type(*args, 1.)
+        if dtype.kind != "f":
+            dtype = np.dtype(np.float64)
+
+        is_array = tuple(np.ndim(arg) > 0 for arg in args)
+        kernel, registers = self.array_kernel(is_array)
+
+        # The output is a new array, since callers keep it, while the temporaries are reused by later calls with
+        # the same arguments being arrays, shape and dtype.
+        temporaries = getattr(self.local, "temporaries", None)
+        if temporaries is None or temporaries[0] != (is_array, shape, dtype):
+            temporaries = ((is_array, shape, dtype), [np.empty(shape, dtype) for _ in range(registers)])
+            self.local.temporaries = temporaries
+
+        return kernel(*args, np.empty(shape, dtype), *temporaries[1])
+
+
+# Ufunc -> SymPy function, for the ufuncs that are not arithmetic operators.
+SYMPY_FUNCTIONS = {"sin": "sin", "cos": "cos", "tan": "tan", "arcsin": "asin", "arccos": "acos", "arctan": "atan",
+                   "arctan2": "atan2", "sinh": "sinh", "cosh": "cosh", "tanh": "tanh", "arcsinh": "asinh",
+                   "arccosh": "acosh", "arctanh": "atanh", "exp": "exp", "log": "log", "sqrt": "sqrt", "cbrt": "cbrt",
+                   "absolute": "Abs", "sign": "sign", "floor": "floor", "ceil": "ceiling", "minimum": "Min",
+                   "maximum": "Max", "heaviside": "Heaviside"}
+
+
+def to_sympy(node, symbols, sp):
+    # Builds the SymPy expression of a parsed expression directly, so that no text is ever passed to sympify.
+    if node[0] == "variable":
+        return symbols[node[1]]
+    if node[0] == "constant":
+        if node[1].is_integer() and abs(node[1]) < 2 ** 53:
+            return sp.Integer(int(node[1]))
+        return sp.Float(node[1], 17) if math.isfinite(node[1]) else sp.nan  # 17 digits print the double exactly.
+
+    args = [to_sympy(arg, symbols, sp) for arg in node[2]]
+    operators = {"add": lambda a, b: a + b, "subtract": lambda a, b: a - b, "multiply": lambda a, b: a * b,
+                 "true_divide": lambda a, b: a / b, "power": lambda a, b: a ** b, "remainder": sp.Mod,
+                 "floor_divide": lambda a, b: sp.floor(a / b), "negative": lambda a: -a, "square": lambda a: a ** 2,
+                 "reciprocal": lambda a: 1 / a, "positive": lambda a: a}
+    if node[1] in operators:
+        return operators[node[1]](*args)
+    return getattr(sp, SYMPY_FUNCTIONS[node[1]])(*args)
+
+
+def evaluate_constant(text):
+    # Evaluates a numeric entry such as "2*pi" or "1/3".
+    with np.errstate(all="ignore"):
+        value = float(Expression(text, ())())
+
+    if not math.isfinite(value):
+        raise ExpressionError("Value must be finite.")
+
+    return value
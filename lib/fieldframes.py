@@ -0,0 +1,90 @@
+"""
+FieldFrames class file. For differential equations that depend on t, the direction field changes over time, and the
+animation shows it behind the moving circles. The field of every frame is evaluated beforehand, over a grid of the view
+and all the frame times at once, and kept as arrays of the arrows' components, so that playing the animation only
+swaps the arrows' data. The frames of recently animated fields are cached, so that animating the same system and view
+again does not evaluate them again.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+
+from .flow import BATCH_VALUES
+from .lrucache import LRUCache
+from .profiler import profiler
+
+# Maximum number of field frames evaluated. Longer animations show each field frame for several animation frames.
+MAX_FIELD_FRAMES = 2000
+
+# Number of arrow components kept in the cache, least recently used fields first out. About 64 MB in float32.
+FIELD_CACHE_VALUES = 2 ** 24
+
+_cache = LRUCache(FIELD_CACHE_VALUES, lambda field: field[0].size + field[1].size)
+
+
+def depends_on_time(dxdt, dydt):
+    return "t" in dxdt.free_variables or "t" in dydt.free_variables
+
+
+class FieldFrames:
+    """
+    Direction field of the equations dxdt, dydt over a grid of the view (xmin, xmax, ymin, ymax) with columns by rows
+    arrows, at the given frame times. The arrows have the same length, a fraction of the grid's spacing, and only show
+    the direction of the field.
+    """
+    def __init__(self, dxdt, dydt, t_values, extent, columns, rows, length=0.8):
+        xmin, xmax, ymin, ymax = extent
+        self.x = xmin + (np.arange(columns) + 0.5) * (xmax - xmin) / columns
+        self.y = ymin + (np.arange(rows) + 0.5) * (ymax - ymin) / rows
+        self.X, self.Y = np.meshgrid(self.x, self.y)
+
+        # Animation frame -> field frame, evaluated at most MAX_FIELD_FRAMES times.
+        t_values = np.asarray(t_values, dtype=np.float64)
+        field_frames = min(len(t_values), MAX_FIELD_FRAMES)
+        self.frame_indices = np.arange(len(t_values)) * field_frames // len(t_values)
+        frame_times = t_values[np.searchsorted(self.frame_indices, np.arange(field_frames))]
+
+        key = (str(dxdt), str(dydt), tuple(extent), columns, rows, length, frame_times.tobytes())
+        cached = _cache.get(key)
+        if cached is not None:
+            self.U, self.V = cached
+        else:
+            self.U, self.V = self.evaluate(dxdt, dydt, frame_times, length * min((xmax - xmin) / columns,
+                                                                                  (ymax - ymin) / rows))
+            _cache.put(key, (self.U, self.V))
+
+    @profiler.profiled("FieldFrames.evaluate")
+    def evaluate(self, dxdt, dydt, frame_times, length):
+        # The field is evaluated over (frames, rows, columns) arrays at once, in chunks of frames that bound the memory
+        # of the temporaries. Returns the components of the arrows of every frame as (frames, rows * columns) arrays.
+        U = np.empty((len(frame_times), self.X.size), dtype=np.float32)
+        V = np.empty_like(U)
+        X, Y = self.X.ravel()[np.newaxis], self.Y.ravel()[np.newaxis]
+        chunk = max(1, BATCH_VALUES // self.X.size)
+
+        with np.errstate(all="ignore"):
+            for start in range(0, len(frame_times), chunk):
+                t = frame_times[start:start + chunk, np.newaxis]
+                u, v = (np.broadcast_to(np.asarray(f(t, X, Y), dtype=np.float64), (len(t), X.size))
+                        for f in (dxdt, dydt))
+                norm = np.hypot(u, v)
+                scale = np.where((norm > 0) & np.isfinite(norm), length / norm, 0.)
+                U[start:start + chunk], V[start:start + chunk] = u * scale, v * scale
+
+        return U, V
+
+    def frame(self, frame):
+        # Returns the components of the arrows of the given animation frame.
+        idx = self.frame_indices[min(frame, len(self.frame_indices) - 1)]
+        return self.U[idx], self.V[idx]
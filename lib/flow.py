@@ -18,6 +18,15 @@ from matplotlib import patches
 import numpy as np
 
 from .pixel_conversions import x_to_pixel, pixel_to_x, y_to_pixel, pixel_to_y
+from .profiler import profiler
+from .pyramid import TrajectoryPyramid, MIN_PYRAMID_POINTS
+from .denseoutput import locate, dense_output
+
+# Maximum number of values per array when flows are integrated in batch mode, which bounds the memory used by a batch.
+BATCH_VALUES = 2 ** 22
+
+# Number of values of the blocks of steps gathered from many flows to evaluate their dense output at single times.
+STACK_VALUES = 2 ** 18
 
 
 class Flow:
@@ -34,19 +43,90 @@ class Flow:
         self.y_values = None
 
         self.trajectory = None
+        self.pyramid = None
         self.circle = None
         self.arrowhead = None
 
+        # Flows read from a session file are loaded lazily. Until then, source reads the flow's time values and
+        # trajectory, and bbox is the (xmin, xmax, ymin, ymax) bounding box of its trajectory.
+        self.source = None
+        self.bbox = None
+
+        # Kernels of the equations, resolved once for the equations they were resolved from.
+        self.kernels = None
+
         self.is_equilibrium = (np.abs(self.dxdt(0, self.x0, self.y0)) < 1E-15 and
                                np.abs(self.dydt(0, self.x0, self.y0)) < 1E-15)
 
-    def integrate(self, method, method_dict):
+    @profiler.profiled("Flow.integrate")
+    def integrate(self, method, method_dict, dtype=np.float64):
+        # The dtype of the initial point sets the precision that the built-in numerical methods integrate with.
         integrator = method_dict[method]
-        self.t_values, self.x_values, self.y_values = integrator(self.dxdt, self.dydt, self.x0, self.y0, self.tmax,
+        dxdt, dydt = prepare_equations(self.dxdt, self.dydt)
+        self.t_values, self.x_values, self.y_values = integrator(dxdt, dydt, dtype(self.x0), dtype(self.y0), self.tmax,
                                                                  self.dt)
 
-    def create_trajectory(self):
-        self.trajectory = np.column_stack([self.x_values, self.y_values])  # Will be used in LineCollection
+    def create_trajectory(self, store=None):
+        if store is None:
+            self.trajectory = np.column_stack([self.x_values, self.y_values])  # Will be used in LineCollection
+        else:
+            # The store keeps a single (n, 2) copy, possibly memory-mapped, and x_values/y_values become views of it.
+            # A memory-mapped trajectory of the flow integrated before may be overwritten in place.
+            self.t_values, self.x_values, self.y_values, self.trajectory = store.store(self.t_values, self.x_values,
+                                                                                       self.y_values, self.trajectory)
+        self.pyramid = None
+
+    def set_source(self, source, bbox, tail):
+        # Only the last two points are kept until the flow is loaded, which is enough to draw its arrowhead.
+        self.source = source
+        self.bbox = bbox
+        self.trajectory = tail
+        self.x_values = tail[:, 0]
+        self.y_values = tail[:, 1]
+
+    def set_trajectory(self, t_values, trajectory):
+        # Sets a trajectory read from a session file, which replaces the flow's source.
+        self.t_values = t_values
+        self.trajectory = trajectory
+        self.x_values = trajectory[:, 0]
+        self.y_values = trajectory[:, 1]
+        self.source = None
+
+    def load(self):
+        if self.source is not None:
+            self.set_trajectory(*self.source())
+
+    def evaluate(self, times):
+        # Values of the trajectory at arbitrary times, interpolated between the steps by the dense output.
+        times = np.asarray(times, dtype=np.float64)
+        idx, fraction = locate(self.t_values, times)
+        if self.kernels is None or self.kernels[0] is not self.dxdt or self.kernels[1] is not self.dydt:
+            self.kernels = (self.dxdt, self.dydt, *prepare_equations(self.dxdt, self.dydt))
+
+        return dense_output(*self.kernels[2:], self.t_values[idx], self.t_values[idx + 1], fraction,
+                            self.x_values[idx].astype(np.float64), self.y_values[idx].astype(np.float64),
+                            self.x_values[idx + 1].astype(np.float64), self.y_values[idx + 1].astype(np.float64))
+
+    def get_pyramid(self):
+        # The pyramid is built again whenever the trajectory is replaced, e.g. by integrating again or loading it.
+        if len(self.trajectory) < MIN_PYRAMID_POINTS:
+            return None
+
+        if self.pyramid is None or self.pyramid.trajectory is not self.trajectory:
+            self.pyramid = TrajectoryPyramid(self.trajectory)
+
+        return self.pyramid
+
+    def drawn_trajectory(self, fig_width, fig_height, xmin, xmax, ymin, ymax):
+        # The coarsest level of the trajectory that is drawn within a fraction of a pixel of it in the view.
+        pyramid = self.get_pyramid()
+        if pyramid is None:
+            return self.trajectory
+
+        return pyramid.points(pyramid.select(fig_width / (xmax - xmin), fig_height / (ymax - ymin)))
+
+    def intersects(self, xmin, xmax, ymin, ymax):
+        return not (self.bbox[1] < xmin or self.bbox[0] > xmax or self.bbox[3] < ymin or self.bbox[2] > ymax)
 
     def create_circle(self, diameter, fig_width, fig_height, xmin, xmax, ymin, ymax):
         x_diameter = pixel_to_x(diameter, fig_width, xmin, xmax) - xmin
@@ -97,3 +177,75 @@ class Flow:
         if not self.is_equilibrium:
             self.arrowhead.set(xy=self.get_arrowhead_points(arrowhead_size, fig_width, fig_height, xmin, xmax, ymin,
                                                             ymax))
+
+
+def prepare_equations(dxdt, dydt):
+    # Compiled expressions are passed to the numerical methods as their kernel functions, which are faster to call.
+    dxdt, dydt = getattr(dxdt, "kernel", dxdt), getattr(dydt, "kernel", dydt)
+    if profiler.enabled:
+        dxdt = profiler.counted("RHS evaluations", dxdt)
+        dydt = profiler.counted("RHS evaluations", dydt)
+
+    return dxdt, dydt
+
+
+@profiler.profiled("integrate_flows")
+def integrate_flows(flows, method, method_dict, dtype=np.float64, store=None, on_batch=None):
+    # Integrates the flows, which share the same equations, tmax and dt, and creates their trajectories. Methods that
+    # support batch mode integrate a whole batch of flows per call, other methods integrate one flow at a time. If
+    # given, on_batch is called with each batch of flows once their trajectories are created.
+    if not flows:
+        return
+
+    integrator = method_dict[method]
+    is_batched = len(flows) >= 2 and getattr(integrator, "supports_batch", False)
+    dxdt, dydt = prepare_equations(flows[0].dxdt, flows[0].dydt)
+    tmax, dt = flows[0].tmax, flows[0].dt
+    batch_size = max(1, BATCH_VALUES // len(np.arange(0., tmax + dt, dt)))
+
+    for start in range(0, len(flows), batch_size):
+        batch = flows[start:start + batch_size]
+        if is_batched:
+            t_values, x_values, y_values = integrator(dxdt, dydt, np.array([flow.x0 for flow in batch], dtype=dtype),
+                                                      np.array([flow.y0 for flow in batch], dtype=dtype), tmax, dt)
+
+            for i, flow in enumerate(batch):
+                flow.t_values, flow.x_values, flow.y_values = t_values, x_values[:, i], y_values[:, i]
+                flow.create_trajectory(store)
+        else:
+            for flow in batch:
+                flow.integrate(method, method_dict, dtype)
+                flow.create_trajectory(store)
+
+        if on_batch is not None:
+            on_batch(batch)
+
+
+class FlowStack:
+    """
+    Positions of flows that share their time values at single times, e.g. the frames of an animation, from the dense
+    output of all the flows at once. The steps of every flow are copied into a (steps, flows, 2) block covering a range
+    of steps, so that the ends of the step containing a time are a single slice of it. Times mostly advance from one
+    step to the next, and a new block is only gathered once they leave the current one.
+    """
+    def __init__(self, flows):
+        self.flows = flows
+        self.t_values = flows[0].t_values
+        self.dxdt, self.dydt = prepare_equations(flows[0].dxdt, flows[0].dydt)
+
+        self.block_steps = max(1, STACK_VALUES // (2 * len(flows)))
+        self.start = None
+        self.block = None
+
+    def evaluate(self, time):
+        idx, fraction = locate(self.t_values, time)
+        if self.start is None or not self.start <= idx < self.start + self.block_steps:
+            stop = min(idx + self.block_steps + 1, len(self.t_values))
+            self.start = idx
+            self.block = np.empty((stop - idx, len(self.flows), 2))
+            for column, flow in enumerate(self.flows):
+                self.block[:, column] = flow.trajectory[idx:stop]
+
+        ends = self.block[idx - self.start:idx - self.start + 2]
+        return dense_output(self.dxdt, self.dydt, self.t_values[idx], self.t_values[idx + 1], fraction,
+                            ends[0, :, 0], ends[0, :, 1], ends[1, :, 0], ends[1, :, 1])
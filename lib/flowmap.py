@@ -0,0 +1,119 @@
+"""
+Collection of functions that integrate large batches of initial points without creating Flow objects, for analyses
+that only need where the points end up (or short pieces of their trajectories) rather than whole trajectories to draw.
+Points are integrated in chunks and over segments of time, so the memory used is bounded by BATCH_VALUES regardless of
+the number of points and of the integration time.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+
+from .flow import BATCH_VALUES, prepare_equations
+from .parallel import TiledComputation, row_tiles
+from .profiler import profiler
+
+# Number of time-steps integrated per call of a numerical method.
+SEGMENT_STEPS = 256
+
+
+def batch_method(method_dict, method):
+    # Methods that do not support batch mode would integrate the points one at a time, so RK4 is used instead.
+    integrator = method_dict[method]
+    return integrator if getattr(integrator, "supports_batch", False) else method_dict["RK4"]
+
+
+def shifted(dxdt, dydt, t0):
+    # The numerical methods always start at t = 0, so later segments of a non-autonomous system are integrated with
+    # the equations shifted in time. Autonomous equations are passed through, which keeps their compiled kernels.
+    free_variables = getattr(dxdt, "free_variables", {"t"}) | getattr(dydt, "free_variables", {"t"})
+    if t0 == 0 or "t" not in free_variables:
+        return dxdt, dydt
+
+    return (lambda t, x, y: dxdt(t + t0, x, y)), (lambda t, x, y: dydt(t + t0, x, y))
+
+
+def segments(integrator, dxdt, dydt, x0, y0, steps, dt, segment_steps=SEGMENT_STEPS):
+    """
+    Integrates the 1D arrays of initial points x0, y0 over the given number of time-steps, and yields (t, x, y) per
+    segment of at most segment_steps steps, where x and y are (segment steps + 1, points) arrays whose first row is the
+    last row of the previous segment. The generator can be closed early, e.g. once every point has done what it was
+    integrated for.
+    """
+    x, y = x0, y0
+    done = 0
+    while done < steps:
+        n = min(segment_steps, steps - done)
+        f, g = shifted(dxdt, dydt, done * dt)
+        t, x_values, y_values = integrator(f, g, x, y, n * dt, dt)
+        yield done * dt + t[:n + 1], x_values[:n + 1], y_values[:n + 1]
+
+        x, y = x_values[n], y_values[n]
+        done += n
+
+
+@profiler.profiled("flow_map")
+def flow_map(integrator, dxdt, dydt, x0, y0, duration, dt):
+    """
+    Returns the points that the initial points x0, y0 (arrays of any shape) are mapped to after the given duration.
+    The time-step is reduced so that the duration is a whole number of steps. Points that blow up become nan or inf.
+    """
+    steps = max(1, int(np.ceil(duration / dt - 1E-9)))
+    dt = duration / steps
+
+    shape = np.shape(x0)
+    x = np.array(x0, dtype=np.float64).ravel()
+    y = np.array(y0, dtype=np.float64).ravel()
+    chunk = max(1, BATCH_VALUES // (min(steps, SEGMENT_STEPS) + 2))
+
+    with np.errstate(all="ignore"):
+        for start in range(0, len(x), chunk):
+            for _, x_values, y_values in segments(integrator, dxdt, dydt, x[start:start + chunk],
+                                                  y[start:start + chunk], steps, dt):
+                pass
+            x[start:start + chunk], y[start:start + chunk] = x_values[-1], y_values[-1]
+
+    return x.reshape(shape), y.reshape(shape)
+
+
+def flow_map_tile(integrator, dxdt, dydt, x0, y0, duration, dt):
+    # Runs in a worker process. Negative durations integrate backwards in time, with the time-reversed equations
+    # created here since closures cannot be sent to the workers.
+    dxdt, dydt = prepare_equations(dxdt, dydt)
+    if duration < 0:
+        f, g = dxdt, dydt
+        dxdt, dydt = (lambda t, x, y: -f(-t, x, y)), (lambda t, x, y: -g(-t, x, y))
+
+    return flow_map(integrator, dxdt, dydt, x0, y0, abs(duration), dt)
+
+
+class TiledMap(TiledComputation):
+    """
+    Base class of the raster maps computed from the flow map of every pixel center of the view, such as basins of
+    attraction. The rows of the raster are integrated in tiles in the process pool, and subclasses implement add_tile,
+    which receives the (x_end, y_end) end points of the rows of each tile as it is collected.
+    """
+    def __init__(self, xmin, xmax, ymin, ymax, columns, rows):
+        super().__init__(rows)
+        self.extent = (xmin, xmax, ymin, ymax)
+        self.columns = columns
+        self.rows = rows
+
+        # Initial points at the pixel centers.
+        self.x0 = xmin + (np.arange(columns) + 0.5) * (xmax - xmin) / columns
+        self.y0 = ymin + (np.arange(rows) + 0.5) * (ymax - ymin) / rows
+
+    def submit(self, integrator, dxdt, dydt, duration, dt):
+        x0, y0 = np.meshgrid(self.x0, self.y0)
+        self.submit_tiles(flow_map_tile, row_tiles(self.rows, self.columns),
+                          lambda tile: (integrator, dxdt, dydt, x0[tile], y0[tile], duration, dt))
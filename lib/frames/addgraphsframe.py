@@ -15,10 +15,10 @@ You should have received a copy of the GNU General Public License along with pla
 <https://www.gnu.org/licenses/>.
 """
 from tkinter import ttk, CENTER, messagebox
-import sympy as sp
 from matplotlib import colors
 
 from ..graph import Graph
+from ..expressions import Expression, evaluate_constant
 
 
 class AddGraphsFrame(ttk.Frame):
@@ -68,7 +68,6 @@ class AddGraphsFrame(ttk.Frame):
 
             # Verifying that the input is a valid explicit or implicit function equation. The equation entry should be
             # either of the form "<equation to graph>" or "<equation to graph>, <color>".
-            x, y = sp.symbols("x y")
             equation = equation_entry.get().split(",")
 
             if len(equation) <= 2:
@@ -77,7 +76,7 @@ class AddGraphsFrame(ttk.Frame):
                 else:
                     eqn_string = equation[0].split("=")[0] + "-" + equation[0].split("=")[1]
                     try:
-                        eqn = sp.lambdify((x, y), eqn_string, "numpy")
+                        eqn = Expression(eqn_string, ("x", "y"))
                         eqn(0, 0)
                     except ZeroDivisionError:
                         pass
@@ -106,12 +105,12 @@ class AddGraphsFrame(ttk.Frame):
                     if x_low_input in ("-inf", "inf"):
                         x_low = float(x_low_input)
                     else:
-                        x_low = float(sp.N(x_low_input))
+                        x_low = evaluate_constant(x_low_input)
 
                     if x_upp_input in ("-inf", "inf"):
                         x_upp = float(x_upp_input)
                     else:
-                        x_upp = float(sp.N(x_upp_input))
+                        x_upp = evaluate_constant(x_upp_input)
 
                     if x_upp <= x_low:
                         self.error_messages.append("Lower bound for x must be less than its upper bound.")
@@ -134,12 +133,12 @@ class AddGraphsFrame(ttk.Frame):
                     if y_low_input in ("-inf", "inf"):
                         y_low = float(y_low_input)
                     else:
-                        y_low = float(sp.N(y_low_input))
+                        y_low = evaluate_constant(y_low_input)
 
                     if y_upp_input in ("-inf", "inf"):
                         y_upp = float(y_upp_input)
                     else:
-                        y_upp = float(sp.N(y_upp_input))
+                        y_upp = evaluate_constant(y_upp_input)
 
                     if y_upp <= y_low:
                         self.error_messages.append("Lower bound for y must be less than its upper bound.")
@@ -151,7 +150,7 @@ class AddGraphsFrame(ttk.Frame):
             if self.error_messages:
                 messagebox.showerror("Error", "\n".join(self.error_messages))
             else:
-                top.graphs.append(Graph(eqn, x_low, x_upp, y_low, y_upp, color, top.graph_linewidth))
+                top.graphs.append(Graph(eqn, x_low, x_upp, y_low, y_upp, color, top.graph_linewidth, eqn_string))
                 top.graphs[-1].create_meshgrid(top.figure_settings.xmin, top.figure_settings.xmax,
                                                top.figure_settings.ymin, top.figure_settings.ymax)
                 top.graphs[-1].create_contours(top.fig, top.ax)
@@ -14,11 +14,16 @@ warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Gen
 You should have received a copy of the GNU General Public License along with planarFlow. If not, see
 <https://www.gnu.org/licenses/>.
 """
-from tkinter import ttk, CENTER, messagebox
+from tkinter import ttk, StringVar, CENTER, messagebox
 import numpy as np
-import sympy as sp
+from matplotlib.collections import LineCollection, PatchCollection
 
-from ..flow import Flow
+from ..flow import Flow, integrate_flows
+from ..density import add_to_density
+from ..pyramid import drawn_trajectory
+from ..profiler import profiler
+from ..expressions import evaluate_constant
+from ..seeds import REGION_GENERATORS, circle_seeds, curve_seeds, parse_curve, split_arguments
 
 
 class AddTrajectoriesFrame(ttk.Frame):
@@ -27,6 +32,13 @@ class AddTrajectoriesFrame(ttk.Frame):
 
         self.error_messages = []
 
+        # Initial points are either entered in x0 and y0, or generated: N points of a region, by default the view, or N
+        # points around a circle or along a curve.
+        self.seed_options = ("x0, y0", ) + tuple(REGION_GENERATORS) + ("circle", "curve")
+        self.seed_labels = {"circle": "x, y, r = ", "curve": "x(s), y(s) = "}
+        self.seed_selection = StringVar(value="x0, y0")
+        self.random_generator = np.random.default_rng()
+
         for i in range(4):
             self.columnconfigure(i, weight=1)
 
@@ -50,6 +62,57 @@ class AddTrajectoriesFrame(ttk.Frame):
         y0_entry = ttk.Entry(self, width=top.large_entry_width, font=top.widget_font)
         y0_entry.grid(row=2, column=1, columnspan=2, sticky="w")
 
+        # Function definition for relabeling the entries for the selected kind of initial points.
+        def select_seeds():
+            selection = self.seed_selection.get()
+            if selection == "x0, y0":
+                x0_label.config(text="x0 = ")
+                y0_label.config(text="y0 = ")
+            else:
+                x0_label.config(text="N = ")
+                y0_label.config(text=self.seed_labels.get(selection, "region = "))
+
+        seeds_spinbox = ttk.Spinbox(self, textvariable=self.seed_selection, state="readonly",
+                                    values=self.seed_options, width=top.small_entry_width, command=select_seeds)
+        seeds_spinbox.grid(row=1, column=3, sticky="w")
+
+        # Function definition for generating initial points. The region is entered as xmin, xmax, ymin, ymax, and
+        # left empty for the view.
+        def generate_seeds(selection):
+            try:
+                n = int(x0_entry.get())
+                if n < 1:
+                    raise ValueError
+            except ValueError:
+                self.error_messages.append("N must be a positive integer.")
+                return None
+
+            try:
+                if selection == "curve":
+                    return curve_seeds(n, *parse_curve(y0_entry.get()))
+
+                arguments = [evaluate_constant(argument) for argument in split_arguments(y0_entry.get())] \
+                    if y0_entry.get().strip() else []
+                if selection == "circle":
+                    if len(arguments) != 3 or arguments[2] <= 0:
+                        raise ValueError
+                    return circle_seeds(n, *arguments)
+
+                if not arguments:
+                    arguments = [top.figure_settings.xmin, top.figure_settings.xmax, top.figure_settings.ymin,
+                                 top.figure_settings.ymax]
+                elif len(arguments) != 4 or arguments[0] >= arguments[1] or arguments[2] >= arguments[3]:
+                    raise ValueError
+                return REGION_GENERATORS[selection](n, arguments, self.random_generator)
+            except (TypeError, ValueError):
+                if selection == "curve":
+                    self.error_messages.append("Invalid curve. This should be x(s), y(s) for 0 <= s <= 1.")
+                elif selection == "circle":
+                    self.error_messages.append("Invalid circle. This should be x, y, r.")
+                else:
+                    self.error_messages.append("Invalid region. This should be xmin, xmax, ymin, ymax.")
+                return None
+
         # function definition for add trajectory button.
         def add_trajectories():
             self.error_messages = []
@@ -57,7 +120,14 @@ class AddTrajectoriesFrame(ttk.Frame):
             x0 = None
             y0 = None
 
-            if top.differential_equations.is_configured and top.figure_settings.is_configured:
+            if top.differential_equations.is_configured and top.figure_settings.is_configured and \
+                    self.seed_selection.get() != "x0, y0":
+                seeds = generate_seeds(self.seed_selection.get())
+                if self.error_messages:
+                    messagebox.showerror("Error", "\n".join(self.error_messages))
+                else:
+                    add_flows(top, list(zip(*seeds)))
+            elif top.differential_equations.is_configured and top.figure_settings.is_configured:
                 # Checking if there is the correct number of arguments that are comma separated. If "rand" is entered,
                 # then a random array of 10 values within the x-/y-domain will be generated. If there is a single
                 # value entered for x0 and y0, then only one flow will be created with that initial condition. If either
@@ -69,14 +139,14 @@ class AddTrajectoriesFrame(ttk.Frame):
                     else:
                         if len(x0_entry.get().split(",")) == 1:
                             try:
-                                x0 = np.array([float(sp.N(x0_entry.get()))])
+                                x0 = np.array([evaluate_constant(x0_entry.get())])
                             except (TypeError, ValueError):
                                 self.error_messages.append("Invalid entry for x0.")
                         elif len(x0_entry.get().split(",")) == 3:
                             try:
-                                x_start = float(sp.N(x0_entry.get().split(",")[0]))
-                                x_end = float(sp.N(x0_entry.get().split(",")[1]))
-                                x_inc = float(sp.N(x0_entry.get().split(",")[2]))
+                                x_start = evaluate_constant(x0_entry.get().split(",")[0])
+                                x_end = evaluate_constant(x0_entry.get().split(",")[1])
+                                x_inc = evaluate_constant(x0_entry.get().split(",")[2])
                                 x0 = np.arange(x_start, x_end + x_inc, x_inc)
                             except (TypeError, ValueError, ZeroDivisionError):
                                 self.error_messages.append("Invalid entry for x0.")
@@ -89,14 +159,14 @@ class AddTrajectoriesFrame(ttk.Frame):
                     else:
                         if len(y0_entry.get().split(",")) == 1:
                             try:
-                                y0 = np.array([float(sp.N(y0_entry.get()))])
+                                y0 = np.array([evaluate_constant(y0_entry.get())])
                             except (TypeError, ValueError):
                                 self.error_messages.append("Invalid entry for y0.")
                         elif len(y0_entry.get().split(",")) == 3:
                             try:
-                                y_start = float(sp.N(y0_entry.get().split(",")[0]))
-                                y_end = float(sp.N(y0_entry.get().split(",")[1]))
-                                y_inc = float(sp.N(y0_entry.get().split(",")[2]))
+                                y_start = evaluate_constant(y0_entry.get().split(",")[0])
+                                y_end = evaluate_constant(y0_entry.get().split(",")[1])
+                                y_inc = evaluate_constant(y0_entry.get().split(",")[2])
                                 y0 = np.arange(y_start, y_end + y_inc, y_inc)
                             except (TypeError, ValueError, ZeroDivisionError):
                                 self.error_messages.append("Invalid entry for y0.")
@@ -110,6 +180,7 @@ class AddTrajectoriesFrame(ttk.Frame):
                 if self.error_messages:
                     messagebox.showerror("Error", "\n".join(self.error_messages))
                 elif not (x0 is None or y0 is None):
+                    seeds = []
                     for x in x0:
                         for y in y0:
                             # If both x0 and y0 entries are rand, then use a new random value for x and y in each
@@ -119,43 +190,104 @@ class AddTrajectoriesFrame(ttk.Frame):
                                 x = np.random.uniform(top.figure_settings.xmin, top.figure_settings.xmax)
                                 y = np.random.uniform(top.figure_settings.ymin, top.figure_settings.ymax)
 
-                            # Avoid repeated flow calculations and any initial points where the differential equations
-                            # are undefined.
-                            if not any((np.abs(x - flow.x0) < 1E-15) and (np.abs(y - flow.y0) < 1E-15)
-                                       for flow in top.flows):
-                                if not (np.isnan(top.differential_equations.dxdt(0, x, y)) or
-                                        np.isinf(top.differential_equations.dxdt(0, x, y)) or
-                                        np.isnan(top.differential_equations.dydt(0, x, y)) or
-                                        np.isinf(top.differential_equations.dydt(0, x, y))):
-
-                                    top.flows.append(Flow(x, y, top.differential_equations.dxdt,
-                                                          top.differential_equations.dydt,
-                                                          top.differential_equations.tmax,
-                                                          top.differential_equations.dt))
-                                    top.flows[-1].integrate(top.numerical_method, top.numerical_method_dict)
-                                    top.flows[-1].create_trajectory()
-                                    top.flows[-1].create_circle(top.flow_circle_diameter, top.figure_width,
-                                                                top.figure_height, top.figure_settings.xmin,
-                                                                top.figure_settings.xmax, top.figure_settings.ymin,
-                                                                top.figure_settings.ymax)
-                                    top.flows[-1].create_arrowhead(top.flow_arrowhead_size, top.figure_width,
-                                                                   top.figure_height, top.figure_settings.xmin,
-                                                                   top.figure_settings.xmax,
-                                                                   top.figure_settings.ymin,
-                                                                   top.figure_settings.ymax)
-
-                                    top.flow_trajectory_collection.lines.append(top.flows[-1].trajectory)
-                                    top.flow_circle_collection.patches.append(top.flows[-1].circle)
-                                    top.flow_arrowhead_collection.patches.append(top.flows[-1].arrowhead)
-
-                    top.collection_colors = [top.flow_color] * len(top.flows)
-                    top.flow_circle_collection.set_facecolors(top.collection_colors)
-                    top.flow_trajectory_collection.set_color(top.collection_colors)
-                    top.flow_arrowhead_collection.set_facecolors(top.collection_colors)
-
-                    top.fig.canvas.draw()
+                            seeds.append((x, y))
+
+                    add_flows(top, seeds)
 
         # add trajectories button
         add_trajectories_button = ttk.Button(self, width=top.small_button_width, style="Accent.TButton", text="Add",
                                              command=add_trajectories)
         add_trajectories_button.grid(row=2, column=3, sticky="w")
+
+
+# Creates a flow for each initial point (x0, y0) in seeds and adds it to the top window's flows, skipping initial points
+# that already have a flow and those where the differential equations are undefined. Returns the new flows.
+def create_flows(top, seeds):
+    new_flows = []
+    if not seeds:
+        return new_flows
+
+    # The equations are evaluated at every initial point at once.
+    x0, y0 = np.array(seeds, dtype=np.float64).T
+    with np.errstate(all="ignore"):
+        is_defined = (np.isfinite(top.differential_equations.dxdt(0., x0, y0)) &
+                      np.isfinite(top.differential_equations.dydt(0., x0, y0)))
+
+    for (x, y), defined in zip(seeds, np.broadcast_to(is_defined, x0.shape)):
+        # The initial points of the flows are kept in a set, so that checking for repeated flows does not scan them.
+        if (x, y) not in top.flow_seeds:
+            if defined:
+                top.flows.append(Flow(x, y, top.differential_equations.dxdt, top.differential_equations.dydt,
+                                      top.differential_equations.tmax, top.differential_equations.dt))
+                top.flow_seeds.add((x, y))
+                new_flows.append(top.flows[-1])
+
+    return new_flows
+
+
+def append_to_collections(top, flows):
+    for flow in flows:
+        flow.create_circle(top.flow_circle_diameter, top.figure_width, top.figure_height, top.figure_settings.xmin,
+                           top.figure_settings.xmax, top.figure_settings.ymin, top.figure_settings.ymax)
+        flow.create_arrowhead(top.flow_arrowhead_size, top.figure_width, top.figure_height,
+                              top.figure_settings.xmin, top.figure_settings.xmax, top.figure_settings.ymin,
+                              top.figure_settings.ymax)
+
+        top.flow_trajectory_collection.lines.append(drawn_trajectory(top, flow))
+        top.flow_circle_collection.patches.append(flow.circle)
+        top.flow_arrowhead_collection.patches.append(flow.arrowhead)
+
+    # Every flow has the same color, which the collections apply to all their members without converting a color per
+    # flow.
+    top.collection_colors = [top.flow_color] * len(top.flows)
+    top.flow_circle_collection.set_facecolors(top.flow_color)
+    top.flow_trajectory_collection.set_color(top.flow_color)
+    top.flow_arrowhead_collection.set_facecolors(top.flow_color)
+
+
+# Integrates a flow for each initial point (x0, y0) in seeds, adds it to the top window's collections, and redraws.
+def add_flows(top, seeds):
+    new_flows = create_flows(top, seeds)
+
+    # When the trajectories are drawn as a density, each batch is binned and drawn as soon as it is integrated.
+    def draw_batch(batch):
+        add_to_density(top, batch)
+        top.fig.canvas.draw()
+        top.fig.canvas.flush_events()
+
+    # The new flows are integrated together, in batch mode if the numerical method supports it.
+    integrate_flows(new_flows, top.numerical_method, top.numerical_method_dict, top.precision_dict[top.precision][0],
+                    top.trajectory_store, draw_batch if top.trajectory_rendering == "density" else None)
+
+    append_to_collections(top, new_flows)
+    top.fig.canvas.draw()
+
+
+# Adds a single flow from a shift-click on the plot. Only the new flow is drawn, over what the canvas shows, and copied
+# to the screen, instead of redrawing every flow. The flow is drawn in its place among the others with the next full
+# draw, e.g. when the mouse moves.
+@profiler.profiled("seed_flow")
+def seed_flow(top, x, y):
+    new_flows = create_flows(top, [(x, y)])
+    if not new_flows:
+        return
+
+    integrate_flows(new_flows, top.numerical_method, top.numerical_method_dict, top.precision_dict[top.precision][0],
+                    top.trajectory_store)
+    append_to_collections(top, new_flows)
+
+    if top.trajectory_rendering == "density":
+        add_to_density(top, new_flows)
+        top.fig.canvas.draw_idle()
+        return
+
+    flow = new_flows[0]
+    artists = (LineCollection([drawn_trajectory(top, flow)], linewidths=top.flow_linewidth, colors=top.flow_color,
+                              zorder=-3),
+               PatchCollection([flow.arrowhead, flow.circle], facecolors=top.flow_color, zorder=-1))
+    for artist in artists:
+        top.ax.add_collection(artist, autolim=False)
+        top.ax.draw_artist(artist)
+        artist.remove()
+
+    top.fig.canvas.blit(top.ax.bbox)
@@ -0,0 +1,37 @@
+"""
+BasinsFrame class file. The frame computes a basin-of-attraction map over the current view, which is shown as an
+image layer underneath the graphs and trajectories of the top window's figure and filled in as its tiles are done.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+from .tiledmapframe import TiledMapFrame
+from ..basins import BasinMap
+
+
+class BasinsFrame(TiledMapFrame):
+    map_class = BasinMap
+    map_attribute = "basin_map"
+    image_attribute = "basin_image"
+    description = "the basins"
+
+    def create_image(self, basin_map):
+        return self.top.ax.imshow(basin_map.rgba(), extent=basin_map.extent, origin="lower", aspect="auto",
+                                  interpolation="nearest", zorder=-5)
+
+    def show(self, basin_map):
+        basin_map.classify()
+        self.top.basin_image.set_data(basin_map.rgba())
+
+    def status(self, basin_map):
+        return "{} attractor{}".format(basin_map.attractor_count, "" if basin_map.attractor_count == 1 else "s")
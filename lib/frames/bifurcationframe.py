@@ -0,0 +1,248 @@
+"""
+BifurcationFrame class file. The frame sweeps one or two parameters of the differential equations over a range of
+values, finding the equilibria and attractors at each value in the process pool. One parameter gives a bifurcation
+diagram of the equilibria and of the extent of the limit cycles against the parameter, and two parameters give a map of
+the regimes, i.e. of the number of each kind of attractor. Both are filled in as the values are done.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+from tkinter import ttk, StringVar, messagebox
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.colors import ListedColormap
+from matplotlib.patches import Patch
+
+from ..configureplot import set_plot_window_style
+from ..expressions import evaluate_constant
+from ..flowmap import batch_method
+from ..bifurcation import BifurcationSweep, STABLE, SADDLE, UNSTABLE
+from ..basins import BASIN_COLORS
+from ..profiler import profiler
+
+
+class BifurcationFrame(ttk.Frame):
+    def __init__(self, bifurcation_window, top):
+        super().__init__(bifurcation_window)
+
+        self.error_messages = []
+        self.poll_interval = 100  # Interval at which finished values are added to the diagram, in milliseconds.
+        self.sweep = None
+
+        names = tuple(top.differential_equations.parameters)
+        self.first_selection = StringVar(value=names[0] if names else "")
+        self.second_selection = StringVar(value="none")
+        self.coordinate_selection = StringVar(value="x")
+
+        for i in range(9):
+            self.columnconfigure(i, weight=1)
+
+        self.rowconfigure(4, weight=1)
+
+        # swept parameters, each with the range of its values and the number of values
+        entries = []
+        for row, (text, selection, options, values) in enumerate((("Parameter:", self.first_selection, names, "100"),
+                                                                  ("Second:", self.second_selection,
+                                                                   ("none",) + names, "20"))):
+            ttk.Label(self, text=text, font=top.widget_font).grid(row=row, column=0, sticky="e")
+            ttk.Spinbox(self, textvariable=selection, state="readonly", values=options,
+                        width=top.small_entry_width).grid(row=row, column=1, sticky="w")
+
+            row_entries = []
+            for column, (label, default) in enumerate((("From:", "0"), ("To:", "2"), ("Values:", values))):
+                ttk.Label(self, text=label, font=top.widget_font).grid(row=row, column=2 + 2 * column, sticky="e")
+                entry = ttk.Entry(self, width=top.small_entry_width, font=top.widget_font)
+                entry.insert(0, default)
+                entry.grid(row=row, column=3 + 2 * column, sticky="w")
+                row_entries.append(entry)
+
+            entries.append(row_entries)
+
+        # number of seeds along each axis of the view, and the transient and sample times of the seeds
+        settings_entries = []
+        for column, (label, default) in enumerate((("Seeds:", "8"), ("Transient:", "50"), ("Sample:", "20"))):
+            ttk.Label(self, text=label, font=top.widget_font).grid(row=2, column=2 * column, sticky="e")
+            entry = ttk.Entry(self, width=top.small_entry_width, font=top.widget_font)
+            entry.insert(0, default)
+            entry.grid(row=2, column=2 * column + 1, sticky="w")
+            settings_entries.append(entry)
+
+        seeds_entry, transient_entry, sample_entry = settings_entries
+
+        # coordinate shown by the one-parameter diagram
+        coordinate_label = ttk.Label(self, text="Coordinate:", font=top.widget_font)
+        coordinate_label.grid(row=0, column=8, sticky="w")
+        coordinate_spinbox = ttk.Spinbox(self, textvariable=self.coordinate_selection, state="readonly",
+                                         values=("x", "y"), width=top.small_entry_width)
+        coordinate_spinbox.grid(row=1, column=8, sticky="w")
+
+        progress_bar = ttk.Progressbar(self, mode="determinate")
+        progress_bar.grid(row=3, column=0, columnspan=7, sticky="ew")
+        status_label = ttk.Label(self, text="", font=top.widget_font)
+        status_label.grid(row=3, column=7, columnspan=2)
+
+        self.fig = Figure()
+        ax = self.fig.add_subplot(111)
+
+        self.canvas = FigureCanvasTkAgg(self.fig, self)
+        profiler.instrument_canvas(self.canvas, "bifurcation_canvas.draw")
+        self.canvas.get_tk_widget().grid(row=4, column=0, columnspan=9, sticky="nsew")
+
+        # Equilibria are drawn as filled markers if stable and hollow ones otherwise, and limit cycles by the minimum
+        # and maximum of the coordinate over the cycle.
+        def draw_diagram(sweep):
+            if len(sweep.names) == 1:
+                values = sweep.diagram(0 if self.coordinate_selection.get() == "x" else 1)
+                for line, kind in zip(ax.lines, (STABLE, SADDLE, UNSTABLE, "cycles")):
+                    line.set_data(*values[kind])
+            else:
+                ax.images[0].set_data(sweep.regime_map() % len(BASIN_COLORS))
+                ax.legend(handles=[Patch(color=BASIN_COLORS[idx % len(BASIN_COLORS)], label=label)
+                                   for idx, label in enumerate(sweep.regimes)], fontsize=top.time_series_fontsize,
+                          loc="upper right")
+
+            self.canvas.draw_idle()
+
+        def start_diagram(sweep):
+            ax.clear()
+            first = sweep.values[0]
+            if len(sweep.names) == 1:
+                coordinate = self.coordinate_selection.get()
+                ax.plot([], [], linestyle="none", marker="o", markersize=3, color=top.flow_color,
+                        label="stable equilibria")
+                ax.plot([], [], linestyle="none", marker="x", markersize=3, color=top.flow_color, label="saddles")
+                ax.plot([], [], linestyle="none", marker="o", markersize=3, markerfacecolor="none",
+                        color=top.flow_color, label="unstable equilibria")
+                ax.plot([], [], linestyle="none", marker="o", markersize=2, color=top.flow_highlight_color,
+                        label="limit cycles (min/max)")
+                ax.set_xlim(first[0], first[-1])
+                if coordinate == "x":
+                    ax.set_ylim(top.figure_settings.xmin, top.figure_settings.xmax)
+                else:
+                    ax.set_ylim(top.figure_settings.ymin, top.figure_settings.ymax)
+                ax.set_ylabel(coordinate, fontsize=top.time_series_fontsize)
+                ax.legend(fontsize=top.time_series_fontsize, loc="upper right")
+            else:
+                second = sweep.values[1]
+                ax.imshow(np.full((len(second), len(first)), np.nan), extent=(first[0], first[-1], second[0],
+                                                                                 second[-1]),
+                          origin="lower", aspect="auto", interpolation="nearest", vmin=-0.5,
+                          vmax=len(BASIN_COLORS) - 0.5, cmap=ListedColormap(BASIN_COLORS))
+                ax.set_ylabel(sweep.names[1], fontsize=top.time_series_fontsize)
+
+            ax.set_xlabel(sweep.names[0], fontsize=top.time_series_fontsize)
+            set_plot_window_style(self.fig, (ax, ), top.figure_background_color, top.figure_axes_color,
+                                  top.time_series_fontsize, top.figure_settings.show_grid.get(), top.figure_grid_style,
+                                  top.figure_grid_alpha)
+
+        # Adds the values that are done to the diagram. Polling stops when the window is closed, and the rest of the
+        # sweep is cancelled.
+        def poll(sweep):
+            if sweep is not self.sweep:
+                return  # The sweep was replaced.
+
+            if not self.winfo_exists():
+                sweep.cancel()
+                return
+
+            added, error = sweep.collect()
+            if error is not None:
+                self.sweep = None
+                messagebox.showerror("Error", "Computing the bifurcation diagram failed:\n{}".format(error))
+                return
+
+            if added:
+                draw_diagram(sweep)
+
+            progress_bar.config(value=100 * sweep.done / len(sweep.points))
+            status_label.config(text="done" if sweep.is_complete() else "")
+            if not sweep.is_complete():
+                top.after(self.poll_interval, poll, sweep)
+
+        def compute_sweep():
+            self.error_messages = []
+            ranges = []
+            settings = []
+
+            if not top.differential_equations.is_configured:
+                messagebox.showerror("Error", "The differential equations must be set to compute a bifurcation "
+                                              "diagram.")
+                return
+
+            if not top.differential_equations.parameters:
+                messagebox.showerror("Error", "The differential equations have no parameters.")
+                return
+
+            swept = [self.first_selection.get()]
+            if self.second_selection.get() != "none":
+                swept.append(self.second_selection.get())
+                if swept[0] == swept[1]:
+                    self.error_messages.append("The two swept parameters must be different.")
+
+            for name, (from_entry, to_entry, count_entry) in zip(swept, entries):
+                try:
+                    low, high = evaluate_constant(from_entry.get()), evaluate_constant(to_entry.get())
+                    count = int(count_entry.get())
+                    if count < 2 or low == high:
+                        raise ValueError
+                    ranges.append(np.linspace(low, high, count))
+                except (TypeError, ValueError):
+                    self.error_messages.append("Invalid range for {}.".format(name))
+
+            try:
+                seeds = int(seeds_entry.get())
+                if seeds < 1:
+                    self.error_messages.append("The number of seeds must be at least 1.")
+            except ValueError:
+                self.error_messages.append("Invalid input for seeds.")
+
+            for text, entry in (("transient", transient_entry), ("sample", sample_entry)):
+                try:
+                    settings.append(evaluate_constant(entry.get()))
+                    if settings[-1] <= 0:
+                        self.error_messages.append("The {} time must be positive.".format(text))
+                except (TypeError, ValueError):
+                    self.error_messages.append("Invalid input for {} time.".format(text))
+
+            if self.error_messages:
+                messagebox.showerror("Error", "\n".join(self.error_messages))
+                return
+
+            if self.sweep is not None:
+                self.sweep.cancel()
+
+            # The seeds are the centers of a grid over the view.
+            extent = (top.figure_settings.xmin, top.figure_settings.xmax, top.figure_settings.ymin,
+                      top.figure_settings.ymax)
+            x0, y0 = np.meshgrid(extent[0] + (np.arange(seeds) + 0.5) * (extent[1] - extent[0]) / seeds,
+                                 extent[2] + (np.arange(seeds) + 0.5) * (extent[3] - extent[2]) / seeds)
+
+            self.sweep = BifurcationSweep(swept, ranges)
+            self.sweep.submit(batch_method(top.numerical_method_dict, top.numerical_method),
+                              top.differential_equations.dxdt, top.differential_equations.dydt, x0.ravel(),
+                              y0.ravel(), settings[0], settings[1], top.differential_equations.dt, extent)
+            start_diagram(self.sweep)
+            poll(self.sweep)
+
+        compute_button = ttk.Button(self, width=top.small_button_width, style="Accent.TButton", text="Plot",
+                                    command=compute_sweep)
+        compute_button.grid(row=2, column=8, sticky="w")
+
+        # Changing the coordinate only redraws the diagram of the current sweep.
+        def change_coordinate():
+            if self.sweep is not None and len(self.sweep.names) == 1:
+                start_diagram(self.sweep)
+                draw_diagram(self.sweep)
+
+        coordinate_spinbox.config(command=change_coordinate)
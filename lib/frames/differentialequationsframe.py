@@ -15,7 +15,10 @@ You should have received a copy of the GNU General Public License along with pla
 <https://www.gnu.org/licenses/>.
 """
 from tkinter import ttk, messagebox
-import sympy as sp
+
+from ..expressions import Expression, evaluate_constant, find_parameters
+from ..density import reset_density
+from ..parameters import PARAMETER_DEFAULT, clear_analysis, clear_parameter_cache
 
 
 class DifferentialEquationsFrame(ttk.Frame):
@@ -26,6 +29,12 @@ class DifferentialEquationsFrame(ttk.Frame):
         self.dydt = None
         self.tmax = None
         self.dt = None
+        self.equation_strings = None  # Entries of the last valid set of equations, used when saving sessions.
+
+        # Values and slider ranges of the parameters of the equations, by name. Values are kept when the equations are
+        # set again with the same parameter.
+        self.parameters = {}
+        self.parameter_ranges = {}
 
         self.error_messages = []
         self.is_configured = False
@@ -66,11 +75,13 @@ class DifferentialEquationsFrame(ttk.Frame):
             self.error_messages = []
             self.is_configured = False
 
-            t, x, y = sp.symbols("t x y")
+            # Any other name than t, x and y, the constants and the functions is a parameter.
+            names = find_parameters((dxdt_entry.get(), dydt_entry.get()), ("t", "x", "y"))
+            parameters = {name: self.parameters.get(name, PARAMETER_DEFAULT[0]) for name in names}
 
             if dxdt_entry.get().strip():
                 try:
-                    self.dxdt = sp.lambdify((t, x, y), dxdt_entry.get(), "numpy")
+                    self.dxdt = Expression(dxdt_entry.get(), ("t", "x", "y"), parameters)
                     self.dxdt(0., 0., 0.)  # test with values set to zero to catch errors
                 except ZeroDivisionError:
                     pass
@@ -81,7 +92,7 @@ class DifferentialEquationsFrame(ttk.Frame):
 
             if dydt_entry.get().strip():
                 try:
-                    self.dydt = sp.lambdify((t, x, y), dydt_entry.get(), "numpy")
+                    self.dydt = Expression(dydt_entry.get(), ("t", "x", "y"), parameters)
                     self.dydt(0., 0., 0.)
                 except ZeroDivisionError:
                     pass
@@ -92,7 +103,7 @@ class DifferentialEquationsFrame(ttk.Frame):
 
             if tmax_entry.get().strip():
                 try:
-                    self.tmax = float(sp.N(tmax_entry.get()))
+                    self.tmax = evaluate_constant(tmax_entry.get())
                 except (TypeError, ValueError):
                     self.error_messages.append("Invalid input for tmax.")
                 else:
@@ -103,7 +114,7 @@ class DifferentialEquationsFrame(ttk.Frame):
 
             if dt_entry.get().strip():
                 try:
-                    self.dt = float(sp.N(dt_entry.get()))
+                    self.dt = evaluate_constant(dt_entry.get())
                 except (TypeError, ValueError):
                     self.error_messages.append("Invalid input for dt.")
                 else:
@@ -129,12 +140,46 @@ class DifferentialEquationsFrame(ttk.Frame):
                 for graph in top.graphs:
                     graph.delete_contours()
 
+                clear_analysis(top)
                 top.flows.clear()
+                top.flow_seeds.clear()
                 top.graphs.clear()
+                clear_parameter_cache()
+                top.trajectory_store.clear()
+                reset_density(top)
 
                 top.fig.canvas.draw()
+                self.equation_strings = {"dxdt": dxdt_entry.get(), "dydt": dydt_entry.get(),
+                                         "tmax": tmax_entry.get(), "dt": dt_entry.get()}
+                self.parameters = parameters
+                self.parameter_ranges = {name: self.parameter_ranges.get(name, PARAMETER_DEFAULT[1:]) for name in names}
                 self.is_configured = True
 
+                from .parametersframe import show_parameters_window
+                show_parameters_window(top)
+
+        # Function definition for setting the equations from a loaded session. Parameters are given by name as
+        # [value, low, high], and are set before any flow is added.
+        def load_equations(dxdt, dydt, tmax, dt, parameters=None):
+            for entry, value in ((dxdt_entry, dxdt), (dydt_entry, dydt), (tmax_entry, tmax), (dt_entry, dt)):
+                entry.delete(0, "end")
+                entry.insert(0, value)
+
+            if parameters:
+                self.parameters.update({name: value for name, (value, _, _) in parameters.items()})
+                self.parameter_ranges.update({name: (low, high) for name, (_, low, high) in parameters.items()})
+
+            set_equations()
+            return self.is_configured
+
+        # Parameters of the equations as saved in sessions.
+        def parameter_settings():
+            return {name: [value, *self.parameter_ranges[name]] for name, value in self.parameters.items()}
+
+        self.parameter_settings = parameter_settings
+
+        self.load_equations = load_equations
+
         # set equations button
         set_differential_equations_button = ttk.Button(self, width=top.small_button_width, style="Accent.TButton",
                                                        text="Set", command=set_equations)
@@ -15,9 +15,10 @@ You should have received a copy of the GNU General Public License along with pla
 <https://www.gnu.org/licenses/>.
 """
 from tkinter import ttk, IntVar, CENTER, messagebox
-import sympy as sp
 
-from ..configureplot import set_figure_axes, set_figure_ticks, set_figure_ticklabels, set_figure_grid
+from ..navigation import set_view_limits, update_view
+from ..session import SessionError
+from ..expressions import evaluate_constant
 
 
 class FigureSettingsFrame(ttk.Frame):
@@ -115,7 +116,7 @@ class FigureSettingsFrame(ttk.Frame):
             # Checking for errors in xmix/xmax/ymin/ymax.
             if xmin_entry.get().strip():
                 try:
-                    self.xmin = float(sp.N(xmin_entry.get()))
+                    self.xmin = evaluate_constant(xmin_entry.get())
                 except (TypeError, ValueError):
                     self.error_messages.append("Invalid input for xmin.")
             else:
@@ -123,7 +124,7 @@ class FigureSettingsFrame(ttk.Frame):
 
             if xmax_entry.get().strip():
                 try:
-                    self.xmax = float(sp.N(xmax_entry.get()))
+                    self.xmax = evaluate_constant(xmax_entry.get())
                 except (TypeError, ValueError):
                     self.error_messages.append("Invalid input for xmax.")
             else:
@@ -135,7 +136,7 @@ class FigureSettingsFrame(ttk.Frame):
 
             if ymin_entry.get().strip():
                 try:
-                    self.ymin = float(sp.N(ymin_entry.get()))
+                    self.ymin = evaluate_constant(ymin_entry.get())
                 except (TypeError, ValueError):
                     self.error_messages.append("Invalid input for ymin.")
             else:
@@ -143,7 +144,7 @@ class FigureSettingsFrame(ttk.Frame):
 
             if ymax_entry.get().strip():
                 try:
-                    self.ymax = float(sp.N(ymax_entry.get()))
+                    self.ymax = evaluate_constant(ymax_entry.get())
                 except (TypeError, ValueError):
                     self.error_messages.append("Invalid input for ymax.")
             else:
@@ -164,7 +165,7 @@ class FigureSettingsFrame(ttk.Frame):
             # Checking for errors in xtick/ytick_spacing.
             if xtick_spacing_entry.get().strip():
                 try:
-                    self.xtick_spacing = float(sp.N(xtick_spacing_entry.get()))
+                    self.xtick_spacing = evaluate_constant(xtick_spacing_entry.get())
                 except (TypeError, ValueError):
                     self.error_messages.append("Invalid input for x-tick spacing.")
                 else:
@@ -175,7 +176,7 @@ class FigureSettingsFrame(ttk.Frame):
 
             if ytick_spacing_entry.get().strip():
                 try:
-                    self.ytick_spacing = float(sp.N(ytick_spacing_entry.get()))
+                    self.ytick_spacing = evaluate_constant(ytick_spacing_entry.get())
                 except (TypeError, ValueError):
                     self.error_messages.append("Invalid  input for y-tick spacing.")
                 else:
@@ -210,32 +211,40 @@ class FigureSettingsFrame(ttk.Frame):
                         else:
                             self.xmax = self.xmin + top.figure_width / pixels_per_unit
 
-                set_figure_axes(top.fig, top.ax, self.xmin, self.xmax, self.ymin, self.ymax,
-                                top.figure_axes_color)
+                set_view_limits(top, self.xmin, self.xmax, self.ymin, self.ymax)
+                try:
+                    update_view(top)
+                except SessionError as error:
+                    messagebox.showerror("Error", "The flows in view could not be loaded:\n{}".format(error))
+
+                top.fig.canvas.draw()
+                self.is_configured = True
 
-                set_figure_ticks(top.fig, top.ax, self.xtick_spacing, self.xmin, self.xmax,
-                                 self.ytick_spacing, self.ymin, self.ymax)
+        # Function definition for configuring the plot from a loaded session. Tick spacings of zero are left empty.
+        def load_settings(xmin, xmax, ymin, ymax, xtick_spacing, ytick_spacing, show_x_ticklabels, show_y_ticklabels,
+                          show_grid):
+            for entry, value in ((xmin_entry, str(xmin)), (xmax_entry, str(xmax)), (ymin_entry, str(ymin)),
+                                 (ymax_entry, str(ymax)), (xtick_spacing_entry, str(xtick_spacing or "")),
+                                 (ytick_spacing_entry, str(ytick_spacing or ""))):
+                entry.delete(0, "end")
+                entry.insert(0, value)
 
-                set_figure_ticklabels(top.fig, top.ax, self.show_x_ticklabels.get(), self.xmin,
-                                      self.xmax, self.show_y_ticklabels.get(), self.ymin, self.ymax)
+            self.show_x_ticklabels.set(show_x_ticklabels)
+            self.show_y_ticklabels.set(show_y_ticklabels)
+            self.show_grid.set(show_grid)
 
-                set_figure_grid(top.fig, top.ax, self.show_grid.get(), self.xtick_spacing,
-                                self.ytick_spacing)
+            configure_plot()
 
-                # If there are already trajectories plotted, update the circle and arrowhead for each flow so the
-                # appearance is maintained.
-                for flow in top.flows:
-                    flow.update_circle_diameter(top.flow_circle_diameter, top.figure_width, top.figure_height,
-                                                self.xmin, self.xmax, self.ymin, self.ymax)
-                    flow.update_arrowhead_points(top.flow_arrowhead_size, top.figure_width, top.figure_height,
-                                                 self.xmin, self.xmax, self.ymin, self.ymax)
+        self.load_settings = load_settings
 
-                # If there are already graphs plotted, update the X-/Y-meshgrids and the contours plotted.
-                for graph in top.graphs:
-                    graph.update_contours(top.fig, top.ax, self.xmin, self.xmax, self.ymin, self.ymax)
+        # Function definition for showing the limits of a view zoomed or panned with the mouse in the entries.
+        def show_limits():
+            for entry, value in ((xmin_entry, self.xmin), (xmax_entry, self.xmax), (ymin_entry, self.ymin),
+                                 (ymax_entry, self.ymax)):
+                entry.delete(0, "end")
+                entry.insert(0, "{:.6g}".format(value))
 
-                top.fig.canvas.draw()
-                self.is_configured = True
+        self.show_limits = show_limits
 
         # configure plot
         configure_plot_button = ttk.Button(self, style="Accent.TButton", width=top.large_button_width,
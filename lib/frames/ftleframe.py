@@ -0,0 +1,71 @@
+"""
+FTLEFrame class file. The frame computes the finite-time Lyapunov exponent field over the current view, which is shown
+as a colormapped background layer of the top window's figure and filled in as its tiles are done.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+
+from .tiledmapframe import TiledMapFrame
+from ..ftle import FTLEField, cache_key, cached_field, cache_field
+
+
+class FTLEFrame(TiledMapFrame):
+    map_class = FTLEField
+    map_attribute = "ftle_field"
+    image_attribute = "ftle_image"
+    description = "the FTLE field"
+    time_name = "T"  # negative for the backward-time field
+    default_time = "5"
+
+    def __init__(self, ftle_window, top):
+        super().__init__(ftle_window, top)
+
+        self.colormap = "inferno"
+        self.key = None  # Cache key of the field being computed.
+
+    def create_map(self, extent, resolution, rows, duration):
+        return FTLEField(*extent, resolution, rows, duration)
+
+    def create_image(self, ftle_field):
+        return self.top.ax.imshow(np.full((ftle_field.rows, ftle_field.columns), np.nan), extent=ftle_field.extent,
+                                  origin="lower", aspect="auto", interpolation="nearest", cmap=self.colormap, zorder=-6)
+
+    def show_field(self, field):
+        # The color limits leave out the extreme values, so that the ridges stand out.
+        self.top.ftle_image.set_data(field)
+        if np.isfinite(field).any():
+            self.top.ftle_image.set_clim(*np.nanpercentile(field, (1, 99.5)))
+
+    def show(self, ftle_field):
+        self.show_field(ftle_field.field())
+
+    def status(self, ftle_field):
+        return "done" if ftle_field.is_complete() else ""
+
+    def restore(self, ftle_field, integrator):
+        equations = self.top.differential_equations
+        self.key = cache_key(equations.dxdt, equations.dydt, integrator.__name__, equations.dt, ftle_field.duration,
+                             ftle_field.extent, ftle_field.columns, ftle_field.rows)
+        field = cached_field(self.key)
+        if field is not None:
+            self.show_field(field)
+
+        return field is not None
+
+    def completed(self, ftle_field):
+        cache_field(self.key, ftle_field.field())
+
+    def check_duration(self, duration):
+        return "T must not be zero." if duration == 0 else None
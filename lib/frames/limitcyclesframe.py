@@ -0,0 +1,143 @@
+"""
+LimitCyclesFrame class file. The frame searches for limit cycles from a grid of seeds over the current view, lists
+them with their periods and Floquet multipliers, and highlights them on the top window's figure.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+from tkinter import ttk, messagebox
+import numpy as np
+
+from ..expressions import evaluate_constant
+from ..flow import prepare_equations
+from ..flowmap import batch_method
+from ..limitcycles import find_limit_cycles
+
+
+class LimitCyclesFrame(ttk.Frame):
+    def __init__(self, limit_cycles_window, top):
+        super().__init__(limit_cycles_window)
+
+        self.error_messages = []
+
+        for i in range(8):
+            self.columnconfigure(i, weight=1)
+
+        self.rowconfigure(1, weight=1)
+
+        # number of seeds along each axis
+        seeds_label = ttk.Label(self, text="Seeds:", font=top.widget_font)
+        seeds_label.grid(row=0, column=0, sticky="e")
+        seeds_entry = ttk.Entry(self, width=top.small_entry_width, font=top.widget_font)
+        seeds_entry.insert(0, "10")
+        seeds_entry.grid(row=0, column=1, sticky="w")
+
+        # transient time
+        transient_label = ttk.Label(self, text="Transient:", font=top.widget_font)
+        transient_label.grid(row=0, column=2, sticky="e")
+        transient_entry = ttk.Entry(self, width=top.small_entry_width, font=top.widget_font)
+        transient_entry.insert(0, "50")
+        transient_entry.grid(row=0, column=3, sticky="w")
+
+        # maximum period
+        max_period_label = ttk.Label(self, text="Max period:", font=top.widget_font)
+        max_period_label.grid(row=0, column=4, sticky="e")
+        max_period_entry = ttk.Entry(self, width=top.small_entry_width, font=top.widget_font)
+        max_period_entry.insert(0, "50")
+        max_period_entry.grid(row=0, column=5, sticky="w")
+
+        cycles_table = ttk.Treeview(self, columns=("x0", "y0", "period", "multiplier", "stability"), show="headings")
+        for column, heading in (("x0", "x0"), ("y0", "y0"), ("period", "Period"), ("multiplier", "Multiplier"),
+                                ("stability", "Stability")):
+            cycles_table.heading(column, text=heading)
+            cycles_table.column(column, anchor="center", width=top.widget_font.measure("0" * 12))
+        cycles_table.grid(row=1, column=0, columnspan=8, sticky="nsew")
+
+        def clear_limit_cycles():
+            for cycle in top.limit_cycles:
+                cycle.delete_line()
+
+            top.limit_cycles.clear()
+            cycles_table.delete(*cycles_table.get_children())
+            top.fig.canvas.draw()
+
+        # Function definition for the find button. The seeds form a grid over the current view, and the integration
+        # uses the time-step of the differential equations.
+        def find_cycles():
+            self.error_messages = []
+            seeds = None
+            transient = None
+            max_period = None
+
+            if not top.differential_equations.is_configured:
+                messagebox.showerror("Error", "The differential equations must be set to find limit cycles.")
+                return
+
+            if "t" in (top.differential_equations.dxdt.free_variables | top.differential_equations.dydt.free_variables):
+                messagebox.showerror("Error", "Limit cycles can only be found for autonomous equations.")
+                return
+
+            try:
+                seeds = int(seeds_entry.get())
+                if seeds < 1:
+                    self.error_messages.append("The number of seeds must be positive.")
+            except ValueError:
+                self.error_messages.append("Invalid input for the number of seeds.")
+
+            try:
+                transient = evaluate_constant(transient_entry.get())
+                if transient < 0:
+                    self.error_messages.append("The transient time must not be negative.")
+            except (TypeError, ValueError):
+                self.error_messages.append("Invalid input for the transient time.")
+
+            try:
+                max_period = evaluate_constant(max_period_entry.get())
+                if max_period <= 0:
+                    self.error_messages.append("The maximum period must be positive.")
+            except (TypeError, ValueError):
+                self.error_messages.append("Invalid input for the maximum period.")
+
+            if self.error_messages:
+                messagebox.showerror("Error", "\n".join(self.error_messages))
+                return
+
+            clear_limit_cycles()
+
+            xmin, xmax = top.figure_settings.xmin, top.figure_settings.xmax
+            ymin, ymax = top.figure_settings.ymin, top.figure_settings.ymax
+            x0, y0 = np.meshgrid(np.linspace(xmin, xmax, seeds + 2)[1:-1], np.linspace(ymin, ymax, seeds + 2)[1:-1])
+
+            dxdt, dydt = prepare_equations(top.differential_equations.dxdt, top.differential_equations.dydt)
+            top.limit_cycles.extend(find_limit_cycles(batch_method(top.numerical_method_dict, top.numerical_method),
+                                                      dxdt, dydt, x0.ravel(), y0.ravel(), top.differential_equations.dt,
+                                                      transient, max_period, max(xmax - xmin, ymax - ymin)))
+
+            for cycle in top.limit_cycles:
+                cycle.create_line(top.ax, top.flow_highlight_color, top.flow_linewidth + 1)
+                cycles_table.insert("", "end", values=("{:+.4f}".format(cycle.x0), "{:+.4f}".format(cycle.y0),
+                                                       "{:.6g}".format(cycle.period),
+                                                       "{:.4g}".format(cycle.multiplier),
+                                                       "stable" if cycle.is_stable else "unstable"))
+
+            if not top.limit_cycles:
+                messagebox.showinfo("Limit cycles", "No limit cycles were found.")
+
+            top.fig.canvas.draw()
+
+        find_button = ttk.Button(self, width=top.small_button_width, style="Accent.TButton", text="Find",
+                                 command=find_cycles)
+        find_button.grid(row=0, column=6)
+
+        clear_button = ttk.Button(self, width=top.small_button_width, text="Clear", command=clear_limit_cycles)
+        clear_button.grid(row=0, column=7)
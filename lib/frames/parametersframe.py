@@ -0,0 +1,155 @@
+"""
+ParametersFrame class file. The frame has a slider for each parameter of the differential equations, with entries for
+its value and range. Moving a slider re-integrates every flow with the new value. Slider events are coalesced: the
+first one schedules an update, and the update uses whatever values the sliders have when it runs, so that the flows
+follow the sliders as fast as they can be integrated instead of falling behind.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import os
+from tkinter import ttk, messagebox, Toplevel, TOP, BOTH
+
+from ..expressions import evaluate_constant
+from ..parameters import set_parameter_values
+from ..app_setters import set_icon
+
+
+class ParametersFrame(ttk.Frame):
+    def __init__(self, parameters_window, top):
+        super().__init__(parameters_window)
+
+        self.error_messages = []
+        self.update_interval = 30  # Delay between a slider being moved and the flows being updated, in milliseconds.
+        self.pending_update = None
+
+        equations = top.differential_equations
+        values = dict(equations.parameters)
+        rows = {}
+
+        for i in range(5):
+            self.columnconfigure(i, weight=1)
+
+        for i, text in enumerate(("Parameter", "", "Value", "Min", "Max")):
+            ttk.Label(self, text=text, font=top.widget_font).grid(row=0, column=i)
+
+        # The values are dropped if the equations were set again, with other parameters, before the update ran.
+        def update_parameters():
+            self.pending_update = None
+            if equations.parameters.keys() == values.keys() and values != equations.parameters:
+                set_parameter_values(top, values)
+
+        def schedule_update():
+            if self.pending_update is None:
+                self.pending_update = top.after(self.update_interval, update_parameters)
+
+        # An update still pending when the window is closed or rebuilt is cancelled.
+        def cancel_update(event):
+            if event.widget is self and self.pending_update is not None:
+                top.after_cancel(self.pending_update)
+                self.pending_update = None
+
+        self.bind("<Destroy>", cancel_update)
+
+        def on_slide(name, position):
+            values[name] = float(position)
+            value_entry = rows[name][1]
+            value_entry.delete(0, "end")
+            value_entry.insert(0, "{:.6g}".format(values[name]))
+            schedule_update()
+
+        # Function definition for the set button and the return key. A value outside of the range extends it.
+        def set_entries(event=None):
+            self.error_messages = []
+            settings = {}
+
+            for name, (_, value_entry, low_entry, high_entry) in rows.items():
+                try:
+                    value = evaluate_constant(value_entry.get())
+                    low = evaluate_constant(low_entry.get())
+                    high = evaluate_constant(high_entry.get())
+                except (TypeError, ValueError):
+                    self.error_messages.append("Invalid input for {}.".format(name))
+                    continue
+
+                if low >= high:
+                    self.error_messages.append("The minimum of {} must be less than its maximum.".format(name))
+                else:
+                    settings[name] = (value, min(low, value), max(high, value))
+
+            if self.error_messages:
+                messagebox.showerror("Error", "\n".join(self.error_messages))
+                return
+
+            for name, (value, low, high) in settings.items():
+                scale, _, low_entry, high_entry = rows[name]
+                equations.parameter_ranges[name] = (low, high)
+                for entry, bound in ((low_entry, low), (high_entry, high)):
+                    entry.delete(0, "end")
+                    entry.insert(0, "{:.6g}".format(bound))
+
+                scale.config(from_=low, to=high)
+                scale.set(value)
+                values[name] = value
+
+            schedule_update()
+
+        for row, name in enumerate(values, start=1):
+            low, high = equations.parameter_ranges[name]
+
+            name_label = ttk.Label(self, text="{} = ".format(name), font=top.widget_font)
+            name_label.grid(row=row, column=0, sticky="e")
+
+            scale = ttk.Scale(self, from_=low, to=high, value=values[name], length=top.widget_font.measure("0" * 30),
+                              command=lambda position, name=name: on_slide(name, position))
+            scale.grid(row=row, column=1, sticky="ew")
+
+            entries = []
+            for column, value in ((2, values[name]), (3, low), (4, high)):
+                entry = ttk.Entry(self, width=top.small_entry_width, font=top.widget_font)
+                entry.insert(0, "{:.6g}".format(value))
+                entry.bind("<Return>", set_entries)
+                entry.grid(row=row, column=column)
+                entries.append(entry)
+
+            rows[name] = (scale, *entries)
+
+        set_button = ttk.Button(self, width=top.small_button_width, style="Accent.TButton", text="Set",
+                                command=set_entries)
+        set_button.grid(row=len(values) + 1, column=4)
+
+
+# Opens the parameters window, or rebuilds it for the parameters of the current equations. The window is closed if the
+# equations have no parameters.
+def show_parameters_window(top):
+    if top.parameters_window is not None:
+        top.parameters_window.destroy()
+        top.parameters_window = None
+
+    if not top.differential_equations.parameters:
+        return
+
+    parameters_window = Toplevel(top)
+    parameters_window.resizable(True, False)
+    parameters_window.title("Parameters")
+    set_icon(parameters_window, os.path.join(top.root_dir, "lib", "logo.ico"), top.platform_type)
+
+    parameters_frame = ParametersFrame(parameters_window, top)
+    parameters_frame.pack(side=TOP, fill=BOTH, expand=True)
+
+    def on_closing():
+        top.parameters_window = None
+        parameters_window.destroy()
+
+    parameters_window.protocol("WM_DELETE_WINDOW", on_closing)
+    top.parameters_window = parameters_window
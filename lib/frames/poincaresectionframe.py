@@ -0,0 +1,129 @@
+"""
+PoincareSectionFrame class file. The frame records where every flow crosses a section curve g(x, y) = 0, entered like
+the equations of the AddGraphsFrame, and plots the crossings alongside the return map of consecutive crossings.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+from tkinter import ttk, StringVar, messagebox
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+from ..configureplot import set_plot_window_style
+from ..expressions import Expression
+from ..events import find_crossings
+from ..session import load_flows, SessionError
+from ..profiler import profiler
+
+
+class PoincareSectionFrame(ttk.Frame):
+    def __init__(self, poincare_window, top):
+        super().__init__(poincare_window)
+
+        self.direction_options = {"both": 0, "increasing": 1, "decreasing": -1}
+        self.direction_selection = StringVar(value="increasing")
+        self.coordinate_selection = StringVar(value="x")
+        self.crossings = None
+
+        for i in range(7):
+            self.columnconfigure(i, weight=1)
+
+        self.rowconfigure(1, weight=1)
+
+        # section
+        section_label = ttk.Label(self, text="Section:", font=top.widget_font)
+        section_label.grid(row=0, column=0, sticky="e")
+        section_entry = ttk.Entry(self, width=top.large_entry_width, font=top.widget_font)
+        section_entry.insert(0, "y = 0")
+        section_entry.grid(row=0, column=1, sticky="w")
+
+        # crossing direction, i.e. the sign of dg/dt at the crossings
+        direction_label = ttk.Label(self, text="Direction: ", font=top.widget_font)
+        direction_label.grid(row=0, column=2, sticky="e")
+        direction_spinbox = ttk.Spinbox(self, textvariable=self.direction_selection, state="readonly",
+                                        values=tuple(self.direction_options.keys()), width=top.large_entry_width)
+        direction_spinbox.grid(row=0, column=3, sticky="w")
+
+        # coordinate of the return map
+        coordinate_label = ttk.Label(self, text="Return map: ", font=top.widget_font)
+        coordinate_label.grid(row=0, column=4, sticky="e")
+        coordinate_spinbox = ttk.Spinbox(self, textvariable=self.coordinate_selection, state="readonly",
+                                         values=("x", "y"), width=top.small_entry_width)
+        coordinate_spinbox.grid(row=0, column=5, sticky="w")
+
+        self.fig = Figure()
+        section_ax = self.fig.add_subplot(121)
+        return_map_ax = self.fig.add_subplot(122)
+
+        self.canvas = FigureCanvasTkAgg(self.fig, self)
+        profiler.instrument_canvas(self.canvas, "poincare_canvas.draw")
+        self.canvas.get_tk_widget().grid(row=1, column=0, columnspan=7, sticky="nsew")
+
+        def plot_crossings():
+            coordinate = self.coordinate_selection.get()
+            s_k, s_next = self.crossings.return_map(coordinate)
+
+            section_ax.clear()
+            section_ax.plot(self.crossings.x, self.crossings.y, linestyle="none", marker=".", markersize=2,
+                            color=top.flow_color)
+            section_ax.set_xlim(top.figure_settings.xmin, top.figure_settings.xmax)
+            section_ax.set_ylim(top.figure_settings.ymin, top.figure_settings.ymax)
+            section_ax.set_xlabel("x", fontsize=top.time_series_fontsize)
+            section_ax.set_ylabel("y", fontsize=top.time_series_fontsize)
+            section_ax.set_title("{} crossings".format(len(self.crossings)), fontsize=top.time_series_fontsize)
+
+            return_map_ax.clear()
+            return_map_ax.plot(s_k, s_next, linestyle="none", marker=".", markersize=2, color=top.flow_color)
+            return_map_ax.axline((0, 0), slope=1, color=top.flow_highlight_color, linewidth=top.flow_linewidth)
+            return_map_ax.set_xlabel("${}_k$".format(coordinate), fontsize=top.time_series_fontsize)
+            return_map_ax.set_ylabel("${}_{{k+1}}$".format(coordinate), fontsize=top.time_series_fontsize)
+            return_map_ax.set_title("Return map", fontsize=top.time_series_fontsize)
+            if len(s_k):
+                return_map_ax.set_aspect("equal", adjustable="datalim")
+
+            set_plot_window_style(self.fig, (section_ax, return_map_ax), top.figure_background_color,
+                                  top.figure_axes_color, top.time_series_fontsize,
+                                  top.figure_settings.show_grid.get(), top.figure_grid_style, top.figure_grid_alpha)
+            self.canvas.draw_idle()
+
+        # Function definition for computing the crossings. The section is entered like a graph's equation, and
+        # g(x, y) is the difference of its two sides.
+        def compute_crossings():
+            section = section_entry.get()
+
+            if not section.count("=") == 1:
+                messagebox.showerror("Error", "Section must be y = f(x), x = f(y), or f(x, y) = C.")
+                return
+
+            try:
+                event = Expression("({}) - ({})".format(*section.split("=")), ("x", "y"))
+            except (NameError, SyntaxError, ValueError, TypeError):
+                messagebox.showerror("Error", "Invalid expression for section.")
+                return
+
+            try:
+                load_flows(top)  # Every flow of a loaded session is needed.
+            except SessionError as error:
+                messagebox.showerror("Error", "The flows could not be loaded:\n{}".format(error))
+                return
+
+            flows = [flow for flow in top.flows if not flow.is_equilibrium]
+            self.crossings = find_crossings(event, flows, self.direction_options[self.direction_selection.get()])
+            plot_crossings()
+
+        compute_button = ttk.Button(self, width=top.small_button_width, style="Accent.TButton", text="Plot",
+                                    command=compute_crossings)
+        compute_button.grid(row=0, column=6)
+
+        # Changing the coordinate only redraws the return map of the crossings found last.
+        coordinate_spinbox.config(command=lambda: plot_crossings() if self.crossings is not None else None)
@@ -18,6 +18,7 @@ from tkinter import ttk, StringVar, IntVar, HORIZONTAL
 
 from ..configureplot import (set_figure_properties, set_figure_colors, set_figure_axes, set_figure_ticklabels,
                              set_figure_grid)
+from ..density import set_trajectory_rendering
 
 
 class SettingsFrame(ttk.Frame):
@@ -32,17 +33,23 @@ class SettingsFrame(ttk.Frame):
         self.flow_circle_diameter_value = IntVar(value=top.flow_circle_diameter)
         self.flow_arrowhead_size_value = IntVar(value=top.flow_arrowhead_size)
         self.numerical_method_selection = StringVar(value=top.numerical_method)
+        self.trajectory_storage_selection = StringVar(value=top.trajectory_storage)
+        self.precision_selection = StringVar(value=top.precision)
+        self.trajectory_rendering_selection = StringVar(value=top.trajectory_rendering)
+        self.export_rasterize_selection = StringVar(value=top.export_rasterize)
         self.figure_axes_color_selection = StringVar(value=top.figure_axes_color)
         self.figure_axes_linewidth_value = IntVar(value=top.figure_axes_linewidth)
         self.figure_grid_linewidth_value = IntVar(value=top.figure_grid_linewidth)
         self.figure_grid_alpha_value = IntVar(value=top.figure_grid_alpha * 100)
         self.figure_tick_fontsize_value = IntVar(value=top.figure_tick_fontsize)
         self.graph_linewidth_value = IntVar(value=top.graph_linewidth)
+        self.animation_trail_length_value = IntVar(value=top.animation_trail_length)
+        self.animation_frame_rate_value = IntVar(value=top.animation_frame_rate)
 
         for i in range(6):
             self.columnconfigure(i, weight=1)
 
-        for i in range(8):
+        for i in range(11):
             self.rowconfigure(i, weight=1)
 
         if top.mode == "dark":
@@ -112,6 +119,34 @@ class SettingsFrame(ttk.Frame):
                                                values=top.numerical_method_options)
         numerical_method_spinbox.grid(row=6, column=1, columnspan=2, sticky="w")
 
+        # trajectory storage
+        trajectory_storage_label = ttk.Label(self, text="Trajectory storage: ", font=top.widget_font)
+        trajectory_storage_label.grid(row=7, column=0, sticky="e")
+        trajectory_storage_spinbox = ttk.Spinbox(self, textvariable=self.trajectory_storage_selection,
+                                                 state="readonly", values=top.trajectory_storage_options)
+        trajectory_storage_spinbox.grid(row=7, column=1, columnspan=2, sticky="w")
+
+        # precision
+        precision_label = ttk.Label(self, text="Precision: ", font=top.widget_font)
+        precision_label.grid(row=7, column=3, sticky="e")
+        precision_spinbox = ttk.Spinbox(self, textvariable=self.precision_selection, state="readonly",
+                                        values=top.precision_options)
+        precision_spinbox.grid(row=7, column=4, columnspan=2, sticky="w")
+
+        # trajectory rendering, either lines or a density image
+        trajectory_rendering_label = ttk.Label(self, text="Trajectory rendering: ", font=top.widget_font)
+        trajectory_rendering_label.grid(row=8, column=0, sticky="e")
+        trajectory_rendering_spinbox = ttk.Spinbox(self, textvariable=self.trajectory_rendering_selection,
+                                                   state="readonly", values=top.trajectory_rendering_options)
+        trajectory_rendering_spinbox.grid(row=8, column=1, columnspan=2, sticky="w")
+
+        # rasterizing of the trajectories in exported PDFs and SVGs
+        export_rasterize_label = ttk.Label(self, text="Rasterize on export: ", font=top.widget_font)
+        export_rasterize_label.grid(row=8, column=3, sticky="e")
+        export_rasterize_spinbox = ttk.Spinbox(self, textvariable=self.export_rasterize_selection, state="readonly",
+                                               values=top.export_rasterize_options)
+        export_rasterize_spinbox.grid(row=8, column=4, columnspan=2, sticky="w")
+
         # axes color
         axes_color_label = ttk.Label(self, text="Axes color: ", font=top.widget_font)
         axes_color_label.grid(row=1, column=3, sticky="e")
@@ -186,6 +221,32 @@ class SettingsFrame(ttk.Frame):
                                           ))
         graph_linewidth_scale.grid(row=6, column=4, sticky="ew")
 
+        # length of the trails behind the circles in animations, or 0 for none
+        animation_trail_length_label = ttk.Label(self, text="Animation trail: ", font=top.widget_font)
+        animation_trail_length_label.grid(row=9, column=0, sticky="e")
+        animation_trail_length_viewer = ttk.Label(self, text=str(self.animation_trail_length_value.get()),
+                                                  font=top.widget_font, width=top.small_entry_width)
+        animation_trail_length_viewer.grid(row=9, column=2)
+        animation_trail_length_scale = ttk.Scale(self, from_=0, to=100, orient=HORIZONTAL,
+                                                 variable=self.animation_trail_length_value, style="Tick.TScale",
+                                                 command=lambda x: animation_trail_length_viewer.config(
+                                                     text=str(self.animation_trail_length_value.get())
+                                                 ))
+        animation_trail_length_scale.grid(row=9, column=1, sticky="ew")
+
+        # animation frames per unit of t, or 0 for one frame per integration step
+        animation_frame_rate_label = ttk.Label(self, text="Frames per unit t: ", font=top.widget_font)
+        animation_frame_rate_label.grid(row=9, column=3, sticky="e")
+        animation_frame_rate_viewer = ttk.Label(self, text=str(self.animation_frame_rate_value.get()),
+                                                font=top.widget_font, width=top.small_entry_width)
+        animation_frame_rate_viewer.grid(row=9, column=5)
+        animation_frame_rate_scale = ttk.Scale(self, from_=0, to=200, orient=HORIZONTAL,
+                                               variable=self.animation_frame_rate_value, style="Tick.TScale",
+                                               command=lambda x: animation_frame_rate_viewer.config(
+                                                   text=str(self.animation_frame_rate_value.get())
+                                               ))
+        animation_frame_rate_scale.grid(row=9, column=4, sticky="ew")
+
         def set_default_light_colors():
             self.flow_color_selection.set("gray")
             self.figure_axes_color_selection.set("gray")
@@ -248,6 +309,14 @@ class SettingsFrame(ttk.Frame):
                                                  top.figure_settings.ymin, top.figure_settings.ymax)
 
             top.numerical_method = self.numerical_method_selection.get()
+            top.trajectory_storage = self.trajectory_storage_selection.get()
+            top.trajectory_store.set_mode(top.trajectory_storage)
+            top.precision = self.precision_selection.get()
+            top.trajectory_store.set_dtype(top.precision_dict[top.precision][1])
+            set_trajectory_rendering(top, self.trajectory_rendering_selection.get())
+            top.export_rasterize = self.export_rasterize_selection.get()
+            top.animation_trail_length = self.animation_trail_length_value.get()
+            top.animation_frame_rate = self.animation_frame_rate_value.get()
 
             top.figure_axes_color = self.figure_axes_color_selection.get()
             top.figure_axes_linewidth = self.figure_axes_linewidth_value.get()
@@ -286,4 +355,4 @@ class SettingsFrame(ttk.Frame):
         # apply button
         apply_button = ttk.Button(self, width=top.small_button_width, style="Accent.TButton", text="Apply",
                                   command=apply)
-        apply_button.grid(row=7, column=2, columnspan=2)
+        apply_button.grid(row=10, column=2, columnspan=2)
@@ -0,0 +1,194 @@
+"""
+TiledMapFrame class file. The frame is the base of the frames that compute a tiled map over the current view, such as
+basins of attraction or FTLE fields, which is shown as an image layer underneath the graphs and trajectories of the top
+window's figure and filled in as its tiles are done.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+from tkinter import ttk, messagebox
+
+from ..expressions import evaluate_constant
+from ..flowmap import batch_method
+
+
+def clear_tiled_map(top, map_attribute, image_attribute):
+    # Cancels the map kept in the given attribute of the top window and removes its image from the figure.
+    if getattr(top, map_attribute) is not None:
+        getattr(top, map_attribute).cancel()
+        setattr(top, map_attribute, None)
+
+    if getattr(top, image_attribute) is not None:
+        getattr(top, image_attribute).remove()
+        setattr(top, image_attribute, None)
+
+
+class TiledMapFrame(ttk.Frame):
+    """
+    Base class of the frames computing a map of the given TiledMap subclass, which is kept with its image in the given
+    attributes of the top window, so that it outlives the frame's window. Subclasses create the image and update it as
+    the tiles are done.
+    """
+    map_class = None
+    map_attribute = None
+    image_attribute = None
+    description = None  # What the map shows, as used in the error messages.
+    time_name = "time"  # Name of the integration time, as used in the label and the error messages.
+    default_time = "20"
+
+    def __init__(self, window, top):
+        super().__init__(window)
+
+        self.top = top
+        self.error_messages = []
+        self.poll_interval = 100  # Interval at which finished tiles are added to the map, in milliseconds.
+
+        for i in range(6):
+            self.columnconfigure(i, weight=1)
+
+        for i in range(2):
+            self.rowconfigure(i, weight=1)
+
+        # number of pixels along the x-axis
+        resolution_label = ttk.Label(self, text="Resolution:", font=top.widget_font)
+        resolution_label.grid(row=0, column=0, sticky="e")
+        self.resolution_entry = ttk.Entry(self, width=top.small_entry_width, font=top.widget_font)
+        self.resolution_entry.insert(0, "400")
+        self.resolution_entry.grid(row=0, column=1, sticky="w")
+
+        # integration time
+        time_label = ttk.Label(self, text=self.time_name.capitalize() + ":", font=top.widget_font)
+        time_label.grid(row=0, column=2, sticky="e")
+        self.time_entry = ttk.Entry(self, width=top.small_entry_width, font=top.widget_font)
+        self.time_entry.insert(0, self.default_time)
+        self.time_entry.grid(row=0, column=3, sticky="w")
+
+        self.progress_bar = ttk.Progressbar(self, mode="determinate")
+        self.progress_bar.grid(row=1, column=0, columnspan=4, sticky="ew")
+        self.status_label = ttk.Label(self, text="", font=top.widget_font)
+        self.status_label.grid(row=1, column=4, columnspan=2)
+
+        compute_button = ttk.Button(self, width=top.small_button_width, style="Accent.TButton", text="Plot",
+                                    command=self.compute)
+        compute_button.grid(row=0, column=4)
+
+        clear_button = ttk.Button(self, width=top.small_button_width, text="Clear", command=self.clear)
+        clear_button.grid(row=0, column=5)
+
+    def create_map(self, extent, resolution, rows, duration):
+        return self.map_class(*extent, resolution, rows)
+
+    def create_image(self, tiled_map):
+        raise NotImplementedError
+
+    def show(self, tiled_map):
+        # Updates the image with the tiles that were added to the map.
+        raise NotImplementedError
+
+    def status(self, tiled_map):
+        return ""
+
+    def restore(self, tiled_map, integrator):
+        # Shows a map computed before instead of computing it again, if there is one.
+        return False
+
+    def completed(self, tiled_map):
+        pass
+
+    def check_duration(self, duration):
+        # Returns the error message for an invalid integration time, if it is.
+        return "The integration time must be positive." if duration <= 0 else None
+
+    def clear(self):
+        is_shown = getattr(self.top, self.image_attribute) is not None
+        clear_tiled_map(self.top, self.map_attribute, self.image_attribute)
+        if is_shown:
+            self.top.fig.canvas.draw()
+
+    def poll(self, tiled_map):
+        # Adds the tiles that are done to the map and redraws it. Polling goes on after the window is closed, so that
+        # the map is completed anyway.
+        top = self.top
+        if tiled_map is not getattr(top, self.map_attribute):
+            return  # The map was cleared or replaced.
+
+        added, error = tiled_map.collect()
+        if error is not None:
+            self.clear()
+            messagebox.showerror("Error", "Computing {} failed:\n{}".format(self.description, error))
+            return
+
+        if added:
+            self.show(tiled_map)
+            top.fig.canvas.draw_idle()
+
+        if tiled_map.is_complete():
+            self.completed(tiled_map)
+        else:
+            top.after(self.poll_interval, self.poll, tiled_map)
+
+        if self.winfo_exists():
+            self.progress_bar.config(value=100 * tiled_map.done / tiled_map.rows)
+            self.status_label.config(text=self.status(tiled_map))
+
+    def compute(self):
+        top = self.top
+        self.error_messages = []
+        resolution = None
+        duration = None
+
+        if not top.differential_equations.is_configured:
+            messagebox.showerror("Error", "The differential equations must be set to compute {}.".format(
+                self.description))
+            return
+
+        try:
+            resolution = int(self.resolution_entry.get())
+            if resolution < 2:
+                self.error_messages.append("The resolution must be at least 2.")
+        except ValueError:
+            self.error_messages.append("Invalid input for resolution.")
+
+        try:
+            duration = evaluate_constant(self.time_entry.get())
+            message = self.check_duration(duration)
+            if message is not None:
+                self.error_messages.append(message)
+        except (TypeError, ValueError):
+            self.error_messages.append("Invalid input for {}.".format(self.time_name))
+
+        if self.error_messages:
+            messagebox.showerror("Error", "\n".join(self.error_messages))
+            return
+
+        self.clear()
+
+        # The pixels of the map have the same aspect ratio as the figure's.
+        extent = (top.figure_settings.xmin, top.figure_settings.xmax, top.figure_settings.ymin,
+                  top.figure_settings.ymax)
+        rows = max(2, round(resolution * top.figure_height / top.figure_width))
+        integrator = batch_method(top.numerical_method_dict, top.numerical_method)
+        tiled_map = self.create_map(extent, resolution, rows, duration)
+        setattr(top, self.image_attribute, self.create_image(tiled_map))
+
+        if self.restore(tiled_map, integrator):
+            top.fig.canvas.draw()
+            self.progress_bar.config(value=100)
+            self.status_label.config(text="cached")
+            return
+
+        setattr(top, self.map_attribute, tiled_map)
+        tiled_map.submit(integrator, top.differential_equations.dxdt, top.differential_equations.dydt, duration,
+                         top.differential_equations.dt)
+        top.fig.canvas.draw()
+        self.poll(tiled_map)
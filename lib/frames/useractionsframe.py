@@ -13,16 +13,20 @@ You should have received a copy of the GNU General Public License along with pla
 <https://www.gnu.org/licenses/>.
 """
 import os
-from tkinter import ttk, PhotoImage, Toplevel, TOP, BOTH
-import matplotlib.pyplot as plt
-from matplotlib import animation
+import numpy as np
+from tkinter import ttk, messagebox, Menu, PhotoImage, Toplevel, TOP, BOTH
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
 from ..configureplot import (set_figure_properties, set_figure_colors, set_figure_axes, set_figure_ticks,
                              set_figure_ticklabels, set_figure_grid)
-from ..updatablecollections import UpdatablePatchCollection, UpdatableLineCollection
-from .settingsframe import SettingsFrame
+from ..updatablecollections import UpdatablePatchCollection, UpdatableLineCollection, TrailCollection
 from ..app_setters import set_fullscreen, set_icon
+from ..session import load_flows, SessionError
+from ..fieldframes import FieldFrames, depends_on_time
+from ..pyramid import drawn_trajectory
+from ..denseoutput import frame_times
+from ..flow import FlowStack
 
 
 class UserActionsFrame(ttk.Frame):
@@ -38,6 +42,14 @@ class UserActionsFrame(ttk.Frame):
 
         # Function definition for starting flow animation.
         def animate_flow():
+            from matplotlib import animation
+
+            try:
+                load_flows(top)  # Every flow of a loaded session is needed for the animation.
+            except SessionError as error:
+                messagebox.showerror("Error", "The flows could not be loaded:\n{}".format(error))
+                return
+
             top.is_animating = True
 
             ani_window = Toplevel(top)
@@ -51,7 +63,7 @@ class UserActionsFrame(ttk.Frame):
             ani_frame.pack(anchor="center")
             ani_frame.pack_propagate(False)
 
-            ani_fig = plt.figure()
+            ani_fig = Figure()
             ani_ax = ani_fig.add_subplot(1, 1, 1)
 
             ani_canvas = FigureCanvasTkAgg(ani_fig, ani_frame)
@@ -85,8 +97,10 @@ class UserActionsFrame(ttk.Frame):
             ani_flow_circle_collection = UpdatablePatchCollection(patches=[], facecolors=top.flow_color, zorder=-1)
             ani_flow_arrowhead_collection = UpdatablePatchCollection(patches=[], facecolors=top.flow_color, zorder=-2)
 
+            # The animation's view is the top window's, so the trajectories are drawn at the same levels of their
+            # pyramids. Only the circles, which move along the full trajectories, are redrawn with each frame.
             for flow in top.flows:
-                ani_flow_trajectory_collection.lines.append(flow.trajectory)
+                ani_flow_trajectory_collection.lines.append(drawn_trajectory(top, flow))
                 ani_flow_circle_collection.patches.append(flow.circle)
                 ani_flow_arrowhead_collection.patches.append(flow.arrowhead)
 
@@ -101,23 +115,78 @@ class UserActionsFrame(ttk.Frame):
                         ani_ax.plot(path.vertices[:, 0], path.vertices[:, 1], color=graph.color,
                                     linewidth=top.graph_linewidth, zorder=-4)
 
+            # The frame times are those of the flows, which share their time values, unless a frame rate is set. The
+            # circles are then placed at the frame times by the dense output between the steps.
+            equations = top.differential_equations
+            if top.flows:
+                t_values = frame_times(top.flows[0].t_values, top.animation_frame_rate)
+            else:
+                t_values = frame_times(np.arange(0., equations.tmax + equations.dt, equations.dt),
+                                       top.animation_frame_rate)
+            is_dense = bool(top.flows) and t_values is not top.flows[0].t_values
+            flow_stack = FlowStack(top.flows) if is_dense else None
+
+            # The direction field of equations that depend on t is drawn behind the circles, with the arrows of every
+            # frame computed beforehand.
+            field_frames = None
+            animated_artists = (ani_flow_circle_collection, )
+            if top.animation_field_arrows and depends_on_time(equations.dxdt, equations.dydt):
+                arrows = top.animation_field_arrows
+                columns = arrows if top.figure_width >= top.figure_height else \
+                    max(1, round(arrows * top.figure_width / top.figure_height))
+                rows = arrows if top.figure_height >= top.figure_width else \
+                    max(1, round(arrows * top.figure_height / top.figure_width))
+
+                field_frames = FieldFrames(equations.dxdt, equations.dydt, t_values,
+                                           (top.figure_settings.xmin, top.figure_settings.xmax,
+                                            top.figure_settings.ymin, top.figure_settings.ymax), columns, rows)
+                field_quiver = ani_ax.quiver(field_frames.X, field_frames.Y, *field_frames.frame(0), angles="xy",
+                                             scale_units="xy", scale=1, color=top.figure_axes_color, alpha=0.5,
+                                             width=0.002, zorder=-5)
+                animated_artists = (field_quiver, ani_flow_circle_collection)
+
+            # Fading trails of the circles' last positions, drawn between the trajectories and the circles.
+            trails = None
+            if top.animation_trail_length and top.flows:
+                trails = TrailCollection([(flow.x0, flow.y0) for flow in top.flows], top.animation_trail_length,
+                                         top.flow_color, linewidths=top.flow_linewidth, zorder=-1.5)
+                ani_ax.add_collection(trails, autolim=False)
+                animated_artists = animated_artists[:-1] + (trails, ani_flow_circle_collection)
+
             # Animation procedure. Each Flow's circle moves along the trajectory based on the values calculated when
             # integrating. The animation ends with all the circles at their initial conditions.
             def init_animation():
-                return ani_flow_circle_collection,
+                return animated_artists
 
             def animate(frame):
-                for idx in range(len(top.flows)):
-                    if frame < len(top.flows[0].t_values):
-                        top.flows[idx].circle.center = (top.flows[idx].x_values[frame], top.flows[idx].y_values[frame])
+                if is_dense and frame < len(t_values):
+                    for flow, x, y in zip(top.flows, *flow_stack.evaluate(t_values[frame])):
+                        flow.circle.center = (x, y)
+                else:
+                    for idx in range(len(top.flows)):
+                        if frame < len(t_values):
+                            top.flows[idx].circle.center = (top.flows[idx].x_values[frame],
+                                                            top.flows[idx].y_values[frame])
+                        else:
+                            top.flows[idx].circle.center = (top.flows[idx].x0, top.flows[idx].y0)
+
+                if field_frames is not None:
+                    field_quiver.set_UVC(*field_frames.frame(frame if frame < len(t_values) else 0))
+
+                # The trails start over with each loop, and are hidden once the circles are back at their initial
+                # conditions.
+                if trails is not None:
+                    positions = [flow.circle.center for flow in top.flows]
+                    if 0 < frame < len(t_values):
+                        trails.push(positions)
                     else:
-                        top.flows[idx].circle.center = (top.flows[idx].x0, top.flows[idx].y0)
+                        trails.reset(positions)
 
-                return ani_flow_circle_collection,
+                return animated_artists
 
-            if top.flows:
+            if top.flows or field_frames is not None:
                 anim = animation.FuncAnimation(ani_fig, init_func=init_animation, func=animate,
-                                               frames=len(top.flows[0].t_values) + 1, interval=top.animation_interval,
+                                               frames=len(t_values) + 1, interval=top.animation_interval,
                                                repeat_delay=top.animation_repeat_delay, blit=True,
                                                cache_frame_data=False)
             ani_fig.canvas.draw()
@@ -128,7 +197,6 @@ class UserActionsFrame(ttk.Frame):
                     top.flows[idx].circle.center = (top.flows[idx].x0, top.flows[idx].y0)
 
                 top.is_animating = False
-                plt.close(ani_fig)
                 ani_window.destroy()
 
             ani_window.protocol("WM_DELETE_WINDOW", on_closing)
@@ -136,9 +204,62 @@ class UserActionsFrame(ttk.Frame):
         # Animate flow button
         animate_flow_button = ttk.Button(self, width=top.large_button_width, style="Accent.TButton",
                                          text="Animate Flow", command=animate_flow)
-        animate_flow_button.grid(row=0, column=0, columnspan=3)
+        animate_flow_button.grid(row=0, column=0, columnspan=2)
 
+        # The analysis windows, and the modules defining them, are only loaded once they are opened.
+        def open_analysis_window(title, frame_module, frame_class):
+            import importlib
+
+            analysis_window = Toplevel(top)
+            analysis_window.resizable(True, True)
+            analysis_window.title(title)
+            set_icon(analysis_window, os.path.join(top.root_dir, "lib", "logo.ico"), top.platform_type)
+
+            analysis_frame = getattr(importlib.import_module(frame_module, __package__), frame_class)(analysis_window,
+                                                                                                      top)
+            analysis_frame.config(width=top.analysis_window_width, height=top.analysis_window_height)
+            analysis_frame.pack(side=TOP, fill=BOTH, expand=True)
+
+            def on_closing():
+                analysis_window.destroy()
+
+            analysis_window.protocol("WM_DELETE_WINDOW", on_closing)
+
+        # Analysis menu
+        analysis_menubutton = ttk.Menubutton(self, text="Analysis")
+        analysis_menu = Menu(analysis_menubutton, tearoff=False)
+        # The parameters window opens by itself when the equations are set, and can be opened again from here.
+        def open_parameters_window():
+            from .parametersframe import show_parameters_window
+
+            if not top.differential_equations.parameters:
+                messagebox.showerror("Error", "The differential equations have no parameters.")
+                return
+
+            show_parameters_window(top)
+
+        analysis_menu.add_command(label="Parameters", command=open_parameters_window)
+        analysis_menu.add_command(label="Poincaré section",
+                                  command=lambda: open_analysis_window("Poincaré section", ".poincaresectionframe",
+                                                                       "PoincareSectionFrame"))
+        analysis_menu.add_command(label="Limit cycles",
+                                  command=lambda: open_analysis_window("Limit cycles", ".limitcyclesframe",
+                                                                       "LimitCyclesFrame"))
+        analysis_menu.add_command(label="Basins of attraction",
+                                  command=lambda: open_analysis_window("Basins of attraction", ".basinsframe",
+                                                                       "BasinsFrame"))
+        analysis_menu.add_command(label="FTLE field",
+                                  command=lambda: open_analysis_window("FTLE field", ".ftleframe", "FTLEFrame"))
+        analysis_menu.add_command(label="Bifurcation diagram",
+                                  command=lambda: open_analysis_window("Bifurcation diagram", ".bifurcationframe",
+                                                                       "BifurcationFrame"))
+        analysis_menubutton["menu"] = analysis_menu
+        analysis_menubutton.grid(row=0, column=2)
+
+        # The settings window, and the module defining it, are only loaded once the settings button is pressed.
         def open_settings():
+            from .settingsframe import SettingsFrame
+
             settings_window = Toplevel(top)
             settings_window.resizable(False, False)
             settings_window.title("Settings")
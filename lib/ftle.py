@@ -0,0 +1,78 @@
+"""
+FTLEField class file. The finite-time Lyapunov exponent (FTLE) of a point measures how fast trajectories starting close
+to it separate over the integration time T. It is computed from the flow map of every pixel center of the view: the
+gradient F of the end points with respect to the initial points is approximated with finite differences across
+neighbouring pixels, and the FTLE is ln(sqrt(largest eigenvalue of F^T F)) / |T|. Ridges of the forward-time field
+(T > 0) are repelling structures such as the stable manifolds of saddles, and ridges of the backward-time field (T < 0)
+are attracting ones.
+
+Completed fields are cached per system, integration time and view, so going back to a previous view or time does not
+recompute the field.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+
+from .flowmap import TiledMap
+from .lrucache import LRUCache
+
+# Number of completed fields kept in the cache, least recently used first out.
+FTLE_CACHE_SIZE = 8
+
+_cache = LRUCache(FTLE_CACHE_SIZE)
+
+
+def cache_key(dxdt, dydt, method, dt, duration, extent, columns, rows):
+    return str(dxdt), str(dydt), method, dt, duration, tuple(extent), columns, rows
+
+
+def cached_field(key):
+    return _cache.get(key)
+
+
+def cache_field(key, field):
+    _cache.put(key, field)
+
+
+class FTLEField(TiledMap):
+    def __init__(self, xmin, xmax, ymin, ymax, columns, rows, duration):
+        super().__init__(xmin, xmax, ymin, ymax, columns, rows)
+        self.duration = duration
+
+        # End points of every pixel, nan until the pixel's tile is done.
+        self.x_end = np.full((rows, columns), np.nan)
+        self.y_end = np.full((rows, columns), np.nan)
+
+    def add_tile(self, tile, result):
+        self.x_end[tile], self.y_end[tile] = result
+
+    def field(self):
+        # FTLE of every pixel, nan where a neighbouring pixel is not done yet or the flow map is not finite. Central
+        # differences are used inside the raster and one-sided differences on its edges.
+        dx = (self.extent[1] - self.extent[0]) / self.columns
+        dy = (self.extent[3] - self.extent[2]) / self.rows
+
+        with np.errstate(all="ignore"):
+            dX_dy, dX_dx = np.gradient(self.x_end, dy, dx)
+            dY_dy, dY_dx = np.gradient(self.y_end, dy, dx)
+
+            # Largest eigenvalue of the Cauchy-Green tensor F^T F, in closed form.
+            c11 = dX_dx ** 2 + dY_dx ** 2
+            c12 = dX_dx * dX_dy + dY_dx * dY_dy
+            c22 = dX_dy ** 2 + dY_dy ** 2
+            eigenvalue = (c11 + c22) / 2 + np.sqrt(((c11 - c22) / 2) ** 2 + c12 ** 2)
+
+            field = np.log(eigenvalue) / (2 * abs(self.duration))
+
+        return np.where(np.isfinite(field), field, np.nan)
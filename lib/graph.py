@@ -16,10 +16,17 @@ You should have received a copy of the GNU General Public License along with pla
 """
 import numpy as np
 
+from .profiler import profiler
+
+# Fraction of the view's width and height contoured beyond each side of the view, so that panning does not contour the
+# graphs again until the view leaves the region contoured.
+CONTOUR_MARGIN = 0.25
+
 
 class Graph:
-    def __init__(self, eqn, x_low, x_upp, y_low, y_upp, color, linewidth):
+    def __init__(self, eqn, x_low, x_upp, y_low, y_upp, color, linewidth, expression=None):
         self.eqn = eqn
+        self.expression = expression  # The string f(x, y) that eqn was created from, used when saving sessions.
         self.x_low = x_low
         self.x_upp = x_upp
         self.y_low = y_low
@@ -30,6 +37,7 @@ class Graph:
         self.X = None
         self.Y = None
         self.contours = []
+        self.contoured_region = None  # (xmin, xmax, ymin, ymax) of the region last contoured by update_contours.
 
     def create_meshgrid(self, xmin, xmax, ymin, ymax, n=200):
         x_array = np.linspace(np.amax((self.x_low, xmin)), np.amin((self.x_upp, xmax)), n)
@@ -38,6 +46,7 @@ class Graph:
 
         self.X, self.Y = np.meshgrid(x_array, y_array)
 
+    @profiler.profiled("Graph.create_contours")
     def create_contours(self, fig, ax):
         self.contours = ax.contour(self.X, self.Y, self.eqn(self.X, self.Y), [0.], colors=(self.color, ),
                                    linewidths=self.linewidth, zorder=-4)
@@ -52,7 +61,18 @@ class Graph:
         for collection in self.contours.collections:
             collection.set(linewidths=self.linewidth)
 
-    def update_contours(self, fig, ax, xmin, xmax, ymin, ymax):
-        self.create_meshgrid(xmin, xmax, ymin, ymax)
+    def update_contours(self, fig, ax, xmin, xmax, ymin, ymax, n=200):
+        # The contours are kept while the view is inside the region contoured and is not zoomed in more than twice,
+        # past which they would look coarse. Otherwise the view and a margin around it are contoured, at the same
+        # resolution across the view as before.
+        if self.contoured_region is not None:
+            region_xmin, region_xmax, region_ymin, region_ymax = self.contoured_region
+            if (region_xmin <= xmin and xmax <= region_xmax and region_ymin <= ymin and ymax <= region_ymax and
+                    2 * (1 + 2 * CONTOUR_MARGIN) * (xmax - xmin) >= region_xmax - region_xmin):
+                return
+
+        dx, dy = CONTOUR_MARGIN * (xmax - xmin), CONTOUR_MARGIN * (ymax - ymin)
+        self.contoured_region = (xmin - dx, xmax + dx, ymin - dy, ymax + dy)
+        self.create_meshgrid(*self.contoured_region, n=int(round(n * (1 + 2 * CONTOUR_MARGIN))))
         self.delete_contours()
         self.create_contours(fig, ax)
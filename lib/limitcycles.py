@@ -0,0 +1,203 @@
+"""
+LimitCycle class file, and the functions that find limit cycles automatically. Seeds spread over the view are first
+integrated for a transient time, after which those approaching a stable limit cycle lie close to it. A section normal
+to the flow is then placed through each seed's end point, and Newton's method is applied to the seed's first-return
+map on that section, for all seeds at once. Unstable limit cycles are found the same way by integrating backwards in
+time. Converged orbits found from several seeds are merged, and each limit cycle is reported with its period and its
+nontrivial Floquet multiplier, the derivative of the return map, which is less than 1 in magnitude if the cycle is
+stable.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+from matplotlib.lines import Line2D
+
+from .events import refine
+from .denseoutput import hermite
+from .flowmap import segments, flow_map
+from .profiler import profiler
+
+NEWTON_ITERATIONS = 12
+
+
+class LimitCycle:
+    def __init__(self, x0, y0, period, multiplier, x_values, y_values):
+        self.x0 = x0
+        self.y0 = y0
+        self.period = period
+        self.multiplier = multiplier
+        self.is_stable = abs(multiplier) < 1
+
+        # One period of the orbit, starting and ending at (x0, y0).
+        self.x_values = x_values
+        self.y_values = y_values
+
+        self.line = None
+
+    def create_line(self, ax, color, linewidth):
+        # Stable limit cycles are drawn with solid lines and unstable ones with dashed lines.
+        self.line = Line2D(self.x_values, self.y_values, color=color, linewidth=linewidth,
+                           linestyle="-" if self.is_stable else "--", zorder=-2)
+        ax.add_line(self.line)
+
+    def delete_line(self):
+        if self.line is not None:
+            self.line.remove()
+            self.line = None
+
+
+def first_returns(integrator, dxdt, dydt, x0, y0, px, py, ux, uy, dt, max_period):
+    """
+    Integrates from the points x0, y0 until each trajectory crosses the line through (px, py) normal to the unit
+    vector (ux, uy) in the direction of that vector, and returns the time and point of that first return. Both are nan
+    for trajectories that do not return within max_period.
+    """
+    n = len(x0)
+    period, x_return, y_return = np.full(n, np.nan), np.full(n, np.nan), np.full(n, np.nan)
+    active = np.ones(n, dtype=bool)
+
+    for t, x, y in segments(integrator, dxdt, dydt, x0, y0, int(np.ceil(max_period / dt)), dt):
+        g = (x - px) * ux + (y - py) * uy
+        crossing = (g[:-1] < 0) & (g[1:] >= 0) & active
+        if t[0] == 0:
+            crossing[0] = False  # The trajectories start on the section.
+
+        columns = np.nonzero(crossing.any(axis=0))[0]
+        if len(columns):
+            steps = np.argmax(crossing[:, columns], axis=0)
+            x0_, x1_ = x[steps, columns], x[steps + 1, columns]
+            y0_, y1_ = y[steps, columns], y[steps + 1, columns]
+            t0_, t1_ = t[steps], t[steps + 1]
+            vx0, vx1 = dxdt(t0_, x0_, y0_), dxdt(t1_, x1_, y1_)
+            vy0, vy1 = dydt(t0_, x0_, y0_), dydt(t1_, x1_, y1_)
+
+            def g_of_theta(theta):
+                return ((hermite(theta, dt, x0_, x1_, vx0, vx1) - px[columns]) * ux[columns] +
+                        (hermite(theta, dt, y0_, y1_, vy0, vy1) - py[columns]) * uy[columns])
+
+            theta = refine(g_of_theta, g[steps, columns], g[steps + 1, columns])
+            period[columns] = t[steps] + theta * dt
+            x_return[columns] = hermite(theta, dt, x0_, x1_, vx0, vx1)
+            y_return[columns] = hermite(theta, dt, y0_, y1_, vy0, vy1)
+            active[columns] = False
+
+        # Trajectories that blow up never return.
+        active &= np.isfinite(x[-1]) & np.isfinite(y[-1])
+        if not active.any():
+            break
+
+    return period, x_return, y_return
+
+
+def newton_poincare(integrator, dxdt, dydt, px, py, dt, max_period, tolerance):
+    """
+    Solves P(s) = s for the first-return map P of the section through each point (px, py) normal to the flow, where s
+    is the signed distance along the section. Returns the converged points, periods and multipliers P'(s).
+    """
+    fx, fy = dxdt(0, px, py), dydt(0, px, py)
+    speed = np.hypot(fx, fy)
+    ux, uy = fx / speed, fy / speed  # Unit tangent of the flow, normal to the section.
+    nx, ny = -uy, ux  # Unit vector along the section.
+
+    s = np.zeros(len(px))
+    delta = tolerance * 1E2
+    result = (np.zeros(0), np.zeros(0), np.zeros(0), np.zeros(0))
+    active = np.arange(len(px))
+
+    for _ in range(NEWTON_ITERATIONS):
+        if not len(active):
+            break
+
+        # The return map and its finite-difference derivative are evaluated in a single batch.
+        a = active
+        x0 = np.concatenate([px[a] + s[a] * nx[a], px[a] + (s[a] + delta) * nx[a]])
+        y0 = np.concatenate([py[a] + s[a] * ny[a], py[a] + (s[a] + delta) * ny[a]])
+        period, x_return, y_return = first_returns(integrator, dxdt, dydt, x0, y0, np.tile(px[a], 2),
+                                                   np.tile(py[a], 2), np.tile(ux[a], 2), np.tile(uy[a], 2), dt,
+                                                   max_period)
+
+        p = (x_return - np.tile(px[a], 2)) * np.tile(nx[a], 2) + (y_return - np.tile(py[a], 2)) * np.tile(ny[a], 2)
+        p, p_delta = p[:len(a)], p[len(a):]
+        multiplier = (p_delta - p) / delta
+        residual = p - s[a]
+
+        # Orbits that are not isolated, e.g. around a center, have a multiplier of 1 and are not limit cycles.
+        converged = (np.abs(residual) < tolerance) & (np.abs(multiplier - 1) > 1E-3)
+        result = tuple(np.concatenate([old, new]) for old, new in
+                       zip(result, (x_return[:len(a)][converged], y_return[:len(a)][converged],
+                                    period[:len(a)][converged], multiplier[converged])))
+
+        s[a] = s[a] - residual / (multiplier - 1)
+        keep = ~converged & np.isfinite(s[a]) & (np.abs(multiplier - 1) > 1E-3)
+        active = a[keep]
+
+    return result
+
+
+@profiler.profiled("find_limit_cycles")
+def find_limit_cycles(integrator, dxdt, dydt, x0, y0, dt, transient, max_period, scale):
+    """
+    Returns the LimitCycles found from the seeds x0, y0 (1D arrays), sorted by period. The transient time should be
+    long enough for the seeds to approach the limit cycles, max_period bounds the periods searched for, and scale is
+    the size of the region of interest, which sets the tolerances. The equations must be autonomous, since the
+    first-return map of a section only depends on the point it returns from if they do not depend on t.
+    """
+    if "t" in getattr(dxdt, "free_variables", set()) | getattr(dydt, "free_variables", set()):
+        raise ValueError("Limit cycles can only be found for autonomous equations.")
+
+    tolerance = 1E-7 * scale
+    cycles = []
+
+    with np.errstate(all="ignore"):
+        for sign in (1, -1):
+            f = dxdt if sign == 1 else (lambda t, x, y: -dxdt(t, x, y))
+            g = dydt if sign == 1 else (lambda t, x, y: -dydt(t, x, y))
+
+            px, py = flow_map(integrator, f, g, x0, y0, transient, dt)
+
+            # Seeds that blew up or approached an equilibrium are dropped.
+            speed = np.hypot(f(0, px, py), g(0, px, py))
+            keep = np.isfinite(px) & np.isfinite(py) & np.isfinite(speed) & (speed > 1E-6 * scale)
+            px, py, period, multiplier = newton_poincare(integrator, f, g, px[keep], py[keep], dt, max_period,
+                                                         tolerance)
+
+            for idx in np.argsort(period):
+                # The multiplier of the time-reversed return map is the inverse of the forward one.
+                cycle = (px[idx], py[idx], period[idx], multiplier[idx] if sign == 1 else 1 / multiplier[idx])
+                if not any(is_same_orbit(cycle, other) for other in cycles):
+                    cycles.append(cycle + sample_orbit(integrator, dxdt, dydt, cycle[0], cycle[1], cycle[2], dt))
+
+    return [LimitCycle(*cycle) for cycle in sorted(cycles, key=lambda cycle: cycle[2])]
+
+
+def is_same_orbit(cycle, other):
+    # Points found from different seeds lie at different places on the same orbit, so a cycle is compared to the
+    # points sampled along the other one, with a tolerance of the largest spacing between them.
+    x0, y0, period = cycle[:3]
+    x_values, y_values = other[4], other[5]
+    if abs(period - other[2]) > 1E-3 * period:
+        return False
+
+    spacing = np.max(np.hypot(np.diff(x_values), np.diff(y_values)))
+    return np.min(np.hypot(x_values - x0, y_values - y0)) <= spacing
+
+
+def sample_orbit(integrator, dxdt, dydt, x0, y0, period, dt):
+    # Integrates one period with a time-step adjusted to fit it exactly, so that the orbit is drawn closed.
+    steps = max(8, int(np.ceil(period / dt)))
+    t_values, x_values, y_values = integrator(dxdt, dydt, np.array([x0]), np.array([y0]), period, period / steps)
+    x_values, y_values = x_values[:steps + 1, 0], y_values[:steps + 1, 0]
+    x_values[-1], y_values[-1] = x0, y0
+
+    return x_values, y_values
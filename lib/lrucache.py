@@ -0,0 +1,55 @@
+"""
+LRUCache class file. The caches of computed results, such as FTLE fields or the trajectories of parameter values, keep
+the most recently used results within a bound on the number of values they hold.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Cache whose least recently used entries are dropped once the values of its entries exceed max_values. The number of
+    values of an entry is given by value_count, by default one per entry. The last entry put is always kept, even if it
+    exceeds the bound by itself.
+    """
+    def __init__(self, max_values, value_count=lambda value: 1):
+        self.max_values = max_values
+        self.value_count = value_count
+        self.entries = OrderedDict()  # Key -> (value, number of values)
+        self.values = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        # Returns the value of the key, or None if it is not cached.
+        if key not in self.entries:
+            return None
+
+        self.entries.move_to_end(key)
+        return self.entries[key][0]
+
+    def put(self, key, value):
+        if key in self.entries:
+            self.values -= self.entries.pop(key)[1]
+
+        self.entries[key] = (value, self.value_count(value))
+        self.values += self.entries[key][1]
+        while len(self.entries) > 1 and self.values > self.max_values:
+            self.values -= self.entries.popitem(last=False)[1][1]
+
+    def clear(self):
+        self.entries.clear()
+        self.values = 0
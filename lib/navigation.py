@@ -0,0 +1,157 @@
+"""
+ViewNavigator class file, and functions for changing the view of the top window's figure. Scrolling zooms in and out
+around the mouse, and dragging the background of the plot, or dragging with the middle button anywhere, pans it.
+During a gesture only the axis limits, ticks and spines are updated. The rest of the view, i.e. the circles and
+arrowheads, which are sized in pixels, the contours of the graphs, the density image, and the flows of a loaded session
+that come into view, is updated once the gesture has settled.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+from tkinter import messagebox
+
+from .configureplot import set_figure_axes, set_figure_ticks, set_figure_ticklabels, set_figure_grid
+from .session import load_visible_flows, SessionError
+from .density import reset_density
+from .pyramid import drawn_trajectory
+from .profiler import profiler
+
+# Ticks along an axis beyond which none are drawn, as when zooming far out with a small tick spacing.
+MAX_TICKS = 200
+
+
+@profiler.profiled("navigation.set_view_limits")
+def set_view_limits(top, xmin, xmax, ymin, ymax):
+    # Sets the limits of the view, and the ticks and spines that depend on them.
+    settings = top.figure_settings
+    settings.xmin, settings.xmax, settings.ymin, settings.ymax = xmin, xmax, ymin, ymax
+
+    set_figure_axes(top.fig, top.ax, xmin, xmax, ymin, ymax, top.figure_axes_color)
+    xtick_spacing = settings.xtick_spacing if (xmax - xmin) <= MAX_TICKS * settings.xtick_spacing else 0
+    ytick_spacing = settings.ytick_spacing if (ymax - ymin) <= MAX_TICKS * settings.ytick_spacing else 0
+    set_figure_ticks(top.fig, top.ax, xtick_spacing, xmin, xmax, ytick_spacing, ymin, ymax)
+    set_figure_ticklabels(top.fig, top.ax, settings.show_x_ticklabels.get(), xmin, xmax,
+                          settings.show_y_ticklabels.get(), ymin, ymax)
+    set_figure_grid(top.fig, top.ax, settings.show_grid.get(), xtick_spacing, ytick_spacing)
+
+
+@profiler.profiled("navigation.update_view")
+def update_view(top):
+    # Updates everything drawn that depends on the view rather than only being placed in it.
+    xmin, xmax = top.figure_settings.xmin, top.figure_settings.xmax
+    ymin, ymax = top.figure_settings.ymin, top.figure_settings.ymax
+
+    # If there are already trajectories plotted, update the circle and arrowhead for each flow so the appearance is
+    # maintained, and draw the level of each trajectory's pyramid that is accurate to a pixel at the new scale.
+    for idx, flow in enumerate(top.flows):
+        flow.update_circle_diameter(top.flow_circle_diameter, top.figure_width, top.figure_height, xmin, xmax, ymin,
+                                    ymax)
+        flow.update_arrowhead_points(top.flow_arrowhead_size, top.figure_width, top.figure_height, xmin, xmax, ymin,
+                                     ymax)
+        top.flow_trajectory_collection.lines[idx] = drawn_trajectory(top, flow)
+
+    # Graphs are only contoured again if the view has left the region they were contoured over.
+    for graph in top.graphs:
+        graph.update_contours(top.fig, top.ax, xmin, xmax, ymin, ymax)
+
+    # Flows of a loaded session that have come into view are read from the session file. The density is updated even
+    # if one of them cannot be read, which raises a SessionError.
+    try:
+        load_visible_flows(top)
+    finally:
+        reset_density(top)
+
+
+class ViewNavigator:
+    def __init__(self, top, zoom_factor=1.2, settle_delay=200):
+        self.top = top
+        self.zoom_factor = zoom_factor  # Factor by which one step of the mouse wheel zooms.
+        self.settle_delay = settle_delay  # Time without zooming after which the view is updated, in milliseconds.
+
+        self.pan_start = None  # Mouse position and view limits when the pan started.
+        self.pending_update = None
+
+        top.fig.canvas.mpl_connect("scroll_event", self.on_scroll)
+        top.fig.canvas.mpl_connect("button_press_event", self.on_press)
+        top.fig.canvas.mpl_connect("motion_notify_event", self.on_motion)
+        top.fig.canvas.mpl_connect("button_release_event", self.on_release)
+
+    @property
+    def is_panning(self):
+        return self.pan_start is not None
+
+    def limits(self):
+        settings = self.top.figure_settings
+        return settings.xmin, settings.xmax, settings.ymin, settings.ymax
+
+    def zoom(self, x, y, steps):
+        # Scales the view around the point x, y, by the same factor along both axes so that their scales stay equal.
+        xmin, xmax, ymin, ymax = self.limits()
+        scale = self.zoom_factor ** -steps
+        set_view_limits(self.top, x - (x - xmin) * scale, x + (xmax - x) * scale, y - (y - ymin) * scale,
+                        y + (ymax - y) * scale)
+
+    def pan(self, dx, dy):
+        # Moves the view from the limits it had when the pan started by the given offsets in pixels.
+        _, _, xmin, xmax, ymin, ymax = self.pan_start
+        bbox = self.top.ax.bbox
+        dx, dy = dx * (xmax - xmin) / bbox.width, dy * (ymax - ymin) / bbox.height
+        set_view_limits(self.top, xmin - dx, xmax - dx, ymin - dy, ymax - dy)
+
+    def on_scroll(self, event):
+        if event.inaxes != self.top.ax or self.top.is_animating or not self.top.figure_settings.is_configured:
+            return
+
+        self.zoom(event.xdata, event.ydata, event.step)
+        self.top.fig.canvas.draw_idle()
+        self.schedule_update()
+
+    def on_press(self, event):
+        if event.inaxes != self.top.ax or self.top.is_animating or not self.top.figure_settings.is_configured:
+            return
+
+        # Pressing the left button on a flow's circle shows its time series, and shift-clicking adds a flow, instead.
+        if event.button == 1 and event.key != "shift" and not self.top.flow_circle_collection.contains(event)[0] or \
+                event.button == 2:
+            self.pan_start = (event.x, event.y, *self.limits())
+
+    def on_motion(self, event):
+        if self.is_panning and event.x is not None:
+            self.pan(event.x - self.pan_start[0], event.y - self.pan_start[1])
+            self.top.fig.canvas.draw_idle()
+
+    def on_release(self, event):
+        if self.is_panning:
+            moved = self.limits() != self.pan_start[2:]
+            self.pan_start = None
+            if moved:
+                self.schedule_update(0)
+
+    def schedule_update(self, delay=None):
+        # Each scroll step pushes the update back, so that it runs once the wheel stops.
+        if self.pending_update is not None:
+            self.top.after_cancel(self.pending_update)
+
+        self.pending_update = self.top.after(self.settle_delay if delay is None else delay, self.settle)
+
+    def settle(self):
+        self.pending_update = None
+        if self.is_panning:
+            return  # A pan started before the update ran, and updates the view once it is released.
+
+        self.top.figure_settings.show_limits()
+        try:
+            update_view(self.top)
+        except SessionError as error:
+            messagebox.showerror("Error", "The flows in view could not be loaded:\n{}".format(error))
+        self.top.fig.canvas.draw_idle()
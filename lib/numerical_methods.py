@@ -1,6 +1,32 @@
 """
 Module that contains the different numerical methods that can be used to integrate flow trajectories. Feel free to add
-other methods below, so long as the input arguments and the order of return variables are the same.
+other methods below, so long as the input arguments and the order of return variables are the same. The x and y values
+are computed with the precision of x0 and y0 (float64 unless float32 integration is selected), while t is always
+float64.
+Functions whose names start with an underscore are helpers and are not listed as methods.
+
+The built-in methods also run in batch mode: if x0 and y0 are arrays of initial points, x and y are returned as
+(len(t), len(x0)) arrays with one column per initial point, and the differential equations are evaluated on whole
+arrays at each step. Methods that support batch mode are marked with the _batch decorator.
+
+Verlet and Yoshida4/Yoshida6 are symplectic methods for conservative (e.g. Hamiltonian) systems, whose closed orbits
+they keep closed over long times instead of spiralling in or out. When the system is separable, i.e. dx/dt does not
+depend on x and dy/dt does not depend on y (e.g. a pendulum, dx/dt = y, dy/dt = -sin(x)), each step is the explicit
+Stormer-Verlet (leapfrog) scheme. Otherwise (e.g. Lotka-Volterra), each step is the implicit midpoint rule, solved by
+fixed-point iteration. The Yoshida methods compose three or seven such steps into a 4th- or 6th-order method.
+
+BackwardEuler, TRBDF2 and Rosenbrock are implicit (or linearly implicit) methods for stiff systems, e.g. a Van der Pol
+oscillator with a large damping parameter, which they integrate stably with time-steps far larger than the explicit
+methods allow. They use the Jacobian of the system, which is derived once with SymPy when the equations are compiled
+expressions, and approximated with central differences otherwise or if SymPy is not installed. The Newton iterations
+solve the 2x2 linear systems in closed form, for every initial point of a batch at once.
+
+The stiff methods control their own step size, from an estimate of the local error of each step: the built-in estimate
+of TR-BDF2, and the difference with a first-order solution for BackwardEuler (the trapezoidal rule) and Rosenbrock (its
+embedded solution). Steps whose error exceeds the tolerances, or whose Newton iterations do not converge, are rejected
+and retried with a smaller step, so that sharp transitions are resolved while slow phases are crossed with steps much
+longer than dt. The values at multiples of dt are interpolated between the steps. Each initial point of a batch has its
+own step size, and those that still fail with the smallest step are set to NaN from then on.
 
 Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
 
@@ -15,13 +41,48 @@ warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Gen
 You should have received a copy of the GNU General Public License along with planarFlow. If not, see
 <https://www.gnu.org/licenses/>.
 """
+import math
 import numpy as np
 
+from .denseoutput import hermite
+
+# Substep weights of Yoshida's 4th-order (triple jump) and 6th-order (solution A) compositions.
+_YOSHIDA4_WEIGHTS = (1 / (2 - 2 ** (1 / 3)), -2 ** (1 / 3) / (2 - 2 ** (1 / 3)), 1 / (2 - 2 ** (1 / 3)))
+_YOSHIDA6_WEIGHTS = (0.784513610477560, 0.235573213359357, -1.17767998417887,
+                     1 - 2 * (0.784513610477560 + 0.235573213359357 - 1.17767998417887),
+                     -1.17767998417887, 0.235573213359357, 0.784513610477560)
+
+_MIDPOINT_ITERATIONS = 20
+
+# Error control of the stiff methods. The local error of each step must be within the tolerances, relative to the
+# values and absolute, and the Newton iterations stop once their update is within a fraction of them.
+_RELATIVE_TOLERANCE = 1e-4
+_ABSOLUTE_TOLERANCE = 1e-7
+_NEWTON_ITERATIONS = 10
+_NEWTON_TOLERANCE = 0.03
+_STEP_SAFETY = 0.9
+_MIN_STEP_FRACTION = 1e-12
 
+# Smaller batches of the stiff methods are integrated one initial point at a time, which is faster than stepping
+# arrays whose NumPy overhead outweighs the arithmetic.
+_MIN_BATCH_SIZE = 16
+
+# Parameters of the TR-BDF2 and (2-stage, L-stable) Rosenbrock methods, and the factor 2 * C of TR-BDF2's local error.
+_TRBDF2_GAMMA = 2 - np.sqrt(2)
+_TRBDF2_ERROR = 2 * (-3 * _TRBDF2_GAMMA ** 2 + 4 * _TRBDF2_GAMMA - 2) / (12 * (2 - _TRBDF2_GAMMA))
+_ROSENBROCK_GAMMA = 1 + 1 / np.sqrt(2)
+
+
+def _batch(method):
+    method.supports_batch = True
+    return method
+
+
+@_batch
 def RK2(dxdt, dydt, x0, y0, tmax, dt):
     t = np.arange(0., tmax + dt, dt)
-    x = np.zeros(len(t))
-    y = np.zeros(len(t))
+    x = np.zeros((len(t),) + np.shape(x0), dtype=np.result_type(x0, y0))
+    y = np.zeros((len(t),) + np.shape(x0), dtype=np.result_type(x0, y0))
 
     t[0] = 0.
     x[0] = x0
@@ -40,10 +101,11 @@ def RK2(dxdt, dydt, x0, y0, tmax, dt):
     return t, x, y
 
 
+@_batch
 def RK4(dxdt, dydt, x0, y0, tmax, dt):
     t = np.arange(0., tmax + dt, dt)
-    x = np.zeros(len(t))
-    y = np.zeros(len(t))
+    x = np.zeros((len(t),) + np.shape(x0), dtype=np.result_type(x0, y0))
+    y = np.zeros((len(t),) + np.shape(x0), dtype=np.result_type(x0, y0))
 
     t[0] = 0.
     x[0] = x0
@@ -68,10 +130,11 @@ def RK4(dxdt, dydt, x0, y0, tmax, dt):
     return t, x, y
 
 
+@_batch
 def Euler(dxdt, dydt, x0, y0, tmax, dt):
     t = np.arange(0., tmax + dt, dt)
-    x = np.zeros(len(t))
-    y = np.zeros(len(t))
+    x = np.zeros((len(t),) + np.shape(x0), dtype=np.result_type(x0, y0))
+    y = np.zeros((len(t),) + np.shape(x0), dtype=np.result_type(x0, y0))
 
     t[0] = 0.
     x[0] = x0
@@ -82,3 +145,363 @@ def Euler(dxdt, dydt, x0, y0, tmax, dt):
         y[k + 1] = y[k] + dt * dydt(t[k], x[k], y[k])
 
     return t, x, y
+
+
+@_batch
+def Verlet(dxdt, dydt, x0, y0, tmax, dt):
+    return _composition(dxdt, dydt, x0, y0, tmax, dt, (1.,))
+
+
+@_batch
+def Yoshida4(dxdt, dydt, x0, y0, tmax, dt):
+    return _composition(dxdt, dydt, x0, y0, tmax, dt, _YOSHIDA4_WEIGHTS)
+
+
+@_batch
+def Yoshida6(dxdt, dydt, x0, y0, tmax, dt):
+    return _composition(dxdt, dydt, x0, y0, tmax, dt, _YOSHIDA6_WEIGHTS)
+
+
+def _composition(dxdt, dydt, x0, y0, tmax, dt, weights):
+    t = np.arange(0., tmax + dt, dt)
+    x = np.zeros((len(t),) + np.shape(x0), dtype=np.result_type(x0, y0))
+    y = np.zeros((len(t),) + np.shape(x0), dtype=np.result_type(x0, y0))
+
+    t[0] = 0.
+    x[0] = x0
+    y[0] = y0
+
+    step = _verlet_step if _is_separable(dxdt, dydt) else _midpoint_step
+
+    for k in range(len(t) - 1):
+        t_k, x_k, y_k = t[k], x[k], y[k]
+        for weight in weights:
+            x_k, y_k = step(dxdt, dydt, t_k, x_k, y_k, weight * dt)
+            t_k = t_k + weight * dt
+
+        x[k + 1] = x_k
+        y[k + 1] = y_k
+
+    return t, x, y
+
+
+def _verlet_step(dxdt, dydt, t, x, y, dt):
+    # Half a step of x, a full step of y at the midpoint, and another half step of x. Since dx/dt does not depend on x
+    # and dy/dt does not depend on y, every stage is explicit.
+    x_half = x + dt / 2 * dxdt(t, x, y)
+    y_new = y + dt * dydt(t + dt / 2, x_half, y)
+    x_new = x_half + dt / 2 * dxdt(t + dt, x_half, y_new)
+
+    return x_new, y_new
+
+
+def _midpoint_step(dxdt, dydt, t, x, y, dt):
+    # Solves for the midpoint (x_mid, y_mid) = (x, y) + dt/2 * f(t + dt/2, x_mid, y_mid), starting from an Euler half
+    # step. In batch mode, the iteration stops once every initial point has converged.
+    t_mid = t + dt / 2
+    x_mid = x + dt / 2 * dxdt(t, x, y)
+    y_mid = y + dt / 2 * dydt(t, x, y)
+    tolerance = 4 * np.finfo(np.result_type(x, y)).eps
+
+    for _ in range(_MIDPOINT_ITERATIONS):
+        x_next = x + dt / 2 * dxdt(t_mid, x_mid, y_mid)
+        y_next = y + dt / 2 * dydt(t_mid, x_mid, y_mid)
+        converged = (np.all(np.abs(x_next - x_mid) <= tolerance * (1 + np.abs(x_next))) and
+                     np.all(np.abs(y_next - y_mid) <= tolerance * (1 + np.abs(y_next))))
+        x_mid, y_mid = x_next, y_next
+        if converged:
+            break
+
+    return 2 * x_mid - x, 2 * y_mid - y
+
+
+def _is_separable(dxdt, dydt):
+    # Compiled expressions list the variables they depend on. Other functions are probed at a few points instead.
+    x_variables = getattr(dxdt, "free_variables", None)
+    y_variables = getattr(dydt, "free_variables", None)
+    if x_variables is not None and y_variables is not None:
+        return "x" not in x_variables and "y" not in y_variables
+
+    points = np.random.default_rng(0).uniform(-1, 1, (8, 2))
+    try:
+        with np.errstate(all="ignore"):
+            return all(np.allclose(dxdt(0.5, x, y), dxdt(0.5, x + 0.5, y), equal_nan=True) and
+                       np.allclose(dydt(0.5, x, y), dydt(0.5, x, y + 0.5), equal_nan=True) for x, y in points)
+    except (ArithmeticError, ValueError, TypeError):
+        return False
+
+
+@_batch
+def BackwardEuler(dxdt, dydt, x0, y0, tmax, dt):
+    return _adaptive(_backward_euler_step, 1, dxdt, dydt, x0, y0, tmax, dt)
+
+
+@_batch
+def TRBDF2(dxdt, dydt, x0, y0, tmax, dt):
+    return _adaptive(_trbdf2_step, 2, dxdt, dydt, x0, y0, tmax, dt)
+
+
+@_batch
+def Rosenbrock(dxdt, dydt, x0, y0, tmax, dt):
+    return _adaptive(_rosenbrock_step, 1, dxdt, dydt, x0, y0, tmax, dt)
+
+
+def _adaptive(step, order, dxdt, dydt, x0, y0, tmax, dt):
+    """
+    Integrates with the given step of a stiff method, whose size is controlled by the step's estimate of its local
+    error, of the given order in the step size. Steps whose error is too large, or whose Newton iterations do not
+    converge, are rejected and retried with a smaller step. The values are returned at multiples of dt, like the other
+    methods, and are interpolated between the steps, which may be much longer or shorter than dt, by the cubic Hermite
+    interpolant of the values and slopes at both ends. Initial points that still fail with the smallest step are set to
+    NaN from then on. Each initial point of a batch has its own steps, and small batches are integrated point by point.
+    """
+    t = np.arange(0., tmax + dt, dt)
+    x = np.zeros((len(t),) + np.shape(x0), dtype=np.result_type(x0, y0))
+    y = np.zeros((len(t),) + np.shape(x0), dtype=np.result_type(x0, y0))
+
+    t[0] = 0.
+    x[0] = x0
+    y[0] = y0
+
+    # Steps that are rejected may overflow, or leave the domain of the equations.
+    with np.errstate(all="ignore"):
+        arguments = (step, -1 / (order + 1), dxdt, dydt, _jacobian(dxdt, dydt))
+        if np.ndim(x0) == 0:
+            _integrate_point(*arguments, t, x, y, _MIN_STEP_FRACTION * dt)
+        elif np.size(x0) < _MIN_BATCH_SIZE:
+            for x_i, y_i in zip(x.reshape(len(t), -1).T, y.reshape(len(t), -1).T):
+                _integrate_point(*arguments, t, x_i, y_i, _MIN_STEP_FRACTION * dt)
+        else:
+            _integrate_batch(*arguments, t, x, y, _MIN_STEP_FRACTION * dt)
+
+    return t, x, y
+
+
+def _integrate_point(step, exponent, dxdt, dydt, jacobian, t, x, y, min_step):
+    # A single initial point in double precision is integrated with Python floats, whose arithmetic is several times
+    # faster. The Jacobian at the current point is kept until a step from it is accepted.
+    t_k, x_k, y_k = 0., x[0], y[0]
+    if x.dtype == np.float64:
+        x_k, y_k = float(x_k), float(y_k)
+    slope = dxdt(t_k, x_k, y_k), dydt(t_k, x_k, y_k)
+    partials = None
+    h = t[1] - t[0]
+    k = 1  # Index of the next value to return.
+
+    while k < len(t):
+        remaining = t[-1] - t_k
+        h_step = remaining if 1.1 * h >= remaining else h
+
+        if partials is None:
+            partials = jacobian(t_k, x_k, y_k)
+
+        x_new, y_new, error_x, error_y, failed, new_slope = step(dxdt, dydt, t_k, h_step, x_k, y_k, slope, partials)
+        error = _error_norm(x_k, y_k, x_new, y_new, error_x, error_y, failed)
+
+        if error <= 1 or h_step <= min_step:
+            t_new = t[-1] if h_step == remaining else t_k + h_step
+            if error > 1:
+                x_new = y_new = math.nan
+                new_slope = math.nan, math.nan
+
+            # Values at the multiples of dt within the step.
+            end = k + np.searchsorted(t[k:], t_new, side="right")
+            if end > k:
+                theta = (t[k:end] - t_k) / (t_new - t_k)
+                x[k:end] = hermite(theta, t_new - t_k, x_k, x_new, slope[0], new_slope[0])
+                y[k:end] = hermite(theta, t_new - t_k, y_k, y_new, slope[1], new_slope[1])
+                k = end
+
+            t_k, x_k, y_k = t_new, x_new, y_new
+            slope, partials = new_slope, None
+
+        # The step size follows the error, changing by at most a factor of 5.
+        factor = _STEP_SAFETY * error ** exponent if error > 0 else 5.
+        h = max(h_step * min(max(factor, 0.2), 5.), min_step)
+
+
+def _integrate_batch(step, exponent, dxdt, dydt, jacobian, t, x, y, min_step):
+    # Each initial point has its own time and step size, so that the short steps of one point, e.g. through a fast
+    # transition, do not hold back the others. Each iteration steps the points that have not reached the end, and the
+    # values at the multiples of dt within the accepted steps are interpolated for all of them at once.
+    x, y = x.reshape(len(t), -1), y.reshape(len(t), -1)
+    n = x.shape[1]
+
+    t_k, x_k, y_k = np.zeros(n), x[0].copy(), y[0].copy()
+    slope_x, slope_y = np.empty(n), np.empty(n)
+    slope_x[:], slope_y[:] = dxdt(0., x_k, y_k), dydt(0., x_k, y_k)
+    h = np.full(n, t[1] - t[0])
+    k = np.ones(n, dtype=np.intp)  # Index of the next value to return, for each point.
+    active = np.arange(n)
+
+    while active.size:
+        t_a, x_a, y_a = t_k[active], x_k[active], y_k[active]
+        remaining = t[-1] - t_a
+        h_step = np.where(1.1 * h[active] >= remaining, remaining, h[active])
+
+        x_new, y_new, error_x, error_y, failed, (new_slope_x, new_slope_y) = step(
+            dxdt, dydt, t_a, h_step, x_a, y_a, (slope_x[active], slope_y[active]), jacobian(t_a, x_a, y_a))
+        error = _error_norm(x_a, y_a, x_new, y_new, error_x, error_y, failed)
+
+        accepted = (error <= 1) | (h_step <= min_step)
+        lost = accepted & (error > 1)
+        if lost.any():
+            x_new, y_new = np.where(lost, np.nan, x_new), np.where(lost, np.nan, y_new)
+            new_slope_x, new_slope_y = np.where(lost, np.nan, new_slope_x), np.where(lost, np.nan, new_slope_y)
+
+        # Values at the multiples of dt within the accepted steps, gathered as (row, point) pairs.
+        points = active[accepted]
+        t0, t1 = t_a[accepted], np.where(h_step == remaining, t[-1], t_a + h_step)[accepted]
+        end = np.searchsorted(t, t1, side="right")
+        counts = end - k[points]
+        if counts.any():
+            step_indices = np.repeat(np.arange(len(points)), counts)
+            rows = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + k[points][step_indices]
+            columns = points[step_indices]
+            lengths = (t1 - t0)[step_indices]
+            theta = (t[rows] - t0[step_indices]) / lengths
+            x[rows, columns] = hermite(theta, lengths, x_a[accepted][step_indices], x_new[accepted][step_indices],
+                                       slope_x[columns], new_slope_x[accepted][step_indices])
+            y[rows, columns] = hermite(theta, lengths, y_a[accepted][step_indices], y_new[accepted][step_indices],
+                                       slope_y[columns], new_slope_y[accepted][step_indices])
+            k[points] = end
+
+        t_k[points], x_k[points], y_k[points] = t1, x_new[accepted], y_new[accepted]
+        slope_x[points], slope_y[points] = new_slope_x[accepted], new_slope_y[accepted]
+
+        # The step sizes follow the errors, changing by at most a factor of 5.
+        factor = np.where(error > 0, _STEP_SAFETY * error ** exponent, 5.)
+        h[active] = np.maximum(h_step * np.clip(factor, 0.2, 5.), min_step)
+        active = active[t_k[active] < t[-1]]
+
+
+def _error_norm(x, y, x_new, y_new, error_x, error_y, failed):
+    # Root mean square of the error relative to the tolerances, for each initial point. It is infinite for steps that
+    # failed or left the finite values, and zero for initial points that were already not finite. Single initial points
+    # are handled without NumPy's overhead.
+    scale_x = _ABSOLUTE_TOLERANCE + _RELATIVE_TOLERANCE * np.maximum(abs(x), abs(x_new))
+    scale_y = _ABSOLUTE_TOLERANCE + _RELATIVE_TOLERANCE * np.maximum(abs(y), abs(y_new))
+    error = (((error_x / scale_x) ** 2 + (error_y / scale_y) ** 2) / 2) ** 0.5
+
+    if isinstance(error, np.ndarray):
+        error = np.where(np.isfinite(error) & np.logical_not(failed), error, np.inf)
+        return np.where(np.isfinite(x) & np.isfinite(y), error, 0.)
+
+    if not (math.isfinite(x) and math.isfinite(y)):
+        return 0.
+    if failed or not math.isfinite(error):
+        return math.inf
+    return float(error)
+
+
+def _newton_matrix(partials, h):
+    # Entries and determinant of the Newton matrix I - h * J, which is inverted in closed form.
+    fx_x, fx_y, fy_x, fy_y = partials[:4]
+    m11, m12, m21, m22 = 1 - h * fx_x, -h * fx_y, -h * fy_x, 1 - h * fy_y
+    return m11, m12, m21, m22, m11 * m22 - m12 * m21
+
+
+def _solve(matrix, rhs_x, rhs_y):
+    m11, m12, m21, m22, det = matrix
+    return (m22 * rhs_x - m12 * rhs_y) / det, (m11 * rhs_y - m21 * rhs_x) / det
+
+
+def _backward_euler_step(dxdt, dydt, t, h, x, y, slope, partials):
+    # The error is estimated by the difference with the trapezoidal rule, h/2 * (f(t + h) - f(t)), filtered by the
+    # Newton matrix so that the estimate stays bounded for the stiff components.
+    matrix = _newton_matrix(partials, h)
+    x_new, y_new, failed = _newton_solve(dxdt, dydt, t + h, h, x, y, x + h * slope[0], y + h * slope[1], matrix)
+
+    new_slope = dxdt(t + h, x_new, y_new), dydt(t + h, x_new, y_new)
+    error_x, error_y = _solve(matrix, h / 2 * (new_slope[0] - slope[0]), h / 2 * (new_slope[1] - slope[1]))
+    return x_new, y_new, error_x, error_y, failed, new_slope
+
+
+def _trbdf2_step(dxdt, dydt, t, h, x, y, slope, partials):
+    # Both stages have the same Newton matrix, since gamma / 2 = (1 - gamma) / (2 - gamma).
+    gamma = _TRBDF2_GAMMA
+    d = gamma / 2 * h
+    matrix = _newton_matrix(partials, d)
+
+    # Trapezoidal rule from t to t + gamma * h.
+    x_gamma, y_gamma, failed = _newton_solve(dxdt, dydt, t + gamma * h, d, x + d * slope[0], y + d * slope[1],
+                                             x + gamma * h * slope[0], y + gamma * h * slope[1], matrix)
+    slope_gamma = dxdt(t + gamma * h, x_gamma, y_gamma), dydt(t + gamma * h, x_gamma, y_gamma)
+
+    # BDF2 from t and t + gamma * h to t + h, starting from the extrapolation of the trapezoidal stage.
+    x_new, y_new, failed_bdf2 = _newton_solve(dxdt, dydt, t + h, d,
+                                              (x_gamma - (1 - gamma) ** 2 * x) / (gamma * (2 - gamma)),
+                                              (y_gamma - (1 - gamma) ** 2 * y) / (gamma * (2 - gamma)),
+                                              x_gamma + (1 - gamma) * h * slope_gamma[0],
+                                              y_gamma + (1 - gamma) * h * slope_gamma[1], matrix)
+    new_slope = dxdt(t + h, x_new, y_new), dydt(t + h, x_new, y_new)
+
+    # The built-in estimate of the local error, C * h^3 times the third derivative, from the slopes at the three
+    # points, filtered by the Newton matrix.
+    error_x, error_y = (_TRBDF2_ERROR * h * (slope[i] / gamma - slope_gamma[i] / (gamma * (1 - gamma)) +
+                                            new_slope[i] / (1 - gamma)) for i in (0, 1))
+    error_x, error_y = _solve(matrix, error_x, error_y)
+    return x_new, y_new, error_x, error_y, failed | failed_bdf2, new_slope
+
+
+def _rosenbrock_step(dxdt, dydt, t, h, x, y, slope, partials):
+    # Each stage solves (I - gamma * h * J) k = rhs, with the Jacobian J evaluated at the start of the step. The error
+    # is the difference with the embedded first-order solution (x, y) + k1.
+    gamma = _ROSENBROCK_GAMMA
+    fx_t, fy_t = partials[4:]
+    matrix = _newton_matrix(partials, gamma * h)
+
+    k1_x, k1_y = _solve(matrix, h * slope[0] + gamma * h ** 2 * fx_t, h * slope[1] + gamma * h ** 2 * fy_t)
+    k2_x, k2_y = _solve(matrix, h * dxdt(t + h, x + k1_x, y + k1_y) - 2 * k1_x - gamma * h ** 2 * fx_t,
+                        h * dydt(t + h, x + k1_x, y + k1_y) - 2 * k1_y - gamma * h ** 2 * fy_t)
+
+    error_x, error_y = 0.5 * (k1_x + k2_x), 0.5 * (k1_y + k2_y)
+    x_new, y_new = x + k1_x + error_x, y + k1_y + error_y
+    return x_new, y_new, error_x, error_y, False, (dxdt(t + h, x_new, y_new), dydt(t + h, x_new, y_new))
+
+
+def _newton_solve(dxdt, dydt, t, h, rhs_x, rhs_y, x, y, matrix):
+    # Solves (x, y) - h * f(t, x, y) = (rhs_x, rhs_y) with Newton's method, starting from (x, y), with the Newton
+    # matrix of the start of the step. Returns the solution and whether the iterations failed to converge, for each
+    # initial point. In batch mode, the iteration stops once every initial point has converged.
+    for _ in range(_NEWTON_ITERATIONS):
+        delta_x, delta_y = _solve(matrix, x - h * dxdt(t, x, y) - rhs_x, y - h * dydt(t, x, y) - rhs_y)
+        x = x - delta_x
+        y = y - delta_y
+
+        # Converged once the update is a small fraction of the error tolerated. Values that are not finite are left
+        # to the error control.
+        failed = ((abs(delta_x) > _NEWTON_TOLERANCE * (_ABSOLUTE_TOLERANCE + _RELATIVE_TOLERANCE * abs(x))) |
+                  (abs(delta_y) > _NEWTON_TOLERANCE * (_ABSOLUTE_TOLERANCE + _RELATIVE_TOLERANCE * abs(y))))
+        if not (failed.any() if isinstance(failed, np.ndarray) else failed):
+            break
+
+    return x, y, failed
+
+
+def _jacobian(dxdt, dydt):
+    # Returns a function of (t, x, y) that evaluates the partial derivatives (df/dx, df/dy, dg/dx, dg/dy, df/dt, dg/dt)
+    # of f = dx/dt and g = dy/dt. Compiled expressions are differentiated symbolically, other functions numerically.
+    expressions = (getattr(dxdt, "expression", None), getattr(dydt, "expression", None))
+    if None not in expressions:
+        partials = [expression.derivative(variable) for variable in ("x", "y", "t") for expression in expressions]
+        if None not in partials:
+            df_dx, dg_dx, df_dy, dg_dy, df_dt, dg_dt = [partial.kernel for partial in partials]
+            return lambda t, x, y: (df_dx(t, x, y), df_dy(t, x, y), dg_dx(t, x, y), dg_dy(t, x, y), df_dt(t, x, y),
+                                    dg_dt(t, x, y))
+
+    return lambda t, x, y: _finite_difference_jacobian(dxdt, dydt, t, x, y)
+
+
+def _finite_difference_jacobian(dxdt, dydt, t, x, y):
+    # Central differences, with steps scaled to the magnitude of each variable.
+    scale = np.cbrt(np.finfo(np.result_type(x, y)).eps)
+    h_t, h_x, h_y = scale * np.maximum(1, np.abs(t)), scale * np.maximum(1, np.abs(x)), scale * np.maximum(1, np.abs(y))
+
+    partials = []
+    for dt, dx, dy, h in ((0, h_x, 0, h_x), (0, 0, h_y, h_y), (h_t, 0, 0, h_t)):
+        partials.append(((dxdt(t + dt, x + dx, y + dy) - dxdt(t - dt, x - dx, y - dy)) / (2 * h),
+                         (dydt(t + dt, x + dx, y + dy) - dydt(t - dt, x - dx, y - dy)) / (2 * h)))
+
+    (fx_x, fy_x), (fx_y, fy_y), (fx_t, fy_t) = partials
+    return fx_x, fx_y, fy_x, fy_y, fx_t, fy_t
@@ -0,0 +1,108 @@
+"""
+Process pool shared by the analyses that split their work into tiles, such as basin-of-attraction maps. The pool is
+created when it is first needed and uses the "spawn" start method on every platform, since forking a process that
+runs a Tk interpreter is unsafe. Work submitted to the pool must be picklable: numerical methods are pickled by
+reference and compiled expressions are recompiled from their text in the worker processes.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import os
+import atexit
+import multiprocessing
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+
+# Number of tiles per worker process that the work is split into (and the least number of tiles), so that progress can
+# be shown while it runs.
+TILES_PER_WORKER = 4
+MIN_TILES = 16
+
+_pool = None
+
+
+def worker_count():
+    return os.cpu_count() or 1
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=worker_count(), mp_context=multiprocessing.get_context("spawn"))
+        atexit.register(shutdown_pool)
+
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def row_tiles(rows, columns, min_points=2 ** 14):
+    # Splits a rows x columns raster into bands of whole rows, with enough bands to keep every worker busy and update
+    # the result regularly, but enough points per band to amortize the cost of each numerical method call.
+    bands = max(1, min(max(MIN_TILES, TILES_PER_WORKER * worker_count()), rows * columns // min_points, rows))
+    edges = [round(i * rows / bands) for i in range(bands + 1)]
+    return [slice(start, stop) for start, stop in zip(edges[:-1], edges[1:])]
+
+
+class TiledComputation(ABC):
+    """
+    Base class of the computations split into tiles that run in the process pool, such as raster maps and parameter
+    sweeps. Each tile is a slice of the size items computed, e.g. rows or parameter values. Subclasses submit their
+    tiles with submit_tiles, and implement add_tile, which receives the result of each tile as it is collected.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.futures = []
+        self.done = 0
+
+    def submit_tiles(self, function, tiles, arguments):
+        # Runs function(*arguments(tile)) for each tile in the pool.
+        pool = get_pool()
+        self.futures = [(tile, pool.submit(function, *arguments(tile))) for tile in tiles]
+
+    def cancel(self):
+        for _, future in self.futures:
+            future.cancel()
+
+    def collect(self, wait=False):
+        # Adds the tiles that are done, or every tile if wait is set. Returns the tiles added, and the exception raised
+        # by a failed tile, if any.
+        added = []
+        pending = []
+        for tile, future in self.futures:
+            if wait or future.done():
+                if future.exception() is not None:
+                    self.cancel()
+                    return added, future.exception()
+
+                self.add_tile(tile, future.result())
+                self.done += tile.stop - tile.start
+                added.append(tile)
+            else:
+                pending.append((tile, future))
+
+        self.futures = pending
+        return added, None
+
+    def is_complete(self):
+        return self.done == self.size
+
+    @abstractmethod
+    def add_tile(self, tile, result):
+        # Receives the result of the tile, a slice of the items computed.
+        pass
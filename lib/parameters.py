@@ -0,0 +1,136 @@
+"""
+Functions for the parameters of the differential equations. Names in dx/dt and dy/dt other than t, x, y, the constants
+and the functions are parameters, which are set with sliders instead of by editing the equations. Changing a parameter
+compiles the equations again with the new values and re-integrates every flow from its initial point, in batch mode if
+the numerical method supports it, keeping the flows' circles and colors.
+
+The trajectories of recently visited parameter values are cached per system and set of initial points, so that scrubbing
+back over values already visited does not integrate again.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+
+from .expressions import Expression
+from .flow import integrate_flows
+from .density import reset_density
+from .pyramid import drawn_trajectory
+from .frames.tiledmapframe import clear_tiled_map
+from .lrucache import LRUCache
+from .profiler import profiler
+
+# Default value and slider range of a parameter that has not been set before.
+PARAMETER_DEFAULT = (1., 0., 2.)
+
+# Number of trajectory points kept in the cache, least recently used values first out. About 256 MB in float64.
+PARAMETER_CACHE_POINTS = 2 ** 24
+
+_cache = LRUCache(PARAMETER_CACHE_POINTS, lambda entry: sum(len(values[3]) for values in entry))
+
+
+def cache_key(top, seeds):
+    # The equations' representation includes the values of their parameters.
+    equations = top.differential_equations
+    return (str(equations.dxdt), str(equations.dydt), top.numerical_method, top.precision, equations.tmax,
+            equations.dt, seeds.tobytes())
+
+
+def cached_trajectories(key):
+    return _cache.get(key)
+
+
+def clear_parameter_cache():
+    # Called before the trajectory store is cleared, since the cached trajectories may be views of its scratch files.
+    _cache.clear()
+
+
+def cache_trajectories(key, trajectories):
+    _cache.put(key, trajectories)
+
+
+def bind_parameters(top, values):
+    # Compiles the equations with the given parameter values. New flows are integrated with these equations.
+    equations = top.differential_equations
+    equations.parameters = dict(values)
+    equations.dxdt = Expression(equations.equation_strings["dxdt"], ("t", "x", "y"), equations.parameters)
+    equations.dydt = Expression(equations.equation_strings["dydt"], ("t", "x", "y"), equations.parameters)
+
+
+def clear_analysis(top):
+    # Removes the limit cycles, basin map and FTLE field, which only hold for the equations they were computed for.
+    for cycle in top.limit_cycles:
+        cycle.delete_line()
+
+    clear_tiled_map(top, "basin_map", "basin_image")
+    clear_tiled_map(top, "ftle_field", "ftle_image")
+    top.limit_cycles.clear()
+
+
+@profiler.profiled("set_parameter_values")
+def set_parameter_values(top, values):
+    bind_parameters(top, values)
+    clear_analysis(top)
+    reintegrate_flows(top)
+
+    if top.time_series is not None and top.time_series.flow in top.flows:
+        top.time_series.show_flow(top.time_series.flow)
+
+    top.fig.canvas.draw_idle()
+
+
+def reintegrate_flows(top):
+    # Integrates every flow again with the current equations, or takes its trajectory from the cache.
+    if not top.flows:
+        return
+
+    equations = top.differential_equations
+    seeds = np.array([(flow.x0, flow.y0) for flow in top.flows], dtype=np.float64)
+    for flow in top.flows:
+        flow.dxdt, flow.dydt = equations.dxdt, equations.dydt
+        flow.source = None  # Flows of a loaded session are replaced rather than read.
+
+    key = cache_key(top, seeds)
+    trajectories = cached_trajectories(key)
+    if trajectories is None:
+        integrate_flows(top.flows, top.numerical_method, top.numerical_method_dict,
+                        top.precision_dict[top.precision][0], top.trajectory_store)
+
+        # Trajectories in the scratch files are overwritten when the flows are integrated again, so only those held in
+        # memory are cached.
+        if not any(isinstance(flow.trajectory, np.memmap) for flow in top.flows):
+            cache_trajectories(key, [(flow.t_values, flow.x_values, flow.y_values, flow.trajectory)
+                                     for flow in top.flows])
+    else:
+        for flow, values in zip(top.flows, trajectories):
+            flow.t_values, flow.x_values, flow.y_values, flow.trajectory = values
+
+    # Initial points may become or stop being equilibria, whose arrowhead is their circle.
+    with np.errstate(all="ignore"):
+        is_equilibrium = ((np.abs(equations.dxdt(0., seeds[:, 0], seeds[:, 1])) < 1E-15) &
+                          (np.abs(equations.dydt(0., seeds[:, 0], seeds[:, 1])) < 1E-15))
+
+    xmin, xmax = top.figure_settings.xmin, top.figure_settings.xmax
+    ymin, ymax = top.figure_settings.ymin, top.figure_settings.ymax
+    for idx, flow in enumerate(top.flows):
+        if flow.is_equilibrium != is_equilibrium[idx]:
+            flow.is_equilibrium = bool(is_equilibrium[idx])
+            flow.create_arrowhead(top.flow_arrowhead_size, top.figure_width, top.figure_height, xmin, xmax, ymin, ymax)
+            top.flow_arrowhead_collection.patches[idx] = flow.arrowhead
+        else:
+            flow.update_arrowhead_points(top.flow_arrowhead_size, top.figure_width, top.figure_height, xmin, xmax, ymin,
+                                         ymax)
+
+        top.flow_trajectory_collection.lines[idx] = drawn_trajectory(top, flow)
+
+    reset_density(top)
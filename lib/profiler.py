@@ -0,0 +1,128 @@
+"""
+Profiler class file. A single profiler instance is shared by the whole app and records how long integration,
+contouring, path conversion, plot configuration and canvas drawing take, along with counters such as the number of
+evaluations of the differential equations. It is disabled by default, in which case each instrumented call only costs
+one attribute check. The recorded events can be shown in the app's performance overlay or exported as a Chrome trace,
+which can be opened in chrome://tracing or https://ui.perfetto.dev.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import os
+import json
+import time
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class Profiler:
+    def __init__(self, max_events=200000):
+        self.enabled = False
+        self.origin = time.perf_counter()
+        self.events = deque(maxlen=max_events)  # Chrome trace events, oldest events are dropped first.
+        self.stats = {}  # name -> [calls, total time, last time], in seconds
+        self.counters = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.origin = time.perf_counter()
+        self.events.clear()
+        self.stats.clear()
+        self.counters.clear()
+
+    def record(self, name, category, start, duration):
+        self.events.append({"name": name, "cat": category, "ph": "X", "ts": (start - self.origin) * 1E6,
+                            "dur": duration * 1E6, "pid": os.getpid(), "tid": threading.get_ident()})
+
+        stats = self.stats.setdefault(name, [0, 0., 0.])
+        stats[0] += 1
+        stats[1] += duration
+        stats[2] = duration
+
+        if self.counters:
+            self.events.append({"name": "counters", "ph": "C", "ts": (start + duration - self.origin) * 1E6,
+                                "pid": os.getpid(), "args": dict(self.counters)})
+
+    @contextmanager
+    def span(self, name, category="planarflow"):
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, category, start, time.perf_counter() - start)
+
+    def profiled(self, name, category="planarflow"):
+        # Decorator that records each call of the decorated function as a span.
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(name, category, start, time.perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def counted(self, name, function):
+        # Wraps a right-hand side f(t, x, y) so that each point it is evaluated at is counted, whether it is called
+        # with scalars or with arrays of points.
+        @functools.wraps(function)
+        def wrapper(t, x, y):
+            self.count(name, np.size(x))
+            return function(t, x, y)
+
+        return wrapper
+
+    def instrument_canvas(self, canvas, name="canvas.draw"):
+        # Replaces the canvas' draw method on the instance, which also covers the draws requested through draw_idle.
+        canvas.draw = self.profiled(name, "draw")(canvas.draw)
+
+    def summary(self):
+        lines = ["{:<36}{:>8}{:>12}{:>12}".format("", "calls", "total [ms]", "last [ms]")]
+        for name, (calls, total, last) in sorted(self.stats.items(), key=lambda item: -item[1][1]):
+            lines.append("{:<36}{:>8d}{:>12.1f}{:>12.2f}".format(name, calls, total * 1E3, last * 1E3))
+
+        for name, value in sorted(self.counters.items()):
+            lines.append("{:<36}{:>8d}".format(name, value))
+
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, filename):
+        metadata = [{"name": "process_name", "ph": "M", "pid": os.getpid(), "args": {"name": "planarFlow"}}]
+        with open(filename, "w") as file:
+            json.dump({"traceEvents": metadata + list(self.events), "displayTimeUnit": "ms"}, file)
+
+
+profiler = Profiler()
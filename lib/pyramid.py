@@ -0,0 +1,112 @@
+"""
+TrajectoryPyramid class file. A pyramid keeps decimated versions of a trajectory, built lazily as views ask for them:
+level k keeps every 2^k-th point and the last point. Each level has a bound on how far, along x and along y, the
+trajectory strays from the level's polyline, so that the coarsest level drawn within a fraction of a pixel of the
+trajectory can be picked for the current view. Zoomed-out views of long trajectories then only draw, bin or decimate a
+small fraction of their points.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+
+# Distance in pixels within which a level must follow the trajectory to be drawn in its place.
+PIXEL_TOLERANCE = 0.5
+
+# Trajectories with fewer points are always drawn whole.
+MIN_PYRAMID_POINTS = 64
+
+
+class TrajectoryPyramid:
+    def __init__(self, trajectory):
+        self.trajectory = trajectory
+        self.top_level = int(np.ceil(np.log2(max(1, len(trajectory) - 1))))  # Level keeping only the two ends.
+
+        self.levels = {0: trajectory}
+        self.errors = [np.zeros(2)]
+        self.spans = None
+
+    def indices(self, level):
+        # Indices of the trajectory's points kept at the level.
+        n = len(self.trajectory)
+        indices = np.arange(0, n, 2 ** level)
+        if indices[-1] != n - 1:
+            indices = np.append(indices, n - 1)
+
+        return indices
+
+    def points(self, level):
+        if level not in self.levels:
+            self.levels[level] = np.ascontiguousarray(self.trajectory[self.indices(level)])
+
+        return self.levels[level]
+
+    def error(self, level):
+        """
+        Bound on the x and y distances between the trajectory and the level's polyline, both taken at the same index.
+        Going up a level drops every other point, each of which lies between two points that are kept, so the polyline
+        moves by at most the distance of a dropped point from the chord of its neighbors. The bounds of the levels add
+        up, and are computed once, from the finest level up. Trajectories that are not finite have no finite bound.
+        """
+        n = len(self.trajectory)
+        while len(self.errors) <= level:
+            # Every stride-th point, a view of the trajectory, of which the odd ones are dropped. Those followed by
+            # another point lie halfway between their neighbors.
+            stride = 2 ** (len(self.errors) - 1)
+            previous = self.trajectory[::stride]
+            pairs = (len(previous) - 1) // 2
+
+            with np.errstate(all="ignore"):
+                deviation = np.zeros(2)
+                if pairs:
+                    deviation = np.abs(previous[1:2 * pairs:2] - 0.5 * (previous[0:2 * pairs - 1:2].astype(np.float64) +
+                                                                        previous[2:2 * pairs + 1:2])).max(axis=0)
+
+                # A last odd point that is not the trajectory's last point lies between the point before it and the
+                # trajectory's last point, which is kept.
+                last = (len(previous) - 1) * stride
+                if len(previous) % 2 == 0 and last != n - 1:
+                    fraction = stride / (n - 1 - (last - stride))
+                    start = previous[-2].astype(np.float64)
+                    deviation = np.maximum(deviation, np.abs(previous[-1] - start -
+                                                             fraction * (self.trajectory[-1] - start)))
+
+            self.errors.append(self.errors[-1] + deviation)
+
+        return self.errors[level]
+
+    def select(self, x_scale, y_scale, tolerance=PIXEL_TOLERANCE):
+        # Coarsest level within the tolerance of the trajectory, for x_scale and y_scale pixels per unit.
+        level = 0
+        while level < self.top_level:
+            x_error, y_error = self.error(level + 1)
+            if not (x_error * x_scale <= tolerance and y_error * y_scale <= tolerance):
+                break
+            level += 1
+
+        return level
+
+    def value_spans(self):
+        # Ranges of the x and y values, which set the scales of the time series.
+        if self.spans is None:
+            with np.errstate(all="ignore"):
+                self.spans = np.nanmax(self.trajectory, axis=0) - np.nanmin(self.trajectory, axis=0)
+
+        return self.spans
+
+
+def drawn_trajectory(top, flow):
+    # The points of the flow's trajectory drawn in the top window's view.
+    settings = top.figure_settings
+    return flow.drawn_trajectory(top.figure_width, top.figure_height, settings.xmin, settings.xmax, settings.ymin,
+                                 settings.ymax)
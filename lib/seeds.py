@@ -0,0 +1,195 @@
+"""
+Generators of initial points for adding many trajectories at once. Each returns the x and y coordinates of n points as
+arrays, built with array operations rather than one point at a time, which are integrated together in batch mode.
+
+Points covering a region (xmin, xmax, ymin, ymax) are either uniformly random, or spread more evenly than random points
+so that fewer trajectories cover the region as well:
+    - Sobol and Halton points are low-discrepancy sequences, i.e. every part of the region gets close to its share of
+      the points however many are taken. Both are shifted by a random offset (modulo the region), so that adding them
+      again gives new points.
+    - Poisson-disk points are random points no closer to each other than a radius chosen from n.
+    - Latin hypercube points have exactly one point in each of n columns and each of n rows of the region.
+Points can also be placed around a circle, or along a parametric curve (x(s), y(s)) for 0 <= s <= 1, equally spaced by
+arc length.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import ast
+import numpy as np
+
+from .expressions import Expression, ExpressionError
+
+# Number of samples of a curve per point placed on it, used to measure its arc length.
+CURVE_SAMPLES = 64
+
+# Rounds of candidates drawn for Poisson-disk sampling before giving up on reaching n points.
+POISSON_ROUNDS = 50
+
+
+def scale_to_region(u, v, extent):
+    # Maps points of the unit square to the region.
+    xmin, xmax, ymin, ymax = extent
+    return xmin + u * (xmax - xmin), ymin + v * (ymax - ymin)
+
+
+def uniform_seeds(n, extent, rng):
+    return scale_to_region(rng.random(n), rng.random(n), extent)
+
+
+def radical_inverse(indices, base):
+    # Reflects the digits of the indices in the given base about the radix point, e.g. 6 = 110 in base 2 gives 0.011.
+    result = np.zeros(len(indices))
+    indices = indices.copy()
+    scale = 1. / base
+    while indices.any():
+        result += (indices % base) * scale
+        indices //= base
+        scale /= base
+
+    return result
+
+
+def halton_seeds(n, extent, rng):
+    indices = np.arange(1, n + 1)
+    shift = rng.random(2)
+    return scale_to_region((radical_inverse(indices, 2) + shift[0]) % 1., (radical_inverse(indices, 3) + shift[1]) % 1.,
+                           extent)
+
+
+def sobol_seeds(n, extent, rng, bits=32):
+    # The first two dimensions of the Sobol sequence. The first is the radical inverse in base 2, and the direction
+    # numbers of the second follow from the primitive polynomial x + 1. Point i is the XOR of the direction numbers of
+    # the bits set in i.
+    indices = np.arange(n, dtype=np.uint64)
+    directions = np.uint64(1) << np.arange(bits - 1, -1, -1, dtype=np.uint64)
+    second_directions = np.empty(bits, dtype=np.uint64)
+    second_directions[0] = directions[0]
+    for k in range(1, bits):
+        second_directions[k] = second_directions[k - 1] ^ (second_directions[k - 1] >> np.uint64(1))
+
+    u = np.zeros(n, dtype=np.uint64)
+    v = np.zeros(n, dtype=np.uint64)
+    for k in range(bits):
+        is_set = ((indices >> np.uint64(k)) & np.uint64(1)).astype(bool)
+        u[is_set] ^= directions[k]
+        v[is_set] ^= second_directions[k]
+
+    shift = rng.random(2)
+    return scale_to_region((u / 2. ** bits + shift[0]) % 1., (v / 2. ** bits + shift[1]) % 1., extent)
+
+
+def latin_hypercube_seeds(n, extent, rng):
+    return scale_to_region((rng.permutation(n) + rng.random(n)) / n, (rng.permutation(n) + rng.random(n)) / n, extent)
+
+
+def poisson_disk_seeds(n, extent, rng, batch=None):
+    """
+    Random points of the region at least a radius apart, drawn as batches of candidates. The radius is chosen so that
+    about 1.4 n such points fit in the region, and sampling stops once n points are accepted. A candidate is accepted if
+    it is far enough from the points accepted before, and from the candidates of its batch drawn before it. Both are
+    found from a grid of cells whose diagonal is the radius, which hold at most one point each. May return fewer than n
+    points if the candidates run out first.
+    """
+    xmin, xmax, ymin, ymax = extent
+    width, height = xmax - xmin, ymax - ymin
+    radius = 0.7 * np.sqrt(width * height / n)
+    cell = radius / np.sqrt(2)
+    columns, rows = int(np.ceil(width / cell)) + 1, int(np.ceil(height / cell)) + 1
+    batch = batch or max(64, 2 * n)
+
+    grid = np.full((rows + 4, columns + 4), -1, dtype=np.int64)  # Index of the point in each cell, with a border of 2.
+    x, y = np.empty(0), np.empty(0)
+    offsets = np.array([(i, j) for i in range(-2, 3) for j in range(-2, 3)])
+
+    for _ in range(POISSON_ROUNDS):
+        cx, cy = uniform_seeds(batch, extent, rng)
+        column, row = ((cx - xmin) / cell).astype(np.int64) + 2, ((cy - ymin) / cell).astype(np.int64) + 2
+
+        # Candidates are only kept in empty cells, one per cell.
+        _, first = np.unique(row * (columns + 4) + column, return_index=True)
+        first = np.sort(first)
+        first = first[grid[row[first], column[first]] < 0]
+        cx, cy, column, row = cx[first], cy[first], column[first], row[first]
+
+        # Neighboring accepted points, for each candidate and each of the 5 x 5 cells around it.
+        neighbors = grid[row[:, np.newaxis] + offsets[:, 0], column[:, np.newaxis] + offsets[:, 1]]
+        has_neighbor = neighbors >= 0
+        nx, ny = np.where(has_neighbor, x[neighbors] if len(x) else 0., 0.), \
+            np.where(has_neighbor, y[neighbors] if len(y) else 0., 0.)
+        accepted = ~(has_neighbor & (np.hypot(nx - cx[:, np.newaxis], ny - cy[:, np.newaxis]) < radius)).any(axis=1)
+
+        # Neighboring candidates of the batch drawn before each candidate.
+        batch_grid = np.full_like(grid, -1)
+        batch_grid[row, column] = np.arange(len(cx))
+        neighbors = batch_grid[row[:, np.newaxis] + offsets[:, 0], column[:, np.newaxis] + offsets[:, 1]]
+        earlier = (neighbors >= 0) & (neighbors < np.arange(len(cx))[:, np.newaxis])
+        accepted &= ~(earlier & (np.hypot(cx[neighbors] - cx[:, np.newaxis], cy[neighbors] - cy[:, np.newaxis]) <
+                                 radius)).any(axis=1)
+
+        accepted = np.flatnonzero(accepted)[:n - len(x)]
+        grid[row[accepted], column[accepted]] = len(x) + np.arange(len(accepted))
+        x, y = np.concatenate((x, cx[accepted])), np.concatenate((y, cy[accepted]))
+        if len(x) >= n:
+            break
+
+    return x, y
+
+
+def circle_seeds(n, x, y, radius):
+    angles = 2 * np.pi * np.arange(n) / n
+    return x + radius * np.cos(angles), y + radius * np.sin(angles)
+
+
+def curve_seeds(n, x_expression, y_expression):
+    # Points along the curve (x(s), y(s)) for 0 <= s <= 1, equally spaced by arc length, including both ends.
+    s = np.linspace(0., 1., max(2, CURVE_SAMPLES * n))
+    with np.errstate(all="ignore"):
+        x = np.broadcast_to(np.asarray(x_expression(s), dtype=np.float64), s.shape)
+        y = np.broadcast_to(np.asarray(y_expression(s), dtype=np.float64), s.shape)
+
+    if not (np.isfinite(x).all() and np.isfinite(y).all()):
+        raise ExpressionError("The curve must be defined for 0 <= s <= 1.")
+
+    arc_length = np.concatenate(([0.], np.cumsum(np.hypot(np.diff(x), np.diff(y)))))
+    if arc_length[-1] == 0:
+        return np.full(n, x[0]), np.full(n, y[0])
+
+    targets = np.linspace(0., arc_length[-1], n) if n > 1 else np.zeros(1)
+    return np.interp(targets, arc_length, x), np.interp(targets, arc_length, y)
+
+
+def split_arguments(text):
+    # Splits an entry such as "cos(2*pi*s), sin(2*pi*s)" at its top-level commas.
+    try:
+        node = ast.parse(text.strip(), mode="eval").body
+    except SyntaxError as error:
+        raise ExpressionError("Invalid syntax.") from error
+
+    if isinstance(node, ast.Tuple):
+        return [ast.get_source_segment(text.strip(), element) for element in node.elts]
+    return [text.strip()]
+
+
+def parse_curve(text):
+    # Returns the expressions of x(s) and y(s) entered as "x(s), y(s)".
+    arguments = split_arguments(text)
+    if len(arguments) != 2:
+        raise ExpressionError("A curve is entered as x(s), y(s).")
+
+    return Expression(arguments[0], ("s", )), Expression(arguments[1], ("s", ))
+
+
+# Name shown in the trajectories frame -> generator of the points of a region.
+REGION_GENERATORS = {"random": uniform_seeds, "Sobol": sobol_seeds, "Halton": halton_seeds,
+                     "Poisson disk": poisson_disk_seeds, "Latin hypercube": latin_hypercube_seeds}
@@ -0,0 +1,312 @@
+"""
+Collection of functions that save and load planarFlow sessions. A session file stores the differential equations,
+the plot configuration, the graphs, and every flow's initial point and computed trajectory.
+
+The file starts with a fixed-size preamble, followed by one chunk per array, and ends with a JSON header describing the
+session and the location of each chunk. Chunks are delta-encoded, byte-shuffled and compressed with zlib unless
+compression does not pay off, in which case they are stored raw. The file is memory-mapped when loaded: raw chunks are
+used in place, and only the flows that intersect the current view are read. The remaining flows are loaded when they are
+first needed, and are copied chunk by chunk, without being decoded, when the session is saved again. Files that cannot
+be read raise a SessionError, when loaded or when their flows are loaded later.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import os
+import json
+import mmap
+import struct
+import zlib
+import numpy as np
+
+from .flow import Flow
+from .graph import Graph
+from .expressions import Expression
+from .density import reset_density
+from .pyramid import drawn_trajectory
+
+SESSION_MAGIC = b"PLNRFLOW"
+SESSION_VERSION = 1
+SESSION_PREAMBLE = struct.Struct("<8sIIQQ")  # magic, version, reserved, header offset, header length
+CHUNK_ALIGNMENT = 64
+
+
+class SessionError(Exception):
+    pass
+
+
+def write_chunk(file, array):
+    array = np.ascontiguousarray(array)
+    raw = memoryview(array).cast("B")
+
+    # Neighbouring values of a trajectory share their leading bytes, so the differences of their integer
+    # representations are small. Shuffling the bytes of the differences then groups these zero bytes together, which
+    # is what makes floating-point trajectories compressible. Both steps are exactly reversible.
+    integers = array.view("i{}".format(array.itemsize))
+    deltas = np.diff(integers, axis=0, prepend=np.zeros_like(integers[:1]))
+    shuffled = deltas.reshape(-1).view(np.uint8).reshape(-1, array.itemsize).T.tobytes()
+    compressed = zlib.compress(shuffled, 1)
+
+    if len(compressed) < 0.9 * len(raw):
+        codec, data = "delta-shuffle-zlib", compressed
+    else:
+        codec, data = "raw", raw
+
+    return write_data(file, data, codec, array.dtype.str, list(array.shape))
+
+
+def write_data(file, data, codec, dtype, shape):
+    file.write(bytes(-file.tell() % CHUNK_ALIGNMENT))
+    offset = file.tell()
+    file.write(data)
+
+    return {"offset": offset, "length": len(data), "codec": codec, "dtype": dtype, "shape": shape}
+
+
+def copy_chunk(file, reader, chunk):
+    # Copies a chunk of another session file as it is stored, without decoding it.
+    return write_data(file, reader.mmap[chunk["offset"]:chunk["offset"] + chunk["length"]], chunk["codec"],
+                      chunk["dtype"], chunk["shape"])
+
+
+def save_session(top, filename):
+    header = {"version": SESSION_VERSION,
+              "equations": dict(top.differential_equations.equation_strings,
+                                parameters=top.differential_equations.parameter_settings()),
+              "numerical_method": top.numerical_method,
+              "precision": top.precision,
+              "figure_settings": {"xmin": top.figure_settings.xmin, "xmax": top.figure_settings.xmax,
+                                  "ymin": top.figure_settings.ymin, "ymax": top.figure_settings.ymax,
+                                  "xtick_spacing": top.figure_settings.xtick_spacing,
+                                  "ytick_spacing": top.figure_settings.ytick_spacing,
+                                  "show_x_ticklabels": top.figure_settings.show_x_ticklabels.get(),
+                                  "show_y_ticklabels": top.figure_settings.show_y_ticklabels.get(),
+                                  "show_grid": top.figure_settings.show_grid.get()},
+              "graphs": [{"expression": graph.expression, "x_low": graph.x_low, "x_upp": graph.x_upp,
+                          "y_low": graph.y_low, "y_upp": graph.y_upp, "color": graph.color}
+                         for graph in top.graphs],
+              "times": [],
+              "flows": []}
+
+    # The session is written to a temporary file first, since the file being replaced may still be memory-mapped by
+    # the flows of a previously loaded session.
+    temp_filename = filename + ".tmp"
+    with open(temp_filename, "wb") as file:
+        file.write(bytes(SESSION_PREAMBLE.size))
+
+        # Time values shared by flows are written once. Flows still held by a session file are copied from it.
+        time_indices = {}
+        for flow in top.flows:
+            if isinstance(flow.source, FlowSource):
+                reader, flow_header = flow.source.reader, flow.source.header()
+                time_key = (id(reader), flow_header["time"])
+                if time_key not in time_indices:
+                    time_indices[time_key] = len(header["times"])
+                    header["times"].append(copy_chunk(file, reader, reader.header["times"][flow_header["time"]]))
+
+                trajectory_chunk = copy_chunk(file, reader, flow_header["trajectory"])
+                bbox = [float(value) for value in flow.bbox]
+            else:
+                time_key = id(flow.t_values)
+                if time_key not in time_indices:
+                    time_indices[time_key] = len(header["times"])
+                    header["times"].append(write_chunk(file, flow.t_values))
+
+                trajectory_chunk = write_chunk(file, flow.trajectory)
+                bbox = [float(np.nanmin(flow.x_values)), float(np.nanmax(flow.x_values)),
+                        float(np.nanmin(flow.y_values)), float(np.nanmax(flow.y_values))]
+
+            header["flows"].append({"x0": float(flow.x0), "y0": float(flow.y0), "time": time_indices[time_key],
+                                    "trajectory": trajectory_chunk, "bbox": bbox,
+                                    "tail": np.asarray(flow.trajectory[-2:], dtype=float).tolist()})
+
+        header_bytes = json.dumps(header).encode("utf-8")
+        header_offset = file.tell()
+        file.write(header_bytes)
+
+        file.seek(0)
+        file.write(SESSION_PREAMBLE.pack(SESSION_MAGIC, SESSION_VERSION, 0, header_offset, len(header_bytes)))
+
+    os.replace(temp_filename, filename)
+
+
+class SessionReader:
+    def __init__(self, filename):
+        # Errors opening the file are left as OSErrors, while files that are not sessions raise SessionErrors.
+        with open(filename, "rb") as file:
+            try:
+                self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as error:  # Empty files cannot be mapped.
+                raise SessionError("Not a planarFlow session file.") from error
+
+        try:
+            magic, version, _, header_offset, header_length = SESSION_PREAMBLE.unpack_from(self.mmap)
+        except struct.error as error:
+            raise SessionError("Not a planarFlow session file.") from error
+
+        if magic != SESSION_MAGIC or version > SESSION_VERSION:
+            raise SessionError("Not a planarFlow session file.")
+
+        try:
+            self.header = json.loads(bytes(self.mmap[header_offset:header_offset + header_length]).decode("utf-8"))
+        except ValueError as error:
+            raise SessionError("The header of the session file is corrupted.") from error
+        self.times = {}
+
+    def read_chunk(self, chunk):
+        # Chunks that are corrupted, or do not match their description in the header, raise a SessionError.
+        try:
+            dtype = np.dtype(chunk["dtype"])
+            count = int(np.prod(chunk["shape"]))
+
+            if chunk["codec"] == "raw":  # Used in place, pages are read from disk as they are accessed.
+                return np.frombuffer(self.mmap, dtype=dtype, count=count,
+                                     offset=chunk["offset"]).reshape(chunk["shape"])
+
+            data = zlib.decompress(memoryview(self.mmap)[chunk["offset"]:chunk["offset"] + chunk["length"]])
+            shuffled = np.frombuffer(data, dtype=np.uint8).reshape(dtype.itemsize, count)
+            deltas = np.ascontiguousarray(shuffled.T).view("i{}".format(dtype.itemsize)).reshape(chunk["shape"])
+            return np.cumsum(deltas, axis=0, dtype=deltas.dtype).view(dtype)
+        except (zlib.error, ValueError, TypeError, KeyError) as error:
+            raise SessionError("A trajectory of the session file is corrupted.") from error
+
+    def read_flow(self, idx, store=None):
+        # Returns the time values and trajectory of the flow, which are copied into the store if one is given.
+        flow_header = self.header["flows"][idx]
+
+        if flow_header["time"] not in self.times:
+            self.times[flow_header["time"]] = self.read_chunk(self.header["times"][flow_header["time"]])
+        t_values = self.times[flow_header["time"]]
+
+        trajectory = self.read_chunk(flow_header["trajectory"])
+        if store is None:
+            return t_values, trajectory
+        return self.store_flow(idx, t_values, trajectory, store)
+
+    def store_flow(self, idx, t_values, trajectory, store):
+        # Raw trajectories are used in place, while decoded ones are copied into the store.
+        if self.header["flows"][idx]["trajectory"]["codec"] != "raw":
+            t_values, _, _, trajectory = store.store(t_values, trajectory[:, 0], trajectory[:, 1])
+
+        return t_values, trajectory
+
+
+class FlowSource:
+    # Reads a flow held by a session file when it is loaded. Saving the session copies the flow's chunks instead.
+    def __init__(self, reader, idx, store):
+        self.reader = reader
+        self.idx = idx
+        self.store = store
+
+    def __call__(self):
+        return self.reader.read_flow(self.idx, self.store)
+
+    def header(self):
+        return self.reader.header["flows"][self.idx]
+
+
+def load_session(top, filename):
+    """
+    Replaces the session shown by the one in the file. The whole header is checked, the graphs' expressions are
+    compiled, and the flows in view are read before anything is changed, so that a file that cannot be read raises a
+    SessionError and leaves the current session as it was. The session's settings are only applied once its equations
+    are set, which clears the current flows and the trajectory store.
+    """
+    reader = SessionReader(filename)
+    header = reader.header
+
+    try:
+        method, precision = header["numerical_method"], header["precision"]
+        dtype = top.precision_dict[precision][1]
+        equations, figure_settings = dict(header["equations"]), dict(header["figure_settings"])
+        xmin, xmax = figure_settings["xmin"], figure_settings["xmax"]
+        ymin, ymax = figure_settings["ymin"], figure_settings["ymax"]
+
+        graphs = [(Expression(graph_header["expression"], ("x", "y")), graph_header["x_low"], graph_header["x_upp"],
+                   graph_header["y_low"], graph_header["y_upp"], graph_header["color"], graph_header["expression"])
+                  for graph_header in header["graphs"]]
+
+        flows = []
+        for idx, flow_header in enumerate(header["flows"]):
+            bbox, tail = [float(value) for value in flow_header["bbox"]], np.array(flow_header["tail"], dtype=float)
+            if len(bbox) != 4 or tail.shape != (2, 2):
+                raise SessionError("The header of the session file is corrupted.")
+            flows.append([float(flow_header["x0"]), float(flow_header["y0"]), bbox, tail, None])
+    except (KeyError, TypeError, IndexError, ValueError) as error:
+        raise SessionError("The header of the session file is corrupted.") from error
+
+    # Flows intersecting the view are read now, while the others keep only the last two points of their trajectory
+    # until they are needed.
+    for idx, (_, _, bbox, _, _) in enumerate(flows):
+        if not (bbox[1] < xmin or bbox[0] > xmax or bbox[3] < ymin or bbox[2] > ymax):
+            flows[idx][4] = reader.read_flow(idx)
+
+    # Setting the equations clears every flow and graph, as if the user had pressed the Set button.
+    if not top.differential_equations.load_equations(**equations):
+        return
+
+    top.numerical_method = method
+    top.precision = precision
+    top.trajectory_store.set_dtype(dtype)
+
+    top.figure_settings.load_settings(**figure_settings)
+    xmin, xmax = top.figure_settings.xmin, top.figure_settings.xmax
+    ymin, ymax = top.figure_settings.ymin, top.figure_settings.ymax
+
+    for eqn, x_low, x_upp, y_low, y_upp, color, expression in graphs:
+        top.graphs.append(Graph(eqn, x_low, x_upp, y_low, y_upp, color, top.graph_linewidth, expression))
+        top.graphs[-1].create_meshgrid(xmin, xmax, ymin, ymax)
+        top.graphs[-1].create_contours(top.fig, top.ax)
+
+    new_flows = []
+    for idx, (x0, y0, bbox, tail, data) in enumerate(flows):
+        flow = Flow(x0, y0, top.differential_equations.dxdt, top.differential_equations.dydt,
+                    top.differential_equations.tmax, top.differential_equations.dt)
+        flow.set_source(FlowSource(reader, idx, top.trajectory_store), bbox, tail)
+        if data is not None:
+            flow.set_trajectory(*reader.store_flow(idx, *data, top.trajectory_store))
+
+        flow.create_circle(top.flow_circle_diameter, top.figure_width, top.figure_height, xmin, xmax, ymin, ymax)
+        flow.create_arrowhead(top.flow_arrowhead_size, top.figure_width, top.figure_height, xmin, xmax, ymin, ymax)
+        new_flows.append(flow)
+
+    # The flows are only added to the app once all of them are created.
+    top.flows.extend(new_flows)
+    top.flow_seeds.update((flow.x0, flow.y0) for flow in new_flows)
+    top.flow_trajectory_collection.lines.extend(drawn_trajectory(top, flow) for flow in new_flows)
+    top.flow_circle_collection.patches.extend(flow.circle for flow in new_flows)
+    top.flow_arrowhead_collection.patches.extend(flow.arrowhead for flow in new_flows)
+
+    top.collection_colors = [top.flow_color] * len(top.flows)
+    top.flow_circle_collection.set_facecolors(top.collection_colors)
+    top.flow_trajectory_collection.set_color(top.collection_colors)
+    top.flow_arrowhead_collection.set_facecolors(top.collection_colors)
+    reset_density(top)
+
+    top.fig.canvas.draw()
+
+
+def load_flows(top, indices=None):
+    # Loads the flows that are still held by a session file, e.g. before animating or exporting. Raises a SessionError
+    # if one of them cannot be read, which is left to be loaded again.
+    for idx in range(len(top.flows)) if indices is None else indices:
+        if top.flows[idx].source is not None:
+            top.flows[idx].load()
+            top.flow_trajectory_collection.lines[idx] = drawn_trajectory(top, top.flows[idx])
+
+
+def load_visible_flows(top):
+    load_flows(top, [idx for idx, flow in enumerate(top.flows)
+                     if flow.source is not None and flow.intersects(top.figure_settings.xmin, top.figure_settings.xmax,
+                                                                    top.figure_settings.ymin,
+                                                                    top.figure_settings.ymax)])
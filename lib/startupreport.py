@@ -0,0 +1,38 @@
+"""
+StartupReport class file. The report records the time spent in each phase of the app's startup and prints it in the
+same format as Python's "-X importtime" option.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import sys
+import time
+
+
+class StartupReport:
+    def __init__(self, start_time=None):
+        self.start_time = time.perf_counter() if start_time is None else start_time
+        self.last_time = self.start_time
+        self.phases = []  # (phase, self time, cumulative time), in seconds.
+
+    def mark(self, phase):
+        # Records the time elapsed since the previous mark as the duration of the given phase.
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last_time, now - self.start_time))
+        self.last_time = now
+
+    def print(self, file=sys.stderr):
+        print("startup time: self [us] | cumulative | phase", file=file)
+        for phase, self_time, cumulative_time in self.phases:
+            print("startup time: {:>9d} | {:>10d} | {}".format(int(self_time * 1E6), int(cumulative_time * 1E6), phase),
+                  file=file)
@@ -0,0 +1,179 @@
+"""
+TimeSeriesPlot class file. The time-series window is created once and reused: clicking another initial point swaps the
+data of its lines rather than creating a new window and figure. Long series are decimated to the width of the axes in
+pixels, keeping the minimum and maximum of each pixel column, so that what is drawn looks the same as the full series.
+Only the coarsest level of the trajectory's pyramid that is accurate to a pixel at the height of the axes is decimated.
+Series with fewer steps than pixel columns are instead drawn from the dense output at every pixel column, so that
+trajectories integrated with large steps are drawn as smooth curves.
+Hovering over the time series marks the corresponding point of the trajectory on the top window's figure, which is
+blitted so that the figure does not need to be redrawn.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+
+from .configureplot import set_plot_window_style
+from .profiler import profiler
+
+
+def min_max_decimate(t, values, bins):
+    """
+    Decimates the series to at most 2 * bins points. The series is split into bins of consecutive values, and the
+    minimum and maximum of each bin are kept in the order they occur, which preserves the envelope of the series when
+    each bin spans at most a pixel. Series with at most 2 * bins values are returned as they are.
+    """
+    n = len(values)
+    if n <= 2 * bins:
+        return t, values
+
+    # Padding the last bin with the last value does not change its minimum or maximum.
+    size = -(-n // bins)
+    bins = -(-n // size)
+    padded = np.concatenate((values, np.full(bins * size - n, values[-1]))).reshape(bins, size)
+
+    with np.errstate(invalid="ignore"):
+        lowest, highest = np.argmin(padded, axis=1), np.argmax(padded, axis=1)
+
+    offsets = np.arange(bins) * size
+    indices = np.minimum(np.column_stack((offsets + np.minimum(lowest, highest),
+                                          offsets + np.maximum(lowest, highest))).ravel(), n - 1)
+    return t[indices], values[indices]
+
+
+class TimeSeriesPlot:
+    def __init__(self, fig, top):
+        self.fig = fig
+        self.top = top
+        self.flow = None
+
+        self.x_plot = fig.add_subplot(211)
+        self.x_plot.set_ylabel("x(t)", color=top.figure_axes_color, fontsize=top.time_series_fontsize)
+        self.x_line, = self.x_plot.plot([], [], color=top.flow_color, linewidth=top.flow_linewidth)
+
+        self.y_plot = fig.add_subplot(212)
+        self.y_plot.set_ylabel("y(t)", color=top.figure_axes_color, fontsize=top.time_series_fontsize)
+        self.y_plot.set_xlabel("t", color=top.figure_axes_color, fontsize=top.time_series_fontsize)
+        self.y_line, = self.y_plot.plot([], [], color=top.flow_color, linewidth=top.flow_linewidth)
+
+        # Matching style/colors to top level's figure canvas.
+        set_plot_window_style(fig, (self.x_plot, self.y_plot), top.figure_background_color, top.figure_axes_color,
+                              top.time_series_fontsize, top.figure_settings.show_grid.get(), top.figure_grid_style,
+                              top.figure_grid_alpha)
+
+        # Cursor of the hovered time on the time series, and the corresponding point on the top window's figure. The
+        # point is animated, i.e. left out of the figure's draws and blitted over the last draw instead.
+        self.cursors = [plot.axvline(0, color=top.flow_highlight_color, linewidth=1, visible=False)
+                        for plot in (self.x_plot, self.y_plot)]
+        self.marker, = top.ax.plot([], [], marker="o", markersize=8, color=top.flow_highlight_color, zorder=1,
+                                   animated=True, visible=False)
+        self.background = None
+
+        self.connections = [fig.canvas.mpl_connect("motion_notify_event", self.on_hover),
+                            fig.canvas.mpl_connect("figure_leave_event", self.on_leave),
+                            fig.canvas.mpl_connect("resize_event", self.on_resize)]
+        self.top_connection = top.fig.canvas.mpl_connect("draw_event", self.on_top_draw)
+
+    def bins(self):
+        # Number of pixel columns of the axes.
+        return max(1, int(self.x_plot.bbox.width))
+
+    @profiler.profiled("TimeSeriesPlot.show_flow")
+    def show_flow(self, flow):
+        self.flow = flow
+        self.update_lines()
+
+        title_str = "($x_0$, $y_0$) = (" + "{:+.2f}".format(flow.x0) + ", " + "{:+.2f}".format(flow.y0) + ")"
+        self.x_plot.set_title(title_str, color=self.top.figure_axes_color, fontsize=self.top.time_series_fontsize)
+
+        for plot in (self.x_plot, self.y_plot):
+            plot.set_xlim(flow.t_values[0], flow.t_values[-1])
+            plot.relim()
+            plot.autoscale_view(scalex=False)
+
+        self.on_leave(None)
+        self.fig.canvas.draw_idle()
+
+    def update_lines(self):
+        t_values, x_values, y_values = self.flow.t_values, self.flow.x_values, self.flow.y_values
+        pyramid = self.flow.get_pyramid()
+        if pyramid is not None:
+            # Constant series fit in a pixel at any level.
+            x_span, y_span = pyramid.value_spans()
+            level = pyramid.select(self.x_plot.bbox.height / x_span if x_span > 0 else 0.,
+                                   self.y_plot.bbox.height / y_span if y_span > 0 else 0.)
+
+            if level > 0:
+                points = pyramid.points(level)
+                t_values, x_values, y_values = t_values[pyramid.indices(level)], points[:, 0], points[:, 1]
+
+        bins = self.bins()
+        if len(self.flow.t_values) < bins:
+            t_values = np.linspace(t_values[0], t_values[-1], bins + 1)
+            x_values, y_values = self.flow.evaluate(t_values)
+
+        self.x_line.set_data(*min_max_decimate(t_values, x_values, bins))
+        self.y_line.set_data(*min_max_decimate(t_values, y_values, bins))
+
+    def on_resize(self, event):
+        if self.flow is not None:
+            self.update_lines()
+
+    def on_hover(self, event):
+        if self.flow is None or event.inaxes not in (self.x_plot, self.y_plot):
+            self.on_leave(event)
+            return
+
+        # The hovered time may fall between steps, where the point is given by the dense output.
+        t = min(max(event.xdata, self.flow.t_values[0]), self.flow.t_values[-1])
+        for cursor in self.cursors:
+            cursor.set_xdata([t] * 2)
+            cursor.set_visible(True)
+        self.fig.canvas.draw_idle()
+
+        x, y = self.flow.evaluate(t)
+        self.marker.set_data([x], [y])
+        self.marker.set_visible(True)
+        self.blit_marker()
+
+    def on_leave(self, event):
+        if self.marker.get_visible():
+            for cursor in self.cursors:
+                cursor.set_visible(False)
+            self.fig.canvas.draw_idle()
+
+            self.marker.set_visible(False)
+            self.blit_marker()
+
+    def on_top_draw(self, event):
+        # Keeps the top window's figure without the marker, which is restored before each blit of the marker.
+        self.background = self.top.fig.canvas.copy_from_bbox(self.top.ax.bbox)
+        if self.marker.get_visible():
+            self.top.ax.draw_artist(self.marker)
+
+    def blit_marker(self):
+        if self.background is None:
+            return
+
+        self.top.fig.canvas.restore_region(self.background)
+        if self.marker.get_visible():
+            self.top.ax.draw_artist(self.marker)
+        self.top.fig.canvas.blit(self.top.ax.bbox)
+
+    def close(self):
+        for connection in self.connections:
+            self.fig.canvas.mpl_disconnect(connection)
+        self.top.fig.canvas.mpl_disconnect(self.top_connection)
+        self.marker.set_visible(False)
+        self.blit_marker()
+        self.marker.remove()
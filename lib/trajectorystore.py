@@ -0,0 +1,114 @@
+"""
+TrajectoryStore class file. The store owns the memory backing every flow's trajectory. In "memory" mode each trajectory
+is an ordinary NumPy array, while in "disk" mode trajectories are streamed into memory-mapped scratch files so that
+ensembles larger than the available RAM are paged in and out by the operating system as they are drawn.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import os
+import atexit
+import shutil
+import tempfile
+import numpy as np
+
+
+class TrajectoryStore:
+    def __init__(self, mode="memory", dtype=np.float64, chunk_rows=2 ** 22):
+        self.mode = mode
+        self.dtype = dtype
+        self.chunk_rows = chunk_rows  # Number of (x, y) rows per scratch file, i.e. 64 MB of float64 values.
+
+        self.scratch_dir = None
+        self.chunk = None
+        self.chunk_offset = 0
+        self.chunk_count = 0
+
+        # Every flow integrated with the same tmax and dt shares the same time array, so only one copy is kept.
+        self.t_values = None
+
+        atexit.register(self.clear)
+
+    def set_mode(self, mode):
+        # Changing the mode only affects trajectories stored afterwards; existing trajectories keep their storage.
+        self.mode = mode
+
+    def set_dtype(self, dtype):
+        # Trajectories of a different precision are written to a new scratch file.
+        if dtype != self.dtype:
+            self.dtype = dtype
+            self.chunk = None
+
+    def store(self, t_values, x_values, y_values, replaced=None):
+        """
+        Copies the integrated values into the store and returns (t_values, x_values, y_values, trajectory), where
+        trajectory is an (n, 2) array of the store's dtype used by the LineCollection, and x_values/y_values are views
+        of its columns. Time values are kept in float64 regardless of the dtype. A replaced trajectory of the scratch
+        files with the same shape and dtype, e.g. that of a flow integrated again, is overwritten rather than taking up
+        more of them.
+        """
+        t_values = self.share_time_values(t_values)
+        if isinstance(replaced, np.memmap) and replaced.shape == (len(x_values), 2) and replaced.dtype == self.dtype:
+            trajectory = replaced
+        else:
+            trajectory = self.allocate(len(x_values))
+        trajectory[:, 0] = x_values
+        trajectory[:, 1] = y_values
+
+        return t_values, trajectory[:, 0], trajectory[:, 1], trajectory
+
+    def share_time_values(self, t_values):
+        if (self.t_values is not None and len(self.t_values) == len(t_values) and
+                np.array_equal(self.t_values, t_values)):
+            return self.t_values
+
+        self.t_values = t_values
+        return t_values
+
+    def allocate(self, n):
+        if self.mode == "memory":
+            try:
+                return np.empty((n, 2), dtype=self.dtype)
+            except MemoryError:
+                pass  # Fall back to the scratch files rather than losing the whole ensemble.
+
+        return self.allocate_mapped(n)
+
+    def allocate_mapped(self, n):
+        if self.chunk is None or self.chunk_offset + n > len(self.chunk):
+            self.create_chunk(max(n, self.chunk_rows))
+
+        trajectory = self.chunk[self.chunk_offset:self.chunk_offset + n]
+        self.chunk_offset += n
+
+        return trajectory
+
+    def create_chunk(self, rows):
+        if self.scratch_dir is None:
+            self.scratch_dir = tempfile.mkdtemp(prefix="planarflow-")
+
+        chunk_path = os.path.join(self.scratch_dir, "chunk{}.dat".format(self.chunk_count))
+        self.chunk = np.memmap(chunk_path, dtype=self.dtype, mode="w+", shape=(rows, 2))
+        self.chunk_offset = 0
+        self.chunk_count += 1
+
+    def clear(self):
+        # The flows referencing the mapped chunks must be cleared beforehand, otherwise the files stay mapped.
+        self.chunk = None
+        self.chunk_offset = 0
+        self.chunk_count = 0
+        self.t_values = None
+
+        if self.scratch_dir is not None:
+            shutil.rmtree(self.scratch_dir, ignore_errors=True)
+            self.scratch_dir = None
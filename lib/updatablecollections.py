@@ -2,7 +2,11 @@
 Classes inherited from Matplotlib's PatchCollection and LineCollection classes. The set of patches/lines to draw are
 often dynamically changing, and so these derived classes allow for automatic updating.
 """
-from matplotlib import collections
+from matplotlib import collections, path
+from matplotlib.colors import to_rgba
+import numpy as np
+
+from .profiler import profiler
 
 
 class UpdatablePatchCollection(collections.PatchCollection):
@@ -18,8 +22,92 @@ class UpdatablePatchCollection(collections.PatchCollection):
 class UpdatableLineCollection(collections.LineCollection):
     def __init__(self, lines, *args, **kwargs):
         self.lines = lines
+        self.cached_lines = []
+        self.cached_paths = []
         collections.LineCollection.__init__(self, lines, *args, **kwargs)
 
+    @profiler.profiled("UpdatableLineCollection.get_paths")
     def get_paths(self):
-        self.set_paths(self.lines)
+        # Paths are only created for lines that were added or replaced since the last draw.
+        paths = []
+        for idx, line in enumerate(self.lines):
+            if idx < len(self.cached_lines) and self.cached_lines[idx] is line:
+                paths.append(self.cached_paths[idx])
+            else:
+                paths.append(create_line_path(line))
+                if profiler.enabled:
+                    profiler.count("paths created")
+
+        self.cached_lines = list(self.lines)
+        self.cached_paths = paths
+        self._paths = paths
         return self._paths
+
+
+def supports_vertex_assignment():
+    # Path casts its vertices to float64. Float32 lines are kept from being upcast and copied by assigning them to
+    # Path's private _vertices and calling its private _update_values, as verified with matplotlib 3.11. Whether this
+    # still works is checked once, and other versions fall back to the public constructor.
+    try:
+        test_path = path.Path(np.zeros((0, 2)))
+        test_path._vertices = np.zeros((2, 2), dtype=np.float32)
+        test_path._update_values()
+        return test_path.vertices.dtype == np.float32 and len(test_path) == 2
+    except (AttributeError, TypeError, ValueError):
+        return False
+
+
+CAN_ASSIGN_VERTICES = supports_vertex_assignment()
+
+
+def create_line_path(line):
+    # Float64 lines, masked lines, and lines of matplotlib versions without the private attributes go through the
+    # public constructor, which does not copy float64 lines.
+    if line.dtype != np.float32 or isinstance(line, np.ma.MaskedArray) or not CAN_ASSIGN_VERTICES:
+        return path.Path(line)
+
+    line_path = path.Path(np.zeros((0, 2)))
+    line_path._vertices = line
+    line_path._update_values()
+    return line_path
+
+
+class TrailCollection(collections.LineCollection):
+    """
+    Fading trails behind moving particles. The last positions of every particle are kept in a ring buffer, and the
+    segments between them are grouped by age into one path per age, whose color fades with it. The paths' vertices are
+    views of a single array, which each update overwrites in place, so that no paths or other objects are created per
+    frame.
+    """
+    def __init__(self, positions, length, color, *args, **kwargs):
+        positions = np.asarray(positions, dtype=np.float64)
+        self.length = max(2, length)  # Positions per trail, joined by length - 1 segments.
+        self.ages = np.arange(self.length - 1)
+        self.buffer = np.empty((self.length, len(positions), 2))
+        self.head = 0
+
+        # Segment of each age of each particle, from the newer to the older position.
+        self.vertices = np.empty((self.length - 1, len(positions), 2, 2))
+        codes = np.tile([path.Path.MOVETO, path.Path.LINETO], len(positions))
+        paths = [path.Path(self.vertices[age].reshape(-1, 2), codes) for age in self.ages]
+
+        colors = np.tile(to_rgba(color), (self.length - 1, 1))
+        colors[:, 3] *= 1 - self.ages / (self.length - 1)
+
+        collections.LineCollection.__init__(self, [], *args, colors=colors, **kwargs)
+        self._paths = paths
+        self.reset(positions)
+
+    def reset(self, positions):
+        # Starts the trails over at the given positions, where their segments have no length.
+        self.buffer[:] = positions
+        self.vertices[:] = np.asarray(positions, dtype=np.float64)[:, np.newaxis]
+        self.stale = True
+
+    def push(self, positions):
+        # Adds the particles' next positions in place of the oldest ones, and rebuilds the segments from the buffer.
+        self.head = (self.head + 1) % self.length
+        self.buffer[self.head] = positions
+        np.take(self.buffer, self.head - self.ages, axis=0, out=self.vertices[:, :, 0], mode="wrap")
+        np.take(self.buffer, self.head - 1 - self.ages, axis=0, out=self.vertices[:, :, 1], mode="wrap")
+        self.stale = True
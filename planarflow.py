@@ -16,33 +16,52 @@ You should have received a copy of the GNU General Public License along with pla
 """
 import sys
 import os
+import time
+launch_time = time.perf_counter()  # Recorded before the slower imports below for the startup report.
 import platform
 import inspect
 import tkinter as tk
-from tkinter import ttk, filedialog
-import matplotlib.pyplot as plt
+from tkinter import ttk, filedialog, messagebox
+import numpy as np
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.backends.backend_pdf
 
 from lib.configureplot import (set_figure_properties, set_figure_colors, set_figure_axes, set_figure_ticks,
                                set_figure_ticklabels, set_figure_grid)
 from lib.updatablecollections import UpdatableLineCollection, UpdatablePatchCollection
+from lib.trajectorystore import TrajectoryStore
+from lib.session import save_session, load_session, load_flows, SessionError
+from lib.export import Export, EXPORT_FORMATS
+from lib.timeseries import TimeSeriesPlot
+from lib.navigation import ViewNavigator
 from lib.pixel_conversions import pixel_to_x, pixel_to_y
 from lib.app_setters import set_fullscreen, set_icon
+from lib.startupreport import StartupReport
+from lib.profiler import profiler
 import lib.numerical_methods
 
 from lib.frames.differentialequationsframe import DifferentialEquationsFrame
 from lib.frames.figuresettingsframe import FigureSettingsFrame
 from lib.frames.addgraphsframe import AddGraphsFrame
-from lib.frames.addtrajectoriesframe import AddTrajectoriesFrame
+from lib.frames.addtrajectoriesframe import AddTrajectoriesFrame, seed_flow
 from lib.frames.useractionsframe import UserActionsFrame
 
 
+def is_numerical_method(member):
+    # The numerical methods are the functions defined in lib/numerical_methods, except the private helpers whose names
+    # start with an underscore.
+    return (inspect.isfunction(member) and member.__module__ == lib.numerical_methods.__name__ and
+            not member.__name__.startswith("_"))
+
+
 # Top level window
 class App(tk.Tk):
-    def __init__(self):
+    def __init__(self, launch_time=None):
         super().__init__()
 
+        self.startup_report = StartupReport(launch_time)
+        self.startup_report.mark("imports and Tk interpreter")
+
         self.root_dir = os.path.dirname(__file__)
         self.platform_type = platform.system()
 
@@ -51,6 +70,7 @@ class App(tk.Tk):
         set_fullscreen(self, self.platform_type)
         set_icon(self, os.path.join(self.root_dir, "lib", "logo.ico"), self.platform_type)
 
+        # Only the images of the selected theme are loaded here. The other theme is loaded when it is first selected.
         self.mode = "dark"
         self.tk.call("source", os.path.join(self.root_dir, "Azure-ttk-theme-gif-based", "azure.tcl"))
 
@@ -60,10 +80,20 @@ class App(tk.Tk):
 
         # Options for colors and numerical method
         self.color_options = ("black", "gray", "white", "blue", "green", "red", "cyan", "magenta", "yellow")
-        self.numerical_method_dict = dict(inspect.getmembers(lib.numerical_methods, lambda x: inspect.isfunction(x) and
-                                                                                              x.__module__ == lib.numerical_methods.__name__))
+        self.numerical_method_dict = dict(inspect.getmembers(lib.numerical_methods, is_numerical_method))
         self.numerical_method_options = list(self.numerical_method_dict.keys())
         self.numerical_method = "RK2"  # default
+        self.trajectory_storage_options = ("memory", "disk")
+        self.trajectory_storage = "memory"  # default
+        self.trajectory_rendering_options = ("lines", "density")
+        self.trajectory_rendering = "lines"  # default
+
+        # Options for precision. Each option maps to the dtypes used for integrating and for storing/rendering flows.
+        self.precision_dict = {"float64": (np.float64, np.float64),
+                               "float32 storage": (np.float64, np.float32),
+                               "float32": (np.float32, np.float32)}
+        self.precision_options = list(self.precision_dict.keys())
+        self.precision = "float64"  # default
 
         # Geometry of the top frame and UI frame dimensions
         self.update_idletasks()
@@ -97,10 +127,26 @@ class App(tk.Tk):
         self.time_series_window_width = 800
         self.time_series_window_height = 500
         self.time_series_fontsize = 11
+        self.time_series = None  # The time-series window's plot, once the window has been opened.
+
+        # Setting size of analysis windows, such as the Poincaré section window
+        self.analysis_window_width = 1000
+        self.analysis_window_height = 550
 
         # Setting size of settings window
         self.settings_window_width = 1200
-        self.settings_window_height = 400
+        self.settings_window_height = 490
+
+        # Refresh interval of the performance overlay, in milliseconds.
+        self.profiler_hud_interval = 500
+
+        # Export settings. Rasterized layers of exported PDFs and SVGs, and exported PNGs, have the resolution set by
+        # export_dpi. The export running in the background, if any, is polled every export_poll_interval milliseconds.
+        self.export_dpi = 300
+        self.export_rasterize_options = ("auto", "always", "never")
+        self.export_rasterize = "auto"  # default
+        self.export_poll_interval = 100
+        self.export = None
 
         # Initializing other attributes, such as numerical parameters and the equations to integrate.
         self.dxdt = None
@@ -119,23 +165,47 @@ class App(tk.Tk):
         self.graph_linewidth = 2
         self.graphs = []
 
+        # Limit cycles found from the analysis menu, highlighted on the figure, and the basin-of-attraction map and
+        # FTLE field drawn underneath everything else.
+        self.limit_cycles = []
+        self.basin_map = None
+        self.basin_image = None
+        self.ftle_field = None
+        self.ftle_image = None
+
+        # Window with the sliders of the parameters of the equations, open while the equations have parameters.
+        self.parameters_window = None
+
         # Animation settings.
         self.is_animating = False
         self.animation_interval = 1
         self.animation_repeat_delay = 1000
+        self.animation_field_arrows = 25  # Arrows of the direction field along the longer side, or 0 for none.
+        self.animation_trail_length = 0  # Positions in the fading trail behind each circle, or 0 for none.
+        self.animation_frame_rate = 0  # Animation frames per unit of t, or 0 for one frame per integration step.
 
         self.set_GUI_theme(self.mode)
+        self.startup_report.mark("theme")
 
-        # Initializing array of flow objects and collection arrays for plotting.
+        # Initializing array of flow objects and collection arrays for plotting. The trajectory store holds the
+        # integrated values of every flow, either in memory or in memory-mapped scratch files.
         self.flows = []
+        self.flow_seeds = set()  # Initial points (x0, y0) of the flows.
+        self.trajectory_store = TrajectoryStore(self.trajectory_storage, self.precision_dict[self.precision][1])
         self.flow_trajectory_collection = UpdatableLineCollection(lines=[], linewidths=self.flow_linewidth,
                                                                   colors=self.flow_color, zorder=-3)
         self.flow_circle_collection = UpdatablePatchCollection(patches=[], facecolors=self.flow_color, zorder=-1)
         self.flow_arrowhead_collection = UpdatablePatchCollection(patches=[], facecolors=self.flow_color, zorder=-2)
         self.collection_colors = []  # Used for coloring each collection above, in particular when they are highlighted.
 
-        # Initializing matplotlib figure and axes.
-        self.fig = plt.figure()
+        # Histogram of the trajectories and its image, used instead of the collections above when the trajectories are
+        # drawn as a density.
+        self.trajectory_density = None
+        self.trajectory_density_image = None
+
+        # Initializing matplotlib figure and axes. The figure is not created through pyplot, which would create a
+        # hidden window for it.
+        self.fig = Figure()
         self.ax = self.fig.add_subplot(1, 1, 1)
 
         # Setting default properties for the figure.
@@ -171,6 +241,15 @@ class App(tk.Tk):
         # Top-level's FigureCanvas
         self.canvas = FigureCanvasTkAgg(self.fig, plotting_frame)
         self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        profiler.instrument_canvas(self.canvas)
+
+        # Performance overlay, placed over the top-left corner of the canvas while profiling is enabled.
+        self.profiler_hud = tk.Label(plotting_frame, font=("DejaVu Sans Mono", 9), justify="left", anchor="nw",
+                                     foreground=self.flow_highlight_color, background=self.figure_background_color)
+
+        # Progress of the running export, placed over the bottom-left corner of the canvas.
+        self.export_progress_bar = ttk.Progressbar(plotting_frame, mode="determinate", length=200)
+        self.startup_report.mark("figure")
 
         # differential_equations frame
         self.differential_equations = DifferentialEquationsFrame(self)
@@ -201,6 +280,7 @@ class App(tk.Tk):
         self.user_actions.config(width=self.UI_frame_width, height=2 * self.UI_row_height)
         self.user_actions.pack(expand=True)
         self.user_actions.grid_propagate(False)
+        self.startup_report.mark("frames")
 
         set_figure_axes(self.fig, self.ax, self.figure_settings.xmin, self.figure_settings.xmax,
                         self.figure_settings.ymin, self.figure_settings.ymax, self.figure_axes_color)
@@ -214,10 +294,14 @@ class App(tk.Tk):
                               self.figure_settings.ymax)
         set_figure_grid(self.fig, self.ax, self.figure_settings.show_grid.get(),
                         self.figure_settings.xtick_spacing, self.figure_settings.ytick_spacing)
+        self.startup_report.mark("plot configuration")
 
         # Mouse hover event for flow circles. The flow color will change and an annotation box specifying the initial
         # conditions of that flow will be displayed.
         def on_hover(event):
+            if self.navigator.is_panning:
+                return
+
             if event.inaxes == self.ax:
                 cont, ind = self.flow_circle_collection.contains(event)
                 if cont:
@@ -276,21 +360,25 @@ class App(tk.Tk):
 
             self.fig.canvas.draw()
 
-        # Mouse click event for flow circles. A new window showing the time series of x(t) and y(t) for that flow
-        # will be generated.
+        # Mouse click event for flow circles. The time series of x(t) and y(t) for that flow are shown in the
+        # time-series window, which is created on the first click and reused afterwards. Shift-clicking anywhere else
+        # adds a flow starting at the mouse.
         def on_click(event):
             if event.inaxes == self.ax:
                 cont, ind = self.flow_circle_collection.contains(event)
-                if cont:
+                if event.button == 1 and event.key == "shift" and not cont:
+                    if (self.differential_equations.is_configured and self.figure_settings.is_configured and
+                            not self.is_animating):
+                        seed_flow(self, float(event.xdata), float(event.ydata))
+                elif cont:
                     idx = ind['ind'][0]
-                    x, y = self.flow_circle_collection.patches[idx].center
-                    selected_flow = None
+                    try:
+                        load_flows(self, [idx])
+                    except SessionError as error:
+                        messagebox.showerror("Error", "The flow could not be loaded:\n{}".format(error))
+                        return
 
-                    for flow in self.flows:
-                        if flow.x0 == x and flow.y0 == y:
-                            selected_flow = flow
-
-                    if selected_flow:
+                    if self.time_series is None:
                         time_series_window = tk.Toplevel(self)
                         time_series_window.attributes("-topmost", True)
                         time_series_window.resizable(True, True)
@@ -299,61 +387,118 @@ class App(tk.Tk):
                         time_series_window.title("Time series")
                         set_icon(time_series_window, os.path.join(self.root_dir, "lib", "logo.ico"), self.platform_type)
 
-                        time_series_fig = plt.figure()
-
-                        x_plot = time_series_fig.add_subplot(211)
-                        x_plot.plot(selected_flow.t_values, selected_flow.x_values, color=self.flow_color,
-                                    linewidth=self.flow_linewidth)
-                        x_plot.set_ylabel("x(t)", color=self.figure_axes_color, fontsize=self.time_series_fontsize)
-                        x_plot.autoscale(enable=True, axis="x", tight=True)
-
-                        y_plot = time_series_fig.add_subplot(212)
-                        y_plot.plot(selected_flow.t_values, selected_flow.y_values, color=self.flow_color,
-                                    linewidth=self.flow_linewidth)
-                        y_plot.set_ylabel("y(t)", color=self.figure_axes_color, fontsize=self.time_series_fontsize)
-                        y_plot.set_xlabel("t", color=self.figure_axes_color, fontsize=self.time_series_fontsize)
-                        y_plot.autoscale(enable=True, axis="x", tight=True)
-
-                        title_str = "($x_0$, $y_0$) = (" + "{:+.2f}".format(selected_flow.x0) + ", " + \
-                                    "{:+.2f}".format(selected_flow.y0) + ")"
-                        x_plot.set_title(title_str, color=self.figure_axes_color, fontsize=self.time_series_fontsize)
-
-                        # Matching style/colors to top level's figure canvas.
-                        time_series_fig.set_facecolor(self.figure_background_color)
-
-                        for tseries in (x_plot, y_plot):
-                            tseries.set_facecolor(self.figure_background_color)
-                            tseries.tick_params(axis="both", which="both", color=self.figure_axes_color, direction="in",
-                                                labelcolor=self.figure_axes_color, labelsize=self.time_series_fontsize)
-
-                            for spine in tseries.spines.values():
-                                spine.set_edgecolor(self.figure_axes_color)
-                                spine.set_linewidth(1)
-
-                            if self.figure_settings.show_grid.get():
-                                tseries.grid(linestyle=self.figure_grid_style, color=self.figure_axes_color,
-                                             alpha=self.figure_grid_alpha)
-
+                        time_series_fig = Figure()
                         time_series_canvas = FigureCanvasTkAgg(time_series_fig, time_series_window)
+                        profiler.instrument_canvas(time_series_canvas, "time_series_canvas.draw")
                         time_series_canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+                        self.time_series = TimeSeriesPlot(time_series_fig, self)
 
                         def on_closing():
-                            plt.close(time_series_fig)
+                            self.time_series.close()
+                            self.time_series = None
                             time_series_window.destroy()
 
                         time_series_window.protocol("WM_DELETE_WINDOW", on_closing)
+                        time_series_window.update_idletasks()  # The axes are sized before the series is decimated.
+
+                    # The circles are in the same order as the flows.
+                    self.time_series.show_flow(self.flows[idx])
+                    self.time_series.fig.canvas.get_tk_widget().winfo_toplevel().lift()
 
         self.fig.canvas.mpl_connect("motion_notify_event", on_hover)
         self.fig.canvas.mpl_connect("button_press_event", on_click)
 
+        # Zooming with the mouse wheel and panning by dragging.
+        self.navigator = ViewNavigator(self)
+
+        def poll_export():
+            if self.export.is_done:
+                self.export_progress_bar.place_forget()
+                if self.export.error is not None:
+                    messagebox.showerror("Error", "Exporting the plot failed:\n{}".format(self.export.error))
+            else:
+                self.export_progress_bar.config(value=100 * self.export.progress)
+                self.after(self.export_poll_interval, poll_export)
+
+        # Saving either an image of the plot or the whole session, depending on the extension selected. Images are
+        # exported in the background, and unknown extensions are saved as PDFs.
         def save_image(event):
             if not self.is_animating:
-                pdf_filename = filedialog.asksaveasfilename(parent=self, defaultextension=".pdf",
-                                                            filetypes=(("pdf", ".pdf"),))
-                if pdf_filename:
-                    self.fig.savefig(pdf_filename, format="pdf", dpi=1000)
+                filename = filedialog.asksaveasfilename(parent=self, defaultextension=".pdf",
+                                                        filetypes=(("pdf", ".pdf"), ("svg", ".svg"), ("png", ".png"),
+                                                                   ("planarFlow session", ".pflow")))
+                if filename.endswith(".pflow"):
+                    if self.differential_equations.is_configured:
+                        save_session(self, filename)
+                    else:
+                        messagebox.showerror("Error", "The differential equations must be set to save a session.")
+                elif filename:
+                    if self.export is not None and not self.export.is_done:
+                        messagebox.showerror("Error", "The previous export is still running.")
+                        return
+
+                    file_format = os.path.splitext(filename)[1][1:].lower()
+                    try:
+                        load_flows(self)  # Every flow of a loaded session is needed for the export.
+                    except SessionError as error:
+                        messagebox.showerror("Error", "The flows could not be loaded:\n{}".format(error))
+                        return
+
+                    self.export = Export(self, filename, file_format if file_format in EXPORT_FORMATS else "pdf",
+                                         self.export_dpi, self.export_rasterize)
+                    self.export.start()
+
+                    self.export_progress_bar.config(value=0)
+                    self.export_progress_bar.place(x=10, rely=1, y=-10, anchor="sw")
+                    poll_export()
+
+        def open_session(event):
+            if not self.is_animating:
+                filename = filedialog.askopenfilename(parent=self, filetypes=(("planarFlow session", ".pflow"),))
+                if filename:
+                    try:
+                        load_session(self, filename)
+                    except OSError as error:
+                        messagebox.showerror("Error", "The session file could not be opened:\n{}".format(error))
+                    except SessionError as error:
+                        messagebox.showerror("Error", "Invalid session file:\n{}".format(error))
+
+        # The overlay is refreshed by a single loop of after calls, which is cancelled when profiling is disabled.
+        self.pending_hud_update = None
+
+        def update_profiler_hud():
+            self.pending_hud_update = None
+            if profiler.enabled:
+                self.profiler_hud.config(text=profiler.summary(), background=self.figure_background_color)
+                self.pending_hud_update = self.after(self.profiler_hud_interval, update_profiler_hud)
+
+        # Enabling profiling shows the performance overlay, and disabling it hides the overlay. The recorded events are
+        # kept until they are exported.
+        def toggle_profiler(event=None):
+            if profiler.enabled:
+                profiler.disable()
+                self.profiler_hud.place_forget()
+                if self.pending_hud_update is not None:
+                    self.after_cancel(self.pending_hud_update)
+                    self.pending_hud_update = None
+            else:
+                profiler.enable()
+                self.profiler_hud.place(x=10, y=10)
+                update_profiler_hud()
+
+        def export_trace(event):
+            filename = filedialog.asksaveasfilename(parent=self, defaultextension=".json",
+                                                    filetypes=(("Chrome trace", ".json"),))
+            if filename:
+                profiler.export_chrome_trace(filename)
+                profiler.reset()
+
+        self.toggle_profiler = toggle_profiler
 
         self.bind("<Control-s>", save_image)
+        self.bind("<Control-o>", open_session)
+        self.bind("<Control-p>", toggle_profiler)
+        self.bind("<Control-P>", export_trace)
 
     def set_GUI_theme(self, mode):
         if mode == "dark":
@@ -367,6 +512,18 @@ class App(tk.Tk):
 
 
 if __name__ == "__main__":
-    app = App()
+    app = App(launch_time)
     app.protocol("WM_DELETE_WINDOW", sys.exit)
+
+    # Running "python planarflow.py --profile" starts the app with profiling enabled and the performance overlay shown.
+    if "--profile" in sys.argv:
+        app.toggle_profiler()
+
+    # Running "python planarflow.py --startup-report" prints the time spent in each phase of the startup once the
+    # window is shown. Use "python -X importtime planarflow.py" for a breakdown of the imports.
+    if "--startup-report" in sys.argv:
+        app.update()
+        app.startup_report.mark("window shown")
+        app.startup_report.print()
+
     app.mainloop()
@@ -0,0 +1,64 @@
+"""
+Tests of the bifurcation sweeps: the attractors found at each parameter value, and the sweep's tiles.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+
+from lib import numerical_methods
+from lib.bifurcation import SADDLE, STABLE, BifurcationSweep, find_attractors, regime, sweep_equations
+from lib.expressions import Expression
+
+EXTENT = (-2., 2., -2., 2.)
+
+
+def attractors(dxdt, dydt, values, seeds=5, transient=20., sample_time=10.):
+    variables = ("t", "x", "y")
+    f, g = Expression(dxdt, variables, {"mu": 0.}), Expression(dydt, variables, {"mu": 0.})
+    equations = sweep_equations(f, g, ("mu", ), np.array(values, dtype=np.float64)[:, np.newaxis])
+    x0, y0 = np.meshgrid(np.linspace(-1.8, 1.8, seeds), np.linspace(-1.8, 1.8, seeds))
+    return find_attractors(numerical_methods.RK4, equations, x0.ravel(), y0.ravel(), len(values), transient,
+                           sample_time, 0.01, EXTENT)
+
+
+def test_pitchfork():
+    # At mu = 0 the equilibrium is degenerate, and Newton's method stops at a distance from it that depends on the seed.
+    results = attractors("mu*x - x**3", "-y", [-0.5, 0., 0.5])
+    assert [regime(kinds, cycles) for _, kinds, cycles in results] == \
+        ["1 stable equilibrium", "1 stable equilibrium", "2 stable equilibria"]
+
+    points, kinds, _ = results[2]
+    np.testing.assert_allclose(np.sort(points[kinds == STABLE, 0]), [-np.sqrt(0.5), np.sqrt(0.5)], atol=1e-9)
+    np.testing.assert_allclose(points[kinds == SADDLE], [[0., 0.]], atol=1e-9)
+
+
+def test_hopf():
+    # The limit cycle of the normal form of the Hopf bifurcation has radius sqrt(mu).
+    results = attractors("mu*x - y - x*(x**2 + y**2)", "x + mu*y - y*(x**2 + y**2)", [-0.5, 0.5])
+    assert [regime(kinds, cycles) for _, kinds, cycles in results] == ["1 stable equilibrium", "1 limit cycle"]
+    np.testing.assert_allclose(results[1][2][0], [-np.sqrt(0.5), np.sqrt(0.5)] * 2, atol=1e-2)
+
+
+def test_sweep_in_pool():
+    variables = ("t", "x", "y")
+    f, g = Expression("mu*x - x**3", variables, {"mu": 0.}), Expression("-y", variables, {"mu": 0.})
+    sweep = BifurcationSweep(("mu", ), [np.linspace(-0.5, 0.5, 5)])
+    x0, y0 = np.meshgrid(np.linspace(-1.8, 1.8, 5), np.linspace(-1.8, 1.8, 5))
+    sweep.submit(numerical_methods.RK4, f, g, x0.ravel(), y0.ravel(), 20., 10., 0.01, EXTENT)
+
+    added, error = sweep.collect(wait=True)
+    assert error is None and sweep.is_complete()
+    assert sum(tile.stop - tile.start for tile in added) == 5
+    assert [regime(kinds, cycles) for _, kinds, cycles in sweep.results] == \
+        ["1 stable equilibrium"] * 3 + ["2 stable equilibria"] * 2
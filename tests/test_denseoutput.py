@@ -0,0 +1,55 @@
+"""
+Tests of the dense output of the flows: values between the time-steps, interpolated with the equations' derivatives.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+
+from lib import numerical_methods
+from lib.denseoutput import hermite, locate
+from lib.expressions import Expression
+from lib.flow import Flow, FlowStack
+
+
+def test_hermite_is_exact_for_cubics():
+    p = np.polynomial.Polynomial([0.3, -1., 2., 0.7])
+    theta = np.linspace(0., 1., 11)
+    np.testing.assert_allclose(hermite(theta, 2., p(1.), p(3.), p.deriv()(1.), p.deriv()(3.)), p(1. + 2. * theta))
+
+
+def test_locate():
+    idx, fraction = locate(np.array([0., 1., 2., 4.]), np.array([-1., 0., 0.5, 2., 3., 5.]))
+    np.testing.assert_array_equal(idx, [0, 0, 0, 2, 2, 2])
+    np.testing.assert_allclose(fraction, [0., 0., 0.5, 0., 0.5, 1.])
+
+
+def test_evaluate_between_steps():
+    # The harmonic oscillator from (1, 0) follows (cos t, -sin t).
+    variables = ("t", "x", "y")
+    flows = [Flow(1., 0., Expression("y", variables), Expression("-x", variables), 10., 0.1) for _ in range(2)]
+    for flow in flows:
+        flow.integrate("RK4", {"RK4": numerical_methods.RK4})
+        flow.create_trajectory()
+
+    times = np.linspace(0., 10., 1001)
+    x, y = flows[0].evaluate(times)
+    np.testing.assert_allclose(x, np.cos(times), atol=1e-5)
+    np.testing.assert_allclose(y, -np.sin(times), atol=1e-5)
+
+    # The flows evaluated together give the same values.
+    stack = FlowStack(flows)
+    for time in times[::50]:
+        x, y = stack.evaluate(time)
+        np.testing.assert_allclose(x, np.cos(time), atol=1e-5)
+        np.testing.assert_allclose(y, -np.sin(time), atol=1e-5)
@@ -0,0 +1,96 @@
+"""
+Tests of the expression compiler: expressions that must be rejected, and agreement of the compiled kernels with NumPy.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+import pytest
+
+from lib.expressions import Expression, ExpressionError, FUNCTIONS, evaluate_constant
+
+X = np.array([-2.5, -1., -0.5, 0., 0.3, 0.9, 1., 1.7, 4.])
+Y = np.array([0.2, 3., 0.7, 0.5, 2., 0.4, 1.5, 0.9, 7.])
+
+# Expression using each function -> the same values computed with NumPy.
+REFERENCES = {"sin(x)": lambda x, y: np.sin(x), "cos(x)": lambda x, y: np.cos(x), "tan(x)": lambda x, y: np.tan(x),
+              "asin(x)": lambda x, y: np.arcsin(x), "acos(x)": lambda x, y: np.arccos(x),
+              "atan(x)": lambda x, y: np.arctan(x), "atan2(x, y)": lambda x, y: np.arctan2(x, y),
+              "sinh(x)": lambda x, y: np.sinh(x), "cosh(x)": lambda x, y: np.cosh(x),
+              "tanh(x)": lambda x, y: np.tanh(x), "asinh(x)": lambda x, y: np.arcsinh(x),
+              "acosh(x)": lambda x, y: np.arccosh(x), "atanh(x)": lambda x, y: np.arctanh(x),
+              "exp(x)": lambda x, y: np.exp(x), "log(x)": lambda x, y: np.log(x),
+              "log(x, y)": lambda x, y: np.log(x) / np.log(y), "sqrt(x)": lambda x, y: np.sqrt(x),
+              "cbrt(x)": lambda x, y: np.cbrt(x), "Abs(x)": lambda x, y: np.abs(x), "abs(x)": lambda x, y: np.abs(x),
+              "sign(x)": lambda x, y: np.sign(x), "floor(x)": lambda x, y: np.floor(x),
+              "ceiling(x)": lambda x, y: np.ceil(x), "Min(x, y, 1)": lambda x, y: np.minimum(np.minimum(x, y), 1.),
+              "Max(x, y)": lambda x, y: np.maximum(x, y), "Heaviside(x)": lambda x, y: np.heaviside(x, 0.5),
+              "Heaviside(x, y)": lambda x, y: np.heaviside(x, y), "cot(x)": lambda x, y: 1. / np.tan(x),
+              "sec(x)": lambda x, y: 1. / np.cos(x), "csc(x)": lambda x, y: 1. / np.sin(x)}
+
+
+def assert_matches(text, reference):
+    eqn = Expression(text, ("x", "y"))
+    with np.errstate(all="ignore"):
+        expected = reference(X, Y)
+
+        # The array kernel, and the scalar kernels with Python and NumPy scalars.
+        np.testing.assert_allclose(eqn(X, Y), expected, rtol=1e-12, atol=1e-15, equal_nan=True)
+        for x, y, value in zip(X, Y, expected):
+            np.testing.assert_allclose(eqn(float(x), float(y)), value, rtol=1e-12, atol=1e-15, equal_nan=True)
+            np.testing.assert_allclose(eqn(x, y), value, rtol=1e-12, atol=1e-15, equal_nan=True)
+
+
+def test_references_cover_functions():
+    assert {text.split("(")[0] for text in REFERENCES} == set(FUNCTIONS)
+
+
+@pytest.mark.parametrize("text", REFERENCES)
+def test_functions_match_numpy(text):
+    assert_matches(text, REFERENCES[text])
+
+
+@pytest.mark.parametrize("text, reference", [
+    ("x^2 + y^3", lambda x, y: x ** 2 + y ** 3),
+    ("x**3 - x", lambda x, y: x ** 3 - x),
+    ("x**4 * y", lambda x, y: x ** 4 * y),
+    ("x**0.5 + y**-1", lambda x, y: np.sqrt(x) + 1. / y),
+    ("y**x", lambda x, y: y ** x),
+    ("x % y - x // y", lambda x, y: np.remainder(x, y) - np.floor_divide(x, y)),
+    ("-x + +y - 2*pi/E", lambda x, y: -x + y - 2 * np.pi / np.e),
+])
+def test_operators_match_numpy(text, reference):
+    assert_matches(text, reference)
+
+
+def test_caret_is_power():
+    assert evaluate_constant("2^10") == 1024.
+    assert Expression("x^3", ("x", "y"))(2., 0.) == 8.
+
+
+@pytest.mark.parametrize("text", [
+    "x.real", "(1).__class__", "x.__class__.__bases__", "__import__('os')", "__builtins__",
+    "lambda: 1", "(lambda x: x)(1)", "[x for x in (1, 2)]", "sum(x for x in (1, 2))", "{x for x in (1,)}",
+    "eval('1')", "open('f')", "x if y else 1", "x < y", "x and y", "'a'", "True", "[1, 2]", "x[0]", "sin(x=1)",
+    "sin(*y)", "sin(x, y)", "atan2(x)", "Min()", "z", "x = 1", "",
+])
+def test_rejected(text):
+    with pytest.raises(ExpressionError):
+        Expression(text, ("x", "y"))
+
+
+def test_parameters_are_bound():
+    eqn = Expression("a*x + b", ("x", "y"), {"a": 2., "b": -1.})
+    assert eqn(3., 0.) == 5.
+    with pytest.raises(ExpressionError):
+        Expression("a*x", ("x", "y"))
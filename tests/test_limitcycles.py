@@ -0,0 +1,47 @@
+"""
+Tests of the search for limit cycles: the cycles found from the seeds, their periods and stability.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+import pytest
+
+from lib import numerical_methods
+from lib.expressions import Expression
+from lib.flow import prepare_equations
+from lib.limitcycles import find_limit_cycles
+
+VARIABLES = ("t", "x", "y")
+
+
+def limit_cycles(dxdt, dydt):
+    f, g = prepare_equations(Expression(dxdt, VARIABLES), Expression(dydt, VARIABLES))
+    x0, y0 = np.meshgrid(np.linspace(-1.5, 1.5, 3), np.linspace(-1.5, 1.5, 3))
+    return find_limit_cycles(numerical_methods.RK4, f, g, x0.ravel(), y0.ravel(), 0.01, 20., 10., 3.)
+
+
+def test_hopf_normal_form():
+    # The unit circle is a stable limit cycle of period 2 pi, whose multiplier is exp(-4 pi).
+    cycles = limit_cycles("x - y - x*(x**2 + y**2)", "x + y - y*(x**2 + y**2)")
+    assert len(cycles) == 1
+    cycle = cycles[0]
+    assert cycle.is_stable
+    np.testing.assert_allclose(cycle.period, 2 * np.pi, rtol=1e-6)
+    np.testing.assert_allclose(np.hypot(cycle.x_values, cycle.y_values), 1., atol=1e-4)
+    assert abs(cycle.multiplier) < 1e-3
+
+
+def test_rejects_non_autonomous_equations():
+    with pytest.raises(ValueError):
+        limit_cycles("y", "-x + cos(t)")
@@ -0,0 +1,45 @@
+"""
+Tests of the LRU cache: the least recently used entries are dropped once the cache holds too many values.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+from lib.lrucache import LRUCache
+
+
+def test_entry_count():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_value_count():
+    cache = LRUCache(10, len)
+    cache.put("a", [0] * 4)
+    cache.put("b", [0] * 4)
+    cache.put("a", [0] * 2)
+    assert cache.values == 6
+    cache.put("c", [0] * 5)
+    assert cache.get("b") is None and len(cache) == 2 and cache.values == 7
+
+
+def test_large_value_is_kept():
+    cache = LRUCache(10, len)
+    cache.put("a", [0] * 4)
+    cache.put("b", [0] * 20)
+    assert cache.get("a") is None and cache.get("b") is not None
+    cache.clear()
+    assert len(cache) == 0 and cache.values == 0
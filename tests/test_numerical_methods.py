@@ -0,0 +1,61 @@
+"""
+Tests of the numerical methods: accuracy on a stiff system, and agreement of batch mode with single initial points.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+import pytest
+
+from lib import numerical_methods
+from lib.expressions import Expression
+from lib.flow import prepare_equations
+
+STIFF_METHODS = ("BackwardEuler", "TRBDF2", "Rosenbrock")
+
+
+def van_der_pol(mu):
+    return prepare_equations(Expression("y", ("t", "x", "y")), Expression("%g*(1 - x**2)*y - x" % mu, ("t", "x", "y")))
+
+
+@pytest.mark.parametrize("method", STIFF_METHODS)
+@pytest.mark.parametrize("dt", [1., 0.2])
+def test_stiff_limit_cycle_amplitude(method, dt):
+    # The limit cycle of the Van der Pol oscillator with a large damping parameter has an amplitude of 2.
+    dxdt, dydt = van_der_pol(1000)
+    t, x, y = getattr(numerical_methods, method)(dxdt, dydt, 2., 0., 3000., dt)
+    assert len(t) == len(x) == round(3000 / dt) + 1
+    assert np.all(np.isfinite(x))
+    assert np.max(np.abs(x)) == pytest.approx(2., abs=0.01)
+
+
+@pytest.mark.parametrize("method", STIFF_METHODS)
+def test_stiff_batch_matches_points(method):
+    dxdt, dydt = van_der_pol(100)
+    # Enough initial points to be integrated as a batch rather than one at a time.
+    n = numerical_methods._MIN_BATCH_SIZE
+    x0, y0 = np.linspace(-3., 3., n), np.linspace(1., -2., n)
+    t, x, y = getattr(numerical_methods, method)(dxdt, dydt, x0, y0, 100., 0.5)
+    for i in range(0, len(x0), 5):
+        _, x_i, y_i = getattr(numerical_methods, method)(dxdt, dydt, x0[i], y0[i], 100., 0.5)
+        np.testing.assert_allclose(x[:, i], x_i, rtol=1e-3, atol=1e-4)
+        np.testing.assert_allclose(y[:, i], y_i, rtol=1e-3, atol=1e-4)
+
+
+@pytest.mark.parametrize("method", STIFF_METHODS)
+def test_stiff_blow_up_is_nan(method):
+    # dx/dt = x^2 from x = 1 blows up at t = 1; the values are NaN from then on rather than garbage.
+    dxdt, dydt = prepare_equations(Expression("x**2", ("t", "x", "y")), Expression("0", ("t", "x", "y")))
+    t, x, y = getattr(numerical_methods, method)(dxdt, dydt, 1., 0., 2., 0.01)
+    np.testing.assert_allclose(x[t < 0.5], 1 / (1 - t[t < 0.5]), rtol=2e-2)
+    assert np.all(np.isnan(x[t > 1.05]))
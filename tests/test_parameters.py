@@ -0,0 +1,76 @@
+"""
+Tests of changing the parameters of the equations: flows are integrated again, or taken from the cache, and flows in the
+scratch files are overwritten in place.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+import pytest
+
+from benchmarks.headless import create_app
+from lib import parameters
+from lib.frames.addtrajectoriesframe import add_flows
+from lib.parameters import clear_parameter_cache, set_parameter_values
+
+SEEDS = [(0.5, 0.2), (-0.3, 0.7), (0.1, -0.9)]
+
+
+def parameter_app(storage):
+    clear_parameter_cache()
+    top = create_app(dxdt="y", dydt="-a*x - 0.5*y", trajectory_storage=storage, parameters={"a": 1.})
+    add_flows(top, SEEDS)
+    return top
+
+
+def reference(a):
+    top = create_app(dxdt="y", dydt="-a*x - 0.5*y", parameters={"a": a})
+    add_flows(top, SEEDS)
+    return [flow.trajectory for flow in top.flows]
+
+
+@pytest.mark.parametrize("storage", ["memory", "disk"])
+def test_reintegrated_trajectories(storage):
+    top = parameter_app(storage)
+    for a in (2., 1., 2.):
+        set_parameter_values(top, {"a": a})
+        for flow, trajectory in zip(top.flows, reference(a)):
+            np.testing.assert_array_equal(flow.trajectory, trajectory)
+            assert flow.get_pyramid() is None or flow.get_pyramid().trajectory is flow.trajectory
+
+
+def test_memory_trajectories_are_cached():
+    top = parameter_app("memory")
+    first = [flow.trajectory for flow in top.flows]
+    set_parameter_values(top, {"a": 2.})
+    set_parameter_values(top, {"a": 2.})
+    second = [flow.trajectory for flow in top.flows]
+    set_parameter_values(top, {"a": 3.})
+    set_parameter_values(top, {"a": 2.})
+    assert all(a is b for a, b in zip(second, [flow.trajectory for flow in top.flows]))
+    assert not any(a is b for a, b in zip(first, second))
+
+
+def test_disk_trajectories_are_overwritten():
+    # The scratch files do not grow when the flows are integrated again, and their trajectories are not cached.
+    top = parameter_app("disk")
+    store = top.trajectory_store
+    chunks, offset = store.chunk_count, store.chunk_offset
+    trajectories = [flow.trajectory for flow in top.flows]
+
+    for a in (2., 3., 2.):
+        set_parameter_values(top, {"a": a})
+    assert (store.chunk_count, store.chunk_offset) == (chunks, offset)
+    assert all(a is b for a, b in zip(trajectories, [flow.trajectory for flow in top.flows]))
+    assert not parameters._cache
+    store.clear()
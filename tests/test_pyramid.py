@@ -0,0 +1,66 @@
+"""
+Tests of the trajectory pyramid: the error of each level must bound the distance between the trajectory and the level's
+polyline.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+import pytest
+
+from lib.pyramid import TrajectoryPyramid
+
+
+def random_walk(n, dtype):
+    return np.cumsum(np.random.default_rng(n).standard_normal((n, 2)), axis=0).astype(dtype)
+
+
+def spiral(n, dtype):
+    t = np.linspace(0., 20., n)
+    return np.stack([np.exp(-0.1 * t) * np.cos(t), 3 * np.exp(-0.1 * t) * np.sin(t)], axis=1).astype(dtype)
+
+
+def level_distance(pyramid, level):
+    # Largest x and y distances between the trajectory and the level's polyline, both taken at the same index.
+    indices, points = pyramid.indices(level), pyramid.points(level).astype(np.float64)
+    steps = np.arange(len(pyramid.trajectory))
+    polyline = np.stack([np.interp(steps, indices, points[:, 0]), np.interp(steps, indices, points[:, 1])], axis=1)
+    return np.abs(pyramid.trajectory - polyline).max(axis=0)
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+@pytest.mark.parametrize("n", [2, 3, 5, 6, 100, 1000, 1025, 1026, 1500])
+@pytest.mark.parametrize("trajectory", [random_walk, spiral])
+def test_error_bounds_distance(trajectory, n, dtype):
+    pyramid = TrajectoryPyramid(trajectory(n, dtype))
+    assert len(pyramid.indices(pyramid.top_level)) == 2
+
+    for level in range(pyramid.top_level + 1):
+        distance, bound = level_distance(pyramid, level), pyramid.error(level)
+        assert np.all(distance <= bound * (1 + 1e-6) + 1e-12)
+        if level > 0:
+            assert np.all(bound >= pyramid.error(level - 1))
+
+
+def test_select_within_tolerance():
+    pyramid = TrajectoryPyramid(spiral(10000, np.float64))
+    for scale in (10., 100., 1000.):
+        level = pyramid.select(scale, scale)
+        assert np.all(level_distance(pyramid, level) * scale <= 0.5)
+        assert 0 < level < pyramid.top_level
+
+
+def test_not_finite_has_no_bound():
+    trajectory = spiral(100, np.float64)
+    trajectory[40] = np.nan
+    assert not np.all(np.isfinite(TrajectoryPyramid(trajectory).error(3)))
@@ -0,0 +1,108 @@
+"""
+Tests of the generators of initial points: the points stay in their region and have the structure of their sequence.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import numpy as np
+import pytest
+
+from lib.expressions import ExpressionError
+from lib.seeds import (REGION_GENERATORS, circle_seeds, curve_seeds, halton_seeds, latin_hypercube_seeds, parse_curve,
+                       poisson_disk_seeds, sobol_seeds)
+
+EXTENT = (-2., 3., 1., 1.5)
+UNIT_SQUARE = (0., 1., 0., 1.)
+
+
+class Unshifted:
+    # Stands in for the random generator of the quasi-random sequences, whose random shift it sets to zero.
+    def random(self, size):
+        return np.zeros(size)
+
+
+@pytest.mark.parametrize("name", REGION_GENERATORS)
+def test_points_in_region(name):
+    x, y = REGION_GENERATORS[name](500, EXTENT, np.random.default_rng(0))
+    assert len(x) == len(y) == 500
+    assert np.all((x >= EXTENT[0]) & (x <= EXTENT[1]) & (y >= EXTENT[2]) & (y <= EXTENT[3]))
+
+
+@pytest.mark.parametrize("name", REGION_GENERATORS)
+def test_repeated_points_differ(name):
+    rng = np.random.default_rng(0)
+    first, second = REGION_GENERATORS[name](50, EXTENT, rng), REGION_GENERATORS[name](50, EXTENT, rng)
+    assert not np.array_equal(first, second)
+
+
+def test_halton_radical_inverses():
+    x, y = halton_seeds(4, UNIT_SQUARE, Unshifted())
+    np.testing.assert_allclose(x, [1 / 2, 1 / 4, 3 / 4, 1 / 8])
+    np.testing.assert_allclose(y, [1 / 3, 2 / 3, 1 / 9, 4 / 9])
+
+
+def test_sobol_sequence():
+    x, y = sobol_seeds(8, UNIT_SQUARE, Unshifted())
+    np.testing.assert_array_equal(x, [0., 0.5, 0.25, 0.75, 0.125, 0.625, 0.375, 0.875])
+    np.testing.assert_array_equal(y, [0., 0.5, 0.75, 0.25, 0.625, 0.125, 0.375, 0.875])
+
+
+@pytest.mark.parametrize("k", [4, 8])
+def test_sobol_is_a_net(k):
+    # The first 2^k points have exactly one point in every box of area 2^-k whose sides are powers of 1/2.
+    x, y = sobol_seeds(2 ** k, UNIT_SQUARE, Unshifted())
+    for a in range(k + 1):
+        boxes = np.floor(x * 2 ** a).astype(int) * 2 ** (k - a) + np.floor(y * 2 ** (k - a)).astype(int)
+        assert len(np.unique(boxes)) == 2 ** k
+
+
+def test_latin_hypercube_strata():
+    x, y = latin_hypercube_seeds(100, UNIT_SQUARE, np.random.default_rng(0))
+    np.testing.assert_array_equal(np.sort(np.floor(x * 100)), np.arange(100))
+    np.testing.assert_array_equal(np.sort(np.floor(y * 100)), np.arange(100))
+
+
+def test_poisson_disk_distance():
+    n = 400
+    x, y = poisson_disk_seeds(n, EXTENT, np.random.default_rng(0))
+    assert len(x) == n
+
+    distances = np.hypot(x[:, np.newaxis] - x, y[:, np.newaxis] - y)
+    np.fill_diagonal(distances, np.inf)
+    radius = 0.7 * np.sqrt((EXTENT[1] - EXTENT[0]) * (EXTENT[3] - EXTENT[2]) / n)
+    assert distances.min() >= radius
+
+
+def test_circle():
+    x, y = circle_seeds(12, 1., -2., 0.5)
+    np.testing.assert_allclose(np.hypot(x - 1., y + 2.), 0.5)
+    np.testing.assert_allclose(np.diff(np.unwrap(np.arctan2(y + 2., x - 1.))), 2 * np.pi / 12)
+
+
+def test_curve_arc_length():
+    # Along a quarter of the unit circle, parametrized unevenly, the points are evenly spaced and include both ends.
+    x, y = curve_seeds(10, *parse_curve("cos(pi/2*s**2), sin(pi/2*s**2)"))
+    np.testing.assert_allclose((x[0], y[0], x[-1], y[-1]), (1., 0., 0., 1.), atol=1e-12)
+    np.testing.assert_allclose(np.arctan2(y, x), np.linspace(0., np.pi / 2, 10), atol=1e-3)
+
+
+def test_curve_point():
+    x, y = curve_seeds(3, *parse_curve("1, 2"))
+    np.testing.assert_array_equal(x, [1., 1., 1.])
+    np.testing.assert_array_equal(y, [2., 2., 2.])
+
+
+@pytest.mark.parametrize("text", ["s", "s, s, s", "x, s", "s, (", "1 / s, s"])
+def test_rejected_curves(text):
+    with pytest.raises(ExpressionError):
+        curve_seeds(5, *parse_curve(text))
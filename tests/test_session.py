@@ -0,0 +1,187 @@
+"""
+Tests of session files: chunks and whole sessions must read back exactly as they were saved, and files that cannot be
+read must raise a SessionError and leave the current session as it was.
+
+Copyright (C) 2023 Casey Smith <casey.junpei.smith@gmail.com>
+
+This file is part of planarFlow.
+
+planarFlow is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+planarFlow is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with planarFlow. If not, see
+<https://www.gnu.org/licenses/>.
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from benchmarks.headless import create_app
+from lib.expressions import Expression
+from lib.frames.addtrajectoriesframe import add_flows
+from lib.parameters import clear_parameter_cache
+from lib.session import (SESSION_MAGIC, SESSION_PREAMBLE, SESSION_VERSION, SessionError, SessionReader, load_flows,
+                         load_session, save_session, write_chunk)
+
+
+def sessionable(top):
+    # The headless app has no frames, so the functions that the frames provide to load sessions are added here.
+    equations, settings = top.differential_equations, top.figure_settings
+
+    def parameter_settings():
+        return {name: [value, *equations.parameter_ranges[name]] for name, value in equations.parameters.items()}
+
+    def load_equations(dxdt, dydt, tmax, dt, parameters=None):
+        if dxdt == "invalid":  # Stands in for equations that the frame rejects.
+            return False
+        if parameters:
+            equations.parameters.update({name: value for name, (value, _, _) in parameters.items()})
+            equations.parameter_ranges.update({name: (low, high) for name, (_, low, high) in parameters.items()})
+        equations.dxdt = Expression(dxdt, ("t", "x", "y"), equations.parameters)
+        equations.dydt = Expression(dydt, ("t", "x", "y"), equations.parameters)
+        equations.tmax, equations.dt = float(tmax), float(dt)
+        equations.equation_strings = {"dxdt": dxdt, "dydt": dydt, "tmax": tmax, "dt": dt}
+
+        top.flows.clear()
+        top.flow_seeds.clear()
+        top.graphs.clear()
+        top.flow_trajectory_collection.lines.clear()
+        top.flow_circle_collection.patches.clear()
+        top.flow_arrowhead_collection.patches.clear()
+        clear_parameter_cache()
+        top.trajectory_store.clear()
+        return True
+
+    def load_settings(xmin, xmax, ymin, ymax, xtick_spacing, ytick_spacing, show_x_ticklabels, show_y_ticklabels,
+                      show_grid):
+        settings.xmin, settings.xmax, settings.ymin, settings.ymax = xmin, xmax, ymin, ymax
+        settings.xtick_spacing, settings.ytick_spacing = xtick_spacing, ytick_spacing
+        settings.show_x_ticklabels.set(show_x_ticklabels)
+        settings.show_y_ticklabels.set(show_y_ticklabels)
+        settings.show_grid.set(show_grid)
+
+    equations.parameter_settings = parameter_settings
+    equations.load_equations = load_equations
+    settings.load_settings = load_settings
+    return top
+
+
+def saved_app(filename, precision="float64", xmin=-1., xmax=1.):
+    # Saves flows seeded in [-1, 1]^2, with the given horizontal limits of the view.
+    top = sessionable(create_app(dxdt="y", dydt="-a*x - 0.5*y", tmax=5., dt=0.01, numerical_method="RK4",
+                                 precision=precision, parameters={"a": 1.5}))
+    rng = np.random.default_rng(0)
+    add_flows(top, list(zip(rng.uniform(-1., 1., 20), rng.uniform(-1., 1., 20))))
+    top.figure_settings.xmin, top.figure_settings.xmax = xmin, xmax
+    save_session(top, filename)
+    return top
+
+
+def corrupt_flow(filename, idx):
+    chunk = SessionReader(filename).header["flows"][idx]["trajectory"]
+    assert chunk["codec"] != "raw"
+    with open(filename, "r+b") as file:
+        file.seek(chunk["offset"])
+        file.write(bytes([255]) * 16)
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+@pytest.mark.parametrize("codec, values", [
+    ("delta-shuffle-zlib", lambda n: np.stack([np.cos(np.linspace(0., 10., n)), np.sin(np.linspace(0., 10., n))], 1)),
+    ("raw", lambda n: np.random.default_rng(0).standard_normal((n, 2))),
+])
+def test_chunk_round_trip(tmp_path, dtype, codec, values):
+    array = values(1000).astype(dtype)
+    array[-10:] = np.nan  # Trajectories that leave the domain of the equations end in NaNs.
+
+    with open(tmp_path / "a.pflow", "wb") as file:
+        file.write(bytes(SESSION_PREAMBLE.size))
+        chunk = write_chunk(file, array)
+        header = json.dumps({"flows": []}).encode("utf-8")
+        file.write(header)
+        file.seek(0)
+        file.write(SESSION_PREAMBLE.pack(SESSION_MAGIC, SESSION_VERSION, 0, chunk["offset"] + chunk["length"],
+                                         len(header)))
+
+    assert chunk["codec"] == codec
+    read = SessionReader(str(tmp_path / "a.pflow")).read_chunk(chunk)
+    assert read.dtype == dtype
+    np.testing.assert_array_equal(read, array)
+
+
+@pytest.mark.parametrize("storage", ["memory", "disk"])
+@pytest.mark.parametrize("precision", ["float64", "float32"])
+def test_session_round_trip(tmp_path, precision, storage):
+    saved = saved_app(str(tmp_path / "a.pflow"), precision, 0.8, 2.)
+
+    # Only the flows in view are read when the session is loaded.
+    top = sessionable(create_app(xmin=5., xmax=6., ymin=5., ymax=6., trajectory_storage=storage))
+    add_flows(top, [(5.5, 5.5)])
+    load_session(top, str(tmp_path / "a.pflow"))
+
+    assert top.precision == precision and top.numerical_method == "RK4"
+    assert top.differential_equations.equation_strings["dydt"] == "-a*x - 0.5*y"
+    assert top.differential_equations.parameters == {"a": 1.5}
+    assert (top.figure_settings.xmin, top.figure_settings.xmax) == (0.8, 2.)
+    assert 0 < sum(flow.source is not None for flow in top.flows) < len(saved.flows)
+    for flow, saved_flow in zip(top.flows, saved.flows):
+        if flow.source is None:
+            np.testing.assert_array_equal(flow.trajectory, saved_flow.trajectory)
+            if isinstance(flow.trajectory, np.memmap):  # Read into scratch files that were not cleared since.
+                assert os.path.exists(flow.trajectory.filename)
+
+    # Saving again copies the flows that were not read, which then read back unchanged.
+    save_session(top, str(tmp_path / "b.pflow"))
+    copy = sessionable(create_app())
+    load_session(copy, str(tmp_path / "b.pflow"))
+    load_flows(copy)
+
+    assert [(flow.x0, flow.y0) for flow in copy.flows] == [(flow.x0, flow.y0) for flow in saved.flows]
+    for flow, saved_flow in zip(copy.flows, saved.flows):
+        np.testing.assert_array_equal(flow.t_values, saved_flow.t_values)
+        np.testing.assert_array_equal(flow.trajectory, saved_flow.trajectory)
+
+
+def test_corrupted_chunk(tmp_path):
+    # A flow in view is read when the session is loaded, which fails before the current session is replaced.
+    saved_app(str(tmp_path / "a.pflow"))
+    corrupt_flow(str(tmp_path / "a.pflow"), 0)
+    top = sessionable(create_app())
+    add_flows(top, [(0.5, 0.5)])
+    with pytest.raises(SessionError):
+        load_session(top, str(tmp_path / "a.pflow"))
+    assert [(flow.x0, flow.y0) for flow in top.flows] == [(0.5, 0.5)]
+    assert top.differential_equations.equation_strings["dydt"] == "-x - 0.5*y"
+
+    # A flow out of view is only read when it is needed.
+    saved_app(str(tmp_path / "b.pflow"), xmin=5., xmax=6.)
+    corrupt_flow(str(tmp_path / "b.pflow"), 0)
+    load_session(top, str(tmp_path / "b.pflow"))
+    assert all(flow.source is not None for flow in top.flows)
+    with pytest.raises(SessionError):
+        load_flows(top)
+
+
+def test_rejected_equations(tmp_path):
+    # Equations that cannot be set leave the current session and its settings as they were.
+    saved = saved_app(str(tmp_path / "a.pflow"), "float32")
+    saved.differential_equations.equation_strings["dxdt"] = "invalid"
+    save_session(saved, str(tmp_path / "a.pflow"))
+
+    top = sessionable(create_app(numerical_method="RK2"))
+    add_flows(top, [(0.5, 0.5)])
+    load_session(top, str(tmp_path / "a.pflow"))
+    assert (top.numerical_method, top.precision, top.trajectory_store.dtype) == ("RK2", "float64", np.float64)
+    assert [(flow.x0, flow.y0) for flow in top.flows] == [(0.5, 0.5)]
+
+
+@pytest.mark.parametrize("data", [b"", b"PLNRFLOW", bytes(1000), SESSION_PREAMBLE.pack(b"PLNRFLOW", 1, 0, 28, 5)])
+def test_not_a_session(tmp_path, data):
+    (tmp_path / "a.pflow").write_bytes(data)
+    with pytest.raises(SessionError):
+        load_session(sessionable(create_app()), str(tmp_path / "a.pflow"))